@@ -0,0 +1,432 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.analytics.sketch import METRIC_RANGES, ROLLUP_HISTOGRAM_BINS, ScoreHistogram
+from database.db_models import VerificationResult, VerificationRollup, VerificationRollupEntry
+
+logging.basicConfig(level=logging.INFO)
+
+ROLLUP_INTERVAL_SEC = int(os.getenv("ROLLUP_INTERVAL_SEC", 300))
+# Minimum gap between compactions triggered by finished sessions
+ROLLUP_MIN_INTERVAL_SEC = int(os.getenv("ROLLUP_MIN_INTERVAL_SEC", 15))
+# Rows this far behind the watermark are re-read each run, covering clock skew
+# between writers; re-reading an unchanged row is a no-op
+ROLLUP_WATERMARK_OVERLAP_SEC = int(os.getenv("ROLLUP_WATERMARK_OVERLAP_SEC", 120))
+ROLLUP_BATCH_SIZE = 500
+ROLLUP_LOCK_NAME = "vkyc_rollup_compactor"
+ROLLUP_MAX_BUCKETS = int(os.getenv("ROLLUP_MAX_BUCKETS", 744))
+
+HOUR = "hour"
+DAY = "day"
+METRICS = tuple(METRIC_RANGES)
+
+_SCORE_SUFFIX = re.compile(r"\s*\([^)]*\)\s*$")
+
+
+def _hour_floor(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_floor(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _failure_reasons(text: str | None) -> list:
+    """'Liveness Low (0.42), Face Mismatch (0.61)' -> ['Liveness Low', 'Face Mismatch']"""
+    if not text or text == "NA":
+        return []
+    return [_SCORE_SUFFIX.sub("", part) for part in text.split(", ") if part.strip()]
+
+
+def _is_final(row) -> bool:
+    return bool(row.is_final) and row.is_pass is not None and row.timestamp is not None
+
+
+def _entry_from_row(row) -> dict:
+    """verification_results row -> its verification_rollup_entries values."""
+    return {
+        "meeting_id": row.meeting_id,
+        "client_id": row.client_id,
+        "bucket_start": _hour_floor(row.timestamp),
+        "is_pass": bool(row.is_pass),
+        **{m: getattr(row, m) for m in METRICS},
+        "failure_reason": row.failure_reason,
+        "source_timestamp": row.timestamp,
+    }
+
+
+def _contribution(entry) -> tuple:
+    """What a row adds to the rollups; equal tuples mean nothing to re-apply."""
+    get = entry.get if isinstance(entry, dict) else lambda c: getattr(entry, c)
+    return (get("bucket_start"), bool(get("is_pass")), *[get(m) for m in METRICS], get("failure_reason"))
+
+
+class Bucket:
+    """In-memory rollup for one hour/day: counts, score histograms and failure reasons."""
+    def __init__(self, total: int = 0, passed: int = 0, metrics: dict | None = None, reasons: dict | None = None):
+        self.total = total
+        self.passed = passed
+        self.metrics = {m: ScoreHistogram.for_metric(m, (metrics or {}).get(m)) for m in METRICS}
+        self.reasons = Counter(reasons or {})
+
+    @classmethod
+    def from_row(cls, row) -> "Bucket":
+        return cls(row.total, row.passed, json.loads(row.metrics or "{}"), json.loads(row.failure_reasons or "{}"))
+
+    def add(self, is_pass: bool, scores: dict, failure_reason: str | None):
+        self.total += 1
+        self.passed += 1 if is_pass else 0
+        for metric, value in scores.items():
+            if value is not None:
+                self.metrics[metric].add(value)
+        self.reasons.update(_failure_reasons(failure_reason))
+
+    def remove(self, is_pass: bool, scores: dict, failure_reason: str | None):
+        """Undoes `add`; on an empty bucket this builds a negative delta."""
+        self.total -= 1
+        self.passed -= 1 if is_pass else 0
+        for metric, value in scores.items():
+            if value is not None:
+                self.metrics[metric].remove(value)
+        self.reasons.subtract(_failure_reasons(failure_reason))
+
+    @property
+    def stale(self) -> bool:
+        """True when stored with a different ROLLUP_HISTOGRAM_BINS than the current one."""
+        return any(h.bins != ROLLUP_HISTOGRAM_BINS for h in self.metrics.values())
+
+    def rebinned(self) -> "Bucket":
+        for metric, hist in self.metrics.items():
+            self.metrics[metric] = hist.rebin(ROLLUP_HISTOGRAM_BINS)
+        return self
+
+    def merge(self, other: "Bucket"):
+        self.total += other.total
+        self.passed += other.passed
+        for metric in METRICS:
+            self.metrics[metric].merge(other.metrics[metric])
+        self.reasons.update(other.reasons)
+        # Deltas can carry negative counts; drop reasons that reached zero
+        self.reasons = +self.reasons
+
+    def to_row(self, granularity: str, bucket_start: datetime) -> dict:
+        return {
+            "granularity": granularity,
+            "bucket_start": bucket_start,
+            "total": self.total,
+            "passed": self.passed,
+            "metrics": json.dumps({m: h.to_dict() for m, h in self.metrics.items()}),
+            "failure_reasons": json.dumps(dict(self.reasons)),
+        }
+
+    def summary(self) -> dict:
+        return {
+            "total": self.total,
+            "passed": self.passed,
+            "pass_rate": round(self.passed / self.total, 4) if self.total else None,
+            **{m: h.summary() for m, h in self.metrics.items()},
+            "failure_reasons": dict(self.reasons.most_common()),
+        }
+
+
+class RollupCompactor:
+    """
+    Maintains hourly and daily rollups of final verification results in
+    verification_rollups, incrementally. verification_rollup_entries records
+    what each (meeting, client) row currently contributes; a run reads only
+    rows written since the newest applied one (the watermark, via the
+    timestamp index), and for each row that actually changed subtracts its
+    old contribution and adds the new one to its hour and day buckets. Rows
+    that are not final (a session still in progress, or re-verifying) count
+    for nothing.
+
+    Every worker runs a compactor, but a run only proceeds while holding a
+    MySQL named lock, so one process compacts at a time and the others skip.
+    Runs every ROLLUP_INTERVAL_SEC, or sooner after `mark_dirty` (a session
+    ended). An empty ledger (first start) or `--full` rebuilds everything.
+    """
+    def __init__(self, session_factory, lock_engine=None, interval_sec: int = ROLLUP_INTERVAL_SEC):
+        self._session_factory = session_factory
+        self._lock_engine = lock_engine
+        self._interval = interval_sec
+        self._dirty = asyncio.Event()
+        self._task = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.stale_rebuilt = 0
+        self.rows_applied = 0
+        self.last_mode = None
+        self.last_run_at = None
+        self.last_duration_ms = None
+        # Newest row timestamp this process has applied; keeps the scan short
+        # while the newest ledger entry is one that was just removed
+        self._watermark = None
+        self._scanned_to = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark_dirty(self):
+        self._dirty.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.compact()
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"[ROLLUPS] Compaction failed: {e}")
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self._interval)
+                await asyncio.sleep(ROLLUP_MIN_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+
+    @asynccontextmanager
+    async def _leader(self):
+        """Yields True while this process holds the compactor lock, False if another one does."""
+        if self._lock_engine is None:
+            yield True
+            return
+        async with self._lock_engine.connect() as conn:
+            acquired = await conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": ROLLUP_LOCK_NAME})
+            try:
+                yield acquired == 1
+            finally:
+                if acquired == 1:
+                    await conn.scalar(text("SELECT RELEASE_LOCK(:name)"), {"name": ROLLUP_LOCK_NAME})
+
+    async def compact(self, full: bool = False) -> bool:
+        """Applies changed rows (or rebuilds everything when `full`); False if another process holds the lock."""
+        async with self._leader() as leader:
+            if not leader:
+                self.skipped += 1
+                return False
+            started = time.perf_counter()
+            async with self._session_factory() as db:
+                if not full:
+                    full = await db.scalar(select(VerificationRollupEntry.meeting_id).limit(1)) is None
+                self._scanned_to = None
+                applied = await (self._rebuild(db) if full else self._apply_changes(db))
+                await db.commit()
+            if full:
+                self._watermark = None
+            elif self._scanned_to is not None:
+                self._watermark = max(self._watermark or self._scanned_to, self._scanned_to)
+
+        self.runs += 1
+        self.rows_applied += applied
+        self.last_mode = "full" if full else "incremental"
+        self.last_run_at = datetime.utcnow().isoformat()
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        logging.info(f"[ROLLUPS] {self.last_mode}: {applied} rows applied in {self.last_duration_ms} ms")
+        return True
+
+    @staticmethod
+    def _source_columns():
+        vr = VerificationResult
+        return (vr.meeting_id, vr.client_id, vr.timestamp, vr.is_pass, vr.is_final, vr.failure_reason,
+                *[getattr(vr, m) for m in METRICS])
+
+    async def _apply_changes(self, db) -> int:
+        watermark = await db.scalar(select(func.max(VerificationRollupEntry.source_timestamp)))
+        if self._watermark is not None and self._watermark > watermark:
+            watermark = self._watermark
+        since = watermark - timedelta(seconds=ROLLUP_WATERMARK_OVERLAP_SEC)
+        rows = (await db.execute(select(*self._source_columns()).where(VerificationResult.timestamp >= since))).all()
+        # Only adopted once the run commits
+        self._scanned_to = max((r.timestamp for r in rows), default=None)
+
+        hour_deltas: dict[datetime, Bucket] = {}
+        applied = 0
+        for i in range(0, len(rows), ROLLUP_BATCH_SIZE):
+            batch = rows[i:i + ROLLUP_BATCH_SIZE]
+            keys = [(r.meeting_id, r.client_id) for r in batch]
+            entries = {(e.meeting_id, e.client_id): e for e in await db.scalars(select(VerificationRollupEntry).where(
+                tuple_(VerificationRollupEntry.meeting_id, VerificationRollupEntry.client_id).in_(keys)
+            ))}
+
+            upserts, removed = [], []
+            for row in batch:
+                key = (row.meeting_id, row.client_id)
+                old = entries.get(key)
+                new = _entry_from_row(row) if _is_final(row) else None
+                if old is None and new is None:
+                    continue
+                if old is not None and new is not None and _contribution(old) == _contribution(new):
+                    if new["source_timestamp"] > old.source_timestamp:
+                        upserts.append(new)
+                    continue
+                if old is not None:
+                    hour_deltas.setdefault(old.bucket_start, Bucket()).remove(
+                        old.is_pass, {m: getattr(old, m) for m in METRICS}, old.failure_reason)
+                if new is not None:
+                    hour_deltas.setdefault(new["bucket_start"], Bucket()).add(
+                        new["is_pass"], {m: new[m] for m in METRICS}, new["failure_reason"])
+                    upserts.append(new)
+                else:
+                    removed.append(key)
+                applied += 1
+
+            if removed:
+                await db.execute(delete(VerificationRollupEntry).where(
+                    tuple_(VerificationRollupEntry.meeting_id, VerificationRollupEntry.client_id).in_(removed)
+                ))
+            if upserts:
+                stmt = mysql_insert(VerificationRollupEntry).values(upserts)
+                await db.execute(stmt.on_duplicate_key_update({
+                    c: stmt.inserted[c] for c in upserts[0] if c not in ("meeting_id", "client_id")
+                }))
+
+        day_deltas: dict[datetime, Bucket] = {}
+        for start, delta in hour_deltas.items():
+            day_deltas.setdefault(_day_floor(start), Bucket()).merge(delta)
+        await self._apply_deltas(db, HOUR, hour_deltas)
+        await self._apply_deltas(db, DAY, day_deltas)
+        return applied
+
+    async def _apply_deltas(self, db, granularity: str, deltas: dict):
+        if not deltas:
+            return
+        stored = {row.bucket_start: row for row in await db.scalars(select(VerificationRollup).where(
+            VerificationRollup.granularity == granularity,
+            VerificationRollup.bucket_start.in_(list(deltas)),
+        ))}
+        for start, delta in deltas.items():
+            bucket = Bucket.from_row(stored[start]) if start in stored else Bucket()
+            if bucket.stale:
+                # Its histograms cannot take a delta in the new bins; the ledger
+                # already reflects this run, so recount the bucket from it
+                logging.warning(f"[ROLLUPS] {granularity} {start} was stored with different histogram bins; "
+                                f"rebuilding it from the ledger with ROLLUP_HISTOGRAM_BINS={ROLLUP_HISTOGRAM_BINS}")
+                bucket = await self._bucket_from_ledger(db, granularity, start)
+                self.stale_rebuilt += 1
+            else:
+                bucket.merge(delta)
+            if bucket.total <= 0:
+                await db.execute(delete(VerificationRollup).where(
+                    VerificationRollup.granularity == granularity, VerificationRollup.bucket_start == start
+                ))
+                continue
+            stmt = mysql_insert(VerificationRollup).values(bucket.to_row(granularity, start))
+            await db.execute(stmt.on_duplicate_key_update({
+                c: stmt.inserted[c] for c in ("total", "passed", "metrics", "failure_reasons")
+            }))
+
+    async def _bucket_from_ledger(self, db, granularity: str, start: datetime) -> Bucket:
+        e = VerificationRollupEntry
+        end = start + (timedelta(hours=1) if granularity == HOUR else timedelta(days=1))
+        bucket = Bucket()
+        for entry in await db.scalars(select(e).where(e.bucket_start >= start, e.bucket_start < end)):
+            bucket.add(entry.is_pass, {m: getattr(entry, m) for m in METRICS}, entry.failure_reason)
+        return bucket
+
+    async def _rebuild(self, db) -> int:
+        """Recomputes every bucket and the contribution ledger from all final rows."""
+        vr = VerificationResult
+        stmt = select(*self._source_columns()).where(
+            vr.is_final.is_(True), vr.is_pass.is_not(None), vr.timestamp.is_not(None)
+        )
+        await db.execute(delete(VerificationRollupEntry))
+        await db.execute(delete(VerificationRollup))
+
+        hours: dict[datetime, Bucket] = {}
+        pending = []
+        applied = 0
+        result = await db.stream(stmt.execution_options(yield_per=ROLLUP_BATCH_SIZE))
+        async for row in result:
+            entry = _entry_from_row(row)
+            hours.setdefault(entry["bucket_start"], Bucket()).add(
+                entry["is_pass"], {m: entry[m] for m in METRICS}, entry["failure_reason"])
+            pending.append(entry)
+            applied += 1
+            if len(pending) >= ROLLUP_BATCH_SIZE:
+                await db.execute(mysql_insert(VerificationRollupEntry).values(pending))
+                pending = []
+        if pending:
+            await db.execute(mysql_insert(VerificationRollupEntry).values(pending))
+
+        days: dict[datetime, Bucket] = {}
+        for start, bucket in hours.items():
+            days.setdefault(_day_floor(start), Bucket()).merge(bucket)
+        for granularity, buckets in ((HOUR, hours), (DAY, days)):
+            rows = [bucket.to_row(granularity, start) for start, bucket in buckets.items()]
+            for i in range(0, len(rows), ROLLUP_BATCH_SIZE):
+                await db.execute(mysql_insert(VerificationRollup).values(rows[i:i + ROLLUP_BATCH_SIZE]))
+        return applied
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_not_leader": self.skipped,
+            "stale_buckets_rebuilt": self.stale_rebuilt,
+            "rows_applied": self.rows_applied,
+            "last_mode": self.last_mode,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+        }
+
+
+async def fetch_rollup_stats(db, granularity: str, since: datetime, until: datetime) -> dict:
+    """Reads stored buckets in [since, until) and merges them into a summary; cost is O(buckets)."""
+    rows = (await db.scalars(select(VerificationRollup).where(
+        VerificationRollup.granularity == granularity,
+        VerificationRollup.bucket_start >= since,
+        VerificationRollup.bucket_start < until,
+    ).order_by(VerificationRollup.bucket_start).limit(ROLLUP_MAX_BUCKETS))).all()
+
+    overall = Bucket()
+    buckets = []
+    stale = 0
+    for row in rows:
+        bucket = Bucket.from_row(row)
+        if bucket.stale:
+            # Not yet rewritten since ROLLUP_HISTOGRAM_BINS changed; approximate in the current bins
+            stale += 1
+            bucket.rebinned()
+        overall.merge(bucket)
+        buckets.append({"bucket_start": row.bucket_start, **bucket.summary()})
+    if stale:
+        logging.warning(f"[ROLLUPS] {stale} {granularity} buckets use other histogram bins and were rebinned "
+                        "approximately; run `python -m app.analytics.rollups --full` to recount them")
+    return {
+        "granularity": granularity,
+        "since": since,
+        "until": until,
+        "summary": overall.summary(),
+        "buckets": buckets,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from database.database import AsyncSessionLocal, async_engine
+
+    parser = argparse.ArgumentParser(description="Update or rebuild verification analytics rollups.")
+    parser.add_argument("--full", action="store_true", help="Recompute every bucket instead of applying changed rows")
+    args = parser.parse_args()
+    if not asyncio.run(RollupCompactor(AsyncSessionLocal, async_engine).compact(full=args.full)):
+        print("Another process is compacting rollups; try again shortly.")
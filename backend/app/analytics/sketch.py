@@ -0,0 +1,102 @@
+import os
+
+ROLLUP_HISTOGRAM_BINS = int(os.getenv("ROLLUP_HISTOGRAM_BINS", 100))
+
+# Value range per score; face match is a cosine distance and can exceed 1.0
+METRIC_RANGES = {
+    "liveness_score": (0.0, 1.0),
+    "deepfake_score": (0.0, 1.0),
+    "face_match_score": (0.0, 2.0),
+}
+
+
+class ScoreHistogram:
+    """
+    Fixed-bin histogram over [lo, hi]. Two histograms with the same bins merge
+    by adding counts, so hourly buckets combine into days (or any range)
+    without revisiting rows, and a delta histogram (negative counts for
+    removed values) updates a stored one in place. Quantiles are interpolated within a bin, i.e.
+    accurate to (hi - lo) / bins. The bin count is stored with the counts;
+    histograms with different bins refuse to merge (see `rebin`).
+    """
+    def __init__(self, lo: float = 0.0, hi: float = 1.0, bins: int = ROLLUP_HISTOGRAM_BINS,
+                 counts: list | None = None, total: float = 0.0):
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.counts = list(counts) if counts else [0] * bins
+        self.total = total
+
+    @classmethod
+    def for_metric(cls, metric: str, data: dict | None = None) -> "ScoreHistogram":
+        """Restores a stored histogram with the bins it was written with, which may differ from ROLLUP_HISTOGRAM_BINS."""
+        lo, hi = METRIC_RANGES[metric]
+        if not data or not data.get("counts"):
+            return cls(lo, hi)
+        counts = data["counts"]
+        return cls(lo, hi, bins=data.get("bins", len(counts)), counts=counts, total=data.get("sum", 0.0))
+
+    def rebin(self, bins: int) -> "ScoreHistogram":
+        """
+        Same values over `bins` bins; each old bin's count moves to the new bin
+        holding its midpoint, so quantiles lose up to one old bin width.
+        """
+        if bins == self.bins:
+            return self
+        out = ScoreHistogram(self.lo, self.hi, bins, total=self.total)
+        for i, c in enumerate(self.counts):
+            if c:
+                out.counts[min(int((i + 0.5) * bins / self.bins), bins - 1)] += c
+        return out
+
+    @property
+    def n(self) -> int:
+        return sum(self.counts)
+
+    def add(self, value: float):
+        idx = int((value - self.lo) / (self.hi - self.lo) * self.bins)
+        self.counts[min(max(idx, 0), self.bins - 1)] += 1
+        self.total += value
+
+    def remove(self, value: float):
+        """Undoes `add(value)`; lets a bucket absorb a changed row as a delta."""
+        idx = int((value - self.lo) / (self.hi - self.lo) * self.bins)
+        self.counts[min(max(idx, 0), self.bins - 1)] -= 1
+        self.total -= value
+
+    def merge(self, other: "ScoreHistogram"):
+        if other.bins != self.bins:
+            raise ValueError(f"Cannot merge a {other.bins}-bin histogram into a {self.bins}-bin one")
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.total += other.total
+
+    def mean(self) -> float | None:
+        n = self.n
+        return self.total / n if n else None
+
+    def quantile(self, q: float) -> float | None:
+        n = self.n
+        if not n:
+            return None
+        target = q * n
+        width = (self.hi - self.lo) / self.bins
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                return self.lo + width * (i + (target - seen) / c)
+            seen += c
+        return self.hi
+
+    def to_dict(self) -> dict:
+        return {"bins": self.bins, "counts": self.counts, "sum": self.total}
+
+    def summary(self) -> dict:
+        def r(v): return round(v, 4) if v is not None else None
+        return {
+            "count": self.n,
+            "mean": r(self.mean()),
+            "p50": r(self.quantile(0.5)),
+            "p90": r(self.quantile(0.9)),
+            "p99": r(self.quantile(0.99)),
+        }
@@ -1,6 +1,8 @@
 import os
 import time
 import logging
+import threading
+from collections import OrderedDict
 from agora_token_builder import RtcTokenBuilder
 from dotenv import load_dotenv
 
@@ -14,31 +16,91 @@ APP_CERTIFICATE = os.getenv("AGORA_APP_CERTIFICATE")
 if not APP_ID or not APP_CERTIFICATE:
     logging.warning("AGORA_APP_ID or AGORA_APP_CERTIFICATE not set in .env file.")
 
-TOKEN_EXPIRATION_SEC = 3600
-PRIVILEGE_EXPIRATION_SEC = 3600
+# One lifetime for every token we issue (agora/token and meeting joins alike)
+TOKEN_EXPIRATION_SEC = int(os.getenv("AGORA_TOKEN_TTL_SEC", 24 * 3600))
+PRIVILEGE_EXPIRATION_SEC = TOKEN_EXPIRATION_SEC
+# A cached token is only handed out while it has at least this long left
+TOKEN_REFRESH_MARGIN_SEC = int(os.getenv("AGORA_TOKEN_REFRESH_MARGIN_SEC", 3600))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AGORA_TOKEN_CACHE_MAX_ENTRIES", 10000))
 
-def generate_agora_rtc_token(channel_name: str, user_id: int) -> str | None:
-    """Generates an Agora RTC token."""
-    
-    if not APP_ID or not APP_CERTIFICATE:
-        logging.error("Cannot generate token: Missing App ID or Certificate.")
-        return None
-
-    try:
-        current_timestamp = int(time.time())
-        privilege_expired_ts = current_timestamp + PRIVILEGE_EXPIRATION_SEC
-
-        logging.info(f"Building token for User: {user_id}, Channel: {channel_name}")
-
-        token = RtcTokenBuilder.buildTokenWithUid(
-            APP_ID,
-            APP_CERTIFICATE,
-            channel_name,
-            user_id,
-            1, # Role_Publisher = 1
-            privilege_expired_ts
-        )
+ROLE_PUBLISHER = 1
+ROLE_SUBSCRIBER = 2
+
+
+class AgoraTokenService:
+    """
+    Issues Agora RTC tokens and reuses them per (channel, uid, role) until they
+    are within `refresh_margin` seconds of expiring, so reconnect storms do not
+    re-sign a token on every request. Credentials are read once at startup.
+    """
+    def __init__(self, app_id: str | None = APP_ID, certificate: str | None = APP_CERTIFICATE,
+                 ttl: int = TOKEN_EXPIRATION_SEC, refresh_margin: int = TOKEN_REFRESH_MARGIN_SEC,
+                 max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.app_id = app_id
+        self._certificate = certificate
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl // 2)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tokens: OrderedDict[tuple, tuple] = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.app_id and self._certificate)
+
+    def get_token(self, channel_name: str, user_id: int, role: int = ROLE_PUBLISHER) -> str | None:
+        if not self.configured:
+            logging.error("Cannot generate token: Missing App ID or Certificate.")
+            return None
+
+        key = (channel_name, int(user_id), role)
+        now = int(time.time())
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and cached[1] - now > self.refresh_margin:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+
+        try:
+            expires_at = now + self.ttl
+            logging.info(f"Building token for User: {user_id}, Channel: {channel_name}")
+            token = RtcTokenBuilder.buildTokenWithUid(
+                self.app_id,
+                self._certificate,
+                channel_name,
+                int(user_id),
+                role,
+                expires_at
+            )
+        except Exception as e:
+            logging.error(f"Agora Token Generation Failed: {e}", exc_info=True)
+            return None
+
+        with self._lock:
+            self.builds += 1
+            self._tokens[key] = (token, expires_at)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
         return token
-    except Exception as e:
-        logging.error(f"Agora Token Generation Failed: {e}", exc_info=True)
-        return None
\ No newline at end of file
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.builds
+            return {
+                "entries": len(self._tokens),
+                "hits": self.hits,
+                "builds": self.builds,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            }
+
+
+agora_tokens = AgoraTokenService()
+
+
+def generate_agora_rtc_token(channel_name: str, user_id: int) -> str | None:
+    """Returns a (possibly cached) publisher token for the channel."""
+    return agora_tokens.get_token(channel_name, user_id, ROLE_PUBLISHER)
@@ -6,13 +6,15 @@ from typing import Optional
 from jose import JWTError, jwt
 import bcrypt 
 from fastapi import HTTPException, status, Depends
+from pydantic import ValidationError
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
 from database.models import TokenData, UserResponse
 from database.db_models import User as DBUser
-from database.database import get_db
+from database.database import AsyncSessionLocal
+from app.auth.principal_cache import principal_cache
 
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
@@ -20,6 +22,11 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Build the principal from signed token claims instead of the users table.
+# Profile/role edits then only show up once the user gets a new token.
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+# bcrypt cost factor for new hashes; stored hashes below it are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -27,7 +34,7 @@ def get_password_hash(password: str) -> str:
     """Hashes a password using bcrypt."""
     try:
         password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed_bytes = bcrypt.hashpw(password_bytes, salt)
         return hashed_bytes.decode('utf-8')
     except Exception as e:
@@ -44,6 +51,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logging.error(f"Verification error: {e}")
         return False
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored bcrypt hash ($2b$NN$...) was made with fewer than BCRYPT_ROUNDS."""
+    try:
+        cost = int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return False
+    return cost < BCRYPT_ROUNDS
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -55,7 +70,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserResponse:
+def principal_claims(user: DBUser) -> dict:
+    """Claims embedded in access tokens so they can stand in for a DB lookup."""
+    return {"uid": user.id, "role": user.role, "first_name": user.first_name, "last_name": user.last_name}
+
+def _principal_from_claims(email: str, payload: dict) -> Optional[UserResponse]:
+    if payload.get("uid") is None or payload.get("role") is None:
+        return None
+    try:
+        return UserResponse(id=payload["uid"], email=email, role=payload["role"],
+                            first_name=payload.get("first_name"), last_name=payload.get("last_name"))
+    except ValidationError:
+        return None
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -70,8 +98,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
-    user = db.query(DBUser).filter(DBUser.email == token_data.email).first()
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        principal = _principal_from_claims(token_data.email, payload)
+        if principal is not None:
+            return principal
+
+    principal = principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
+
+    # Session opened only on a miss, so cache hits never touch the pool
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(DBUser).where(DBUser.email == token_data.email))
     if user is None:
         raise credentials_exception
 
-    return UserResponse.from_orm(user)
\ No newline at end of file
+    principal = UserResponse.from_orm(user)
+    principal_cache.put(token_data.email, principal)
+    return principal
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.auth.auth import get_password_hash, verify_password, needs_rehash
+
+logging.basicConfig(level=logging.INFO)
+
+# bcrypt releases the GIL, so each worker is roughly one core of hashing
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+# Requests waiting beyond this are refused with 503 instead of piling up
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification on a dedicated, bounded thread pool so
+    login and register bursts never block the event loop (and with it live
+    WebSocket scoring). At most `workers` hashes run at once; up to
+    `max_queue` more may wait, and anything past that gets a 503.
+    """
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.workers = workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._queue_ms_total = 0.0
+        self._queue_ms_max = 0.0
+        self._run_ms_total = 0.0
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Authentication service busy, retry shortly.")
+            self._in_flight += 1
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    queue_ms = (started - queued_at) * 1000
+                    self._queue_ms_total += queue_ms
+                    self._queue_ms_max = max(self._queue_ms_max, queue_ms)
+                    self._run_ms_total += (finished - started) * 1000
+                    self.completed += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def authenticate(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifies a login. When the stored hash was made with a lower cost than
+        BCRYPT_ROUNDS, also returns a fresh hash to store in its place.
+        """
+        if not await self.verify(plain_password, hashed_password):
+            return False, None
+        if not needs_rehash(hashed_password):
+            return True, None
+        upgraded = await self.hash(plain_password)
+        self.rehashed += 1
+        return True, upgraded
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "completed": done,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_queue_ms": round(self._queue_ms_total / done, 2) if done else 0.0,
+                "max_queue_ms": round(self._queue_ms_max, 2),
+                "avg_hash_ms": round(self._run_ms_total / done, 2) if done else 0.0,
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,95 @@
+import argparse
+import csv
+import ipaddress
+import logging
+import os
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+TABLE_FILES = ("starts.npy", "ends.npy", "lat.npy", "lon.npy")
+
+
+class IPRangeTable:
+    """
+    Sorted, non-overlapping IPv4 ranges with a coordinate per range, stored as
+    four parallel .npy arrays and memory-mapped read-only. A lookup is one
+    np.searchsorted over the start addresses, so only the pages touched by the
+    binary search are ever read, and worker processes share them via the page cache.
+    """
+    def __init__(self, table_dir: str):
+        arrays = [np.load(os.path.join(table_dir, name), mmap_mode="r") for name in TABLE_FILES]
+        self.starts, self.ends, self.lat, self.lon = arrays
+        if not (len(self.starts) == len(self.ends) == len(self.lat) == len(self.lon)):
+            raise ValueError(f"GeoIP table in {table_dir} has mismatched array lengths.")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, ip: str) -> tuple | None:
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if addr.version != 4:
+            return None
+        value = int(addr)
+        idx = int(np.searchsorted(self.starts, value, side="right")) - 1
+        if idx < 0 or value > int(self.ends[idx]):
+            return None
+        return float(self.lat[idx]), float(self.lon[idx])
+
+
+def _ip_to_int(text: str) -> int | None:
+    text = text.strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        addr = ipaddress.ip_address(text)
+    except ValueError:
+        return None
+    return int(addr) if addr.version == 4 else None
+
+
+def build_table(csv_path: str, out_dir: str, start_col: int, end_col: int, lat_col: int, lon_col: int,
+                skip_header: bool = False) -> int:
+    """Converts a range CSV (dotted or integer IPv4 bounds) into the .npy table; IPv6 rows are skipped."""
+    rows = []
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        if skip_header:
+            next(reader, None)
+        for rec in reader:
+            try:
+                start, end = _ip_to_int(rec[start_col]), _ip_to_int(rec[end_col])
+                lat, lon = float(rec[lat_col]), float(rec[lon_col])
+            except (IndexError, ValueError):
+                continue
+            if start is not None and end is not None and start <= end:
+                rows.append((start, end, lat, lon))
+    rows.sort()
+
+    os.makedirs(out_dir, exist_ok=True)
+    columns = list(zip(*rows)) if rows else [[], [], [], []]
+    dtypes = (np.uint32, np.uint32, np.float32, np.float32)
+    for name, values, dtype in zip(TABLE_FILES, columns, dtypes):
+        np.save(os.path.join(out_dir, name), np.asarray(values, dtype=dtype))
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped GeoIP range table from a CSV.")
+    parser.add_argument("csv_path", type=str)
+    parser.add_argument("out_dir", type=str)
+    # Defaults match the DB-IP "IP to City Lite" CSV layout
+    parser.add_argument("--start-col", type=int, default=0)
+    parser.add_argument("--end-col", type=int, default=1)
+    parser.add_argument("--lat-col", type=int, default=6)
+    parser.add_argument("--lon-col", type=int, default=7)
+    parser.add_argument("--skip-header", action="store_true")
+    args = parser.parse_args()
+
+    count = build_table(args.csv_path, args.out_dir, args.start_col, args.end_col,
+                        args.lat_col, args.lon_col, args.skip_header)
+    print(f"Wrote {count} IPv4 ranges to {args.out_dir}")
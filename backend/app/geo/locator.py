@@ -0,0 +1,188 @@
+import ipaddress
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import httpx
+
+from app.geo.ip_table import IPRangeTable
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+logging.basicConfig(level=logging.INFO)
+
+# MaxMind-format database (GeoLite2-City.mmdb or compatible), opened memory-mapped
+GEOIP_MMDB_PATH = os.getenv("GEOIP_MMDB_PATH")
+# Directory produced by `python -m app.geo.ip_table`
+GEOIP_TABLE_DIR = os.getenv("GEOIP_TABLE_DIR")
+GEOIP_HTTP_FALLBACK = os.getenv("GEOIP_HTTP_FALLBACK", "true").lower() == "true"
+GEOIP_HTTP_URL = os.getenv("GEOIP_HTTP_URL", "https://ipwho.is/{ip}")
+GEOIP_HTTP_TIMEOUT_SEC = float(os.getenv("GEOIP_HTTP_TIMEOUT_SEC", 2.0))
+GEOIP_CACHE_TTL_SEC = float(os.getenv("GEOIP_CACHE_TTL_SEC", 6 * 3600))
+# After a timeout/network/5xx error the provider is not retried for that IP this long
+GEOIP_FAILURE_TTL_SEC = float(os.getenv("GEOIP_FAILURE_TTL_SEC", 60))
+GEOIP_CACHE_MAX_ENTRIES = int(os.getenv("GEOIP_CACHE_MAX_ENTRIES", 50000))
+
+NO_LOCATION = (None, None)
+
+
+def _open_mmdb(path: str | None):
+    if not path:
+        return None
+    if maxminddb is None:
+        logging.warning("GEOIP_MMDB_PATH is set but maxminddb is not installed; ignoring it.")
+        return None
+    try:
+        return maxminddb.open_database(path, maxminddb.MODE_MMAP)
+    except Exception as e:
+        logging.error(f"[GEOIP] Could not open {path}: {e}")
+        return None
+
+
+def _open_table(path: str | None):
+    if not path:
+        return None
+    try:
+        return IPRangeTable(path)
+    except Exception as e:
+        logging.error(f"[GEOIP] Could not open range table {path}: {e}")
+        return None
+
+
+class GeoLocator:
+    """
+    IP -> (latitude, longitude). Sources in order: a TTL/LRU cache, a local
+    MaxMind database, the local IPv4 range table, then (optionally) the remote
+    HTTP provider through one shared, pooled client with a short timeout.
+    Private and loopback addresses are never looked up.
+
+    Answers (including a definite "no location") are cached for `ttl`. A
+    failed HTTP lookup is not an answer: it is remembered separately for only
+    `failure_ttl`, so one network blip does not blank an IP for hours.
+    """
+    def __init__(self, mmdb_path: str | None = GEOIP_MMDB_PATH, table_dir: str | None = GEOIP_TABLE_DIR,
+                 http_fallback: bool = GEOIP_HTTP_FALLBACK, ttl: float = GEOIP_CACHE_TTL_SEC,
+                 max_entries: int = GEOIP_CACHE_MAX_ENTRIES, failure_ttl: float = GEOIP_FAILURE_TTL_SEC):
+        self._mmdb = _open_mmdb(mmdb_path)
+        self._table = _open_table(table_dir)
+        self._http_fallback = http_fallback
+        self._client = None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.failure_ttl = failure_ttl
+        self._cache: OrderedDict[str, tuple] = OrderedDict()
+        self._failed: OrderedDict[str, float] = OrderedDict()
+        self.counts = {"cache": 0, "mmdb": 0, "table": 0, "http": 0, "miss": 0, "skipped": 0,
+                       "http_failed": 0, "failure_cached": 0}
+        logging.info(f"[GEOIP] mmdb={'on' if self._mmdb else 'off'} "
+                     f"table={len(self._table) if self._table else 'off'} http_fallback={http_fallback}")
+
+    def _cache_get(self, ip: str):
+        entry = self._cache.get(ip)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._cache[ip]
+            return None
+        self._cache.move_to_end(ip)
+        return entry[1]
+
+    def _cache_put(self, ip: str, location: tuple):
+        self._cache[ip] = (time.monotonic() + self.ttl, location)
+        self._cache.move_to_end(ip)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _recently_failed(self, ip: str) -> bool:
+        expires = self._failed.get(ip)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._failed[ip]
+            return False
+        return True
+
+    def _mark_failed(self, ip: str):
+        self._failed[ip] = time.monotonic() + self.failure_ttl
+        self._failed.move_to_end(ip)
+        while len(self._failed) > self.max_entries:
+            self._failed.popitem(last=False)
+
+    def _lookup_mmdb(self, ip: str):
+        try:
+            record = self._mmdb.get(ip)
+        except ValueError:
+            return None
+        loc = (record or {}).get("location") or {}
+        if loc.get("latitude") is None:
+            return None
+        return loc["latitude"], loc["longitude"]
+
+    async def _lookup_http(self, ip: str):
+        """
+        Returns a location, NO_LOCATION when the provider answered that it has
+        none, or None when the lookup itself failed (timeout, network, non-2xx).
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=GEOIP_HTTP_TIMEOUT_SEC,
+                                             limits=httpx.Limits(max_connections=20, max_keepalive_connections=10))
+        try:
+            resp = await self._client.get(GEOIP_HTTP_URL.format(ip=ip))
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            logging.error(f"[GeoIP Error] {e}")
+            return None
+        if data.get("success") is True and data.get("latitude") is not None:
+            return data.get("latitude"), data.get("longitude")
+        logging.warning(f"[GeoIP Failed] {data.get('message')}")
+        return NO_LOCATION
+
+    async def locate(self, ip: str) -> tuple:
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            self.counts["skipped"] += 1
+            return NO_LOCATION
+        if addr.is_private or addr.is_loopback or addr.is_link_local or addr.is_unspecified:
+            self.counts["skipped"] += 1
+            return NO_LOCATION
+
+        cached = self._cache_get(ip)
+        if cached is not None:
+            self.counts["cache"] += 1
+            return cached
+
+        location, source = None, "miss"
+        if self._mmdb is not None:
+            location, source = self._lookup_mmdb(ip), "mmdb"
+        if location is None and self._table is not None:
+            location, source = self._table.lookup(ip), "table"
+        if location is None and self._http_fallback:
+            if self._recently_failed(ip):
+                self.counts["failure_cached"] += 1
+                return NO_LOCATION
+            location, source = await self._lookup_http(ip), "http"
+            if location is None:
+                self.counts["http_failed"] += 1
+                self._mark_failed(ip)
+                return NO_LOCATION
+        if location is None or location == NO_LOCATION:
+            source = "miss"
+
+        self.counts[source] += 1
+        location = location or NO_LOCATION
+        self._cache_put(ip, location)
+        return location
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"cache_entries": len(self._cache), "failed_entries": len(self._failed), **self.counts}
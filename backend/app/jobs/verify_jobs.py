@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.realtime import codec
+from app.realtime.bus import BROADCAST_BACKEND, REDIS_URL
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logging.basicConfig(level=logging.INFO)
+
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", 2))
+# Finished jobs are kept this long for the status endpoint
+VERIFY_JOB_TTL_SEC = int(os.getenv("VERIFY_JOB_TTL_SEC", 3600))
+# "memory" (single worker) or "redis" (any worker can answer a status poll);
+# follows BROADCAST_BACKEND, which multi-worker launches already set to redis
+VERIFY_JOB_STORE = os.getenv("VERIFY_JOB_STORE", "redis" if BROADCAST_BACKEND == "redis" else "memory")
+VERIFY_JOB_KEY_PREFIX = os.getenv("VERIFY_JOB_KEY_PREFIX", "vkyc:verify-job:")
+
+
+class VerifyJob:
+    def __init__(self, user_id: int, meeting_code: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.meeting_code = meeting_code
+        self.status = "queued"
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_record(self) -> dict:
+        return {**self.to_dict(), "user_id": self.user_id, "meeting_code": self.meeting_code}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "VerifyJob":
+        job = cls(record["user_id"], record.get("meeting_code"))
+        job.id = record["job_id"]
+        for field in ("status", "stage", "result", "error", "created_at", "finished_at"):
+            setattr(job, field, record.get(field))
+        return job
+
+
+class MemoryJobStore:
+    """Job table in this process only; polls must reach the worker that accepted the job."""
+    name = "memory"
+
+    def __init__(self, ttl_sec: int = VERIFY_JOB_TTL_SEC):
+        self._ttl = ttl_sec
+        self._jobs: dict[str, VerifyJob] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: VerifyJob):
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def load(self, job_id: str) -> VerifyJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def prune(self):
+        cutoff = time.time() - self._ttl
+        with self._lock:
+            expired = [jid for jid, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for jid in expired:
+                del self._jobs[jid]
+
+
+class RedisJobStore:
+    """
+    Job records as JSON under one key per job, so every worker and node can
+    answer a status poll. Each write refreshes the key's expiry, which also
+    clears jobs whose worker died mid-run.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = VERIFY_JOB_KEY_PREFIX, ttl_sec: int = VERIFY_JOB_TTL_SEC):
+        if redis is None:
+            raise RuntimeError("VERIFY_JOB_STORE=redis requires the redis package (pip install redis).")
+        # Sync client: writes come from the pipeline's executor threads
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._ttl = ttl_sec
+
+    def save(self, job: VerifyJob):
+        try:
+            self._redis.set(self._prefix + job.id, codec.dumps(job.to_record()), ex=self._ttl)
+        except Exception as e:
+            logging.error(f"[VERIFY JOB] Saving {job.id} to Redis failed: {e}")
+
+    def load(self, job_id: str) -> VerifyJob | None:
+        data = self._redis.get(self._prefix + job_id)
+        return VerifyJob.from_record(codec.loads(data)) if data else None
+
+    def prune(self):
+        pass
+
+
+def create_job_store(kind: str = VERIFY_JOB_STORE):
+    if kind == "redis":
+        return RedisJobStore()
+    if kind != "memory":
+        logging.warning(f"[VERIFY JOB] Unknown VERIFY_JOB_STORE '{kind}', using memory")
+    return MemoryJobStore()
+
+
+class VerifyJobManager:
+    """
+    Runs document/video verification stages on a dedicated thread pool.
+    `run` awaits a pipeline inline (synchronous mode); `submit` returns a job
+    immediately and saves its progress and outcome to the job store for
+    polling, optionally notifying an async callback when it finishes.
+    """
+    def __init__(self, workers: int = VERIFY_WORKERS, store=None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify")
+        self._store = store or create_job_store()
+        # Jobs this process is running, and how its finished ones ended
+        self._active: dict[str, VerifyJob] = {}
+        self._finished: dict[str, int] = {}
+        self._lock = threading.Lock()
+        # The loop only keeps weak references to tasks; hold them until they finish
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self, pipeline, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, pipeline, lambda stage: None, *args)
+
+    def submit(self, user_id: int, pipeline, *args, meeting_code: str | None = None, on_done=None) -> VerifyJob:
+        self._store.prune()
+        job = VerifyJob(user_id, meeting_code)
+        with self._lock:
+            self._active[job.id] = job
+        self._store.save(job)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._execute, job, pipeline, args)
+        task = asyncio.ensure_future(self._finish(job, future, on_done))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _execute(self, job: VerifyJob, pipeline, args):
+        job.status = "running"
+        self._store.save(job)
+
+        def progress(stage: str):
+            job.stage = stage
+            self._store.save(job)
+
+        return pipeline(progress, *args)
+
+    async def _finish(self, job: VerifyJob, future, on_done):
+        try:
+            job.result = await future
+            job.status = "done"
+        except Exception as e:
+            logging.error(f"[VERIFY JOB] {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = time.time()
+        with self._lock:
+            self._active.pop(job.id, None)
+            self._finished[job.status] = self._finished.get(job.status, 0) + 1
+        await asyncio.to_thread(self._store.save, job)
+
+        if on_done is not None:
+            try:
+                await on_done(job)
+            except Exception as e:
+                logging.warning(f"[VERIFY JOB] {job.id} completion hook failed: {e}")
+
+    async def get(self, job_id: str) -> VerifyJob | None:
+        return await asyncio.to_thread(self._store.load, job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._finished)
+            for job in self._active.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self._executor._max_workers, "store": self._store.name, "jobs": counts}
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+
+from app.persistence.upserts import upsert_verification_results
+
+logging.basicConfig(level=logging.INFO)
+
+SCORE_FLUSH_INTERVAL_MS = int(os.getenv("SCORE_FLUSH_INTERVAL_MS", 1000))
+
+
+class ScoreWriteBehind:
+    """
+    Write-behind buffer for live verification scores.
+    Sessions `post` their latest values keyed by (meeting_id, client_id); later
+    posts for the same key overwrite earlier ones. A background task writes
+    everything pending as batched upserts every SCORE_FLUSH_INTERVAL_MS, and
+    `flush_session` forces the final write when a session ends.
+    """
+    def __init__(self, session_factory, interval_ms: int = SCORE_FLUSH_INTERVAL_MS):
+        self._session_factory = session_factory
+        self._interval = interval_ms / 1000.0
+        self._pending: dict[tuple, dict] = {}
+        self._write_lock = asyncio.Lock()
+        self._task = None
+        self.posts = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def post(self, meeting_id: int, client_id: int, values: dict):
+        self.posts += 1
+        self._pending.setdefault((meeting_id, client_id), {}).update(values)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"[SCORE WRITER] Flush failed: {e}")
+
+    async def flush_session(self, meeting_id: int, client_id: int):
+        await self.flush(keys=[(meeting_id, client_id)])
+
+    async def flush(self, keys: list | None = None):
+        if keys is None:
+            batch, self._pending = self._pending, {}
+        else:
+            batch = {k: self._pending.pop(k) for k in keys if k in self._pending}
+        if not batch:
+            return
+
+        async with self._write_lock:
+            try:
+                await self._write(batch)
+                self.flushes += 1
+                self.rows_written += len(batch)
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"[SCORE WRITER] Failed to persist {len(batch)} rows: {e}")
+                # Re-queue without clobbering anything posted since
+                for key, values in batch.items():
+                    self._pending[key] = {**values, **self._pending.get(key, {})}
+
+    async def _write(self, batch: dict):
+        rows = [{"meeting_id": key[0], "client_id": key[1], **values} for key, values in batch.items()]
+        async with self._session_factory() as db:
+            await upsert_verification_results(db, rows)
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "posts": self.posts,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+        }
@@ -0,0 +1,23 @@
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from database.db_models import VerificationResult
+
+KEY_COLUMNS = ("meeting_id", "client_id")
+
+
+async def upsert_verification_results(db, rows: list[dict], update_columns: tuple | None = None):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE against uq_verification_results_meeting_client.
+    Rows are grouped by their column set so each group is one multi-row statement.
+    On conflict only `update_columns` (default: every non-key column given) change.
+    The caller commits.
+    """
+    groups: dict[tuple, list] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+
+    for columns, group in groups.items():
+        stmt = mysql_insert(VerificationResult).values(group)
+        targets = update_columns or tuple(c for c in columns if c not in KEY_COLUMNS)
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in targets if c in columns})
+        await db.execute(stmt)
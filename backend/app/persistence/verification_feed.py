@@ -0,0 +1,77 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+
+from database.db_models import User, VerificationResult
+
+FEED_MAX_LIMIT = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError for anything that is not a cursor produced by encode_cursor."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    timestamp, row_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+
+async def fetch_verification_page(db, limit: int, cursor: str | None = None, is_pass: bool | None = None,
+                                  client_id: int | None = None, since: datetime | None = None,
+                                  until: datetime | None = None) -> dict:
+    """
+    One page of the admin feed, newest first, ordered by (timestamp, id).
+    Seeks past the cursor instead of using OFFSET, so every page costs the same
+    no matter how deep it is. Only the columns the dashboard shows are selected;
+    the client is joined as a projection (no User entity, no password hash).
+    The filters line up with the (is_pass|client_id, timestamp, id) indexes.
+    """
+    vr = VerificationResult
+    stmt = select(
+        vr.id, vr.meeting_id, vr.client_id, vr.liveness_score, vr.deepfake_score, vr.face_match_score,
+        vr.is_pass, vr.failure_reason, vr.timestamp,
+        User.email, User.first_name, User.last_name,
+    ).outerjoin(User, User.id == vr.client_id)
+
+    if is_pass is not None:
+        stmt = stmt.where(vr.is_pass == is_pass)
+    if client_id is not None:
+        stmt = stmt.where(vr.client_id == client_id)
+    if since is not None:
+        stmt = stmt.where(vr.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(vr.timestamp < until)
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        # Expanded form of (timestamp, id) < (ts, row_id); MySQL range-scans this reliably
+        stmt = stmt.where(or_(vr.timestamp < ts, and_(vr.timestamp == ts, vr.id < row_id)))
+
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+    stmt = stmt.order_by(vr.timestamp.desc(), vr.id.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    items = []
+    for row in rows[:limit]:
+        items.append({
+            "id": row.id,
+            "meeting_id": row.meeting_id,
+            "client_id": row.client_id,
+            "liveness_score": row.liveness_score,
+            "deepfake_score": row.deepfake_score,
+            "face_match_score": row.face_match_score,
+            "is_pass": row.is_pass,
+            "failure_reason": row.failure_reason,
+            "timestamp": row.timestamp,
+            "client": {"id": row.client_id, "email": row.email, "first_name": row.first_name,
+                       "last_name": row.last_name} if row.email is not None else None,
+        })
+
+    next_cursor = None
+    if len(rows) > limit and rows[limit - 1].timestamp is not None:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+
+from app.realtime import codec
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logging.basicConfig(level=logging.INFO)
+
+# "inprocess" (single worker), "redis" (multi-worker / multi-node) or "local"
+# (the message-bus code path over an in-memory hub, for tests and dev)
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "inprocess")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+BROADCAST_CHANNEL_PREFIX = os.getenv("BROADCAST_CHANNEL_PREFIX", "vkyc:meeting:")
+# Messages for one meeting published within this window go out as one bus message
+BROADCAST_BATCH_MS = int(os.getenv("BROADCAST_BATCH_MS", 20))
+BROADCAST_BATCH_MAX = int(os.getenv("BROADCAST_BATCH_MAX", 50))
+
+
+# Bus items are (coalesce_key, json_text) pairs: each message is serialized
+# once by the publisher and the text is forwarded as-is to every socket.
+
+def encode_batch(items: list) -> str:
+    return codec.dumps(items)
+
+
+def decode_batch(data) -> list:
+    return [tuple(item) for item in codec.loads(data)]
+
+
+class InProcessBus:
+    """Delivers straight to this process's sockets (the original behaviour)."""
+    def __init__(self):
+        self._deliver = None
+        self.published = 0
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def subscribe(self, meeting_code: str):
+        pass
+
+    async def unsubscribe(self, meeting_code: str):
+        pass
+
+    async def publish(self, meeting_code: str, item: tuple):
+        self.published += 1
+        await self._deliver(meeting_code, [item])
+
+    def stats(self) -> dict:
+        return {"backend": "inprocess", "published": self.published}
+
+
+class MessageBus:
+    """
+    Fan-out across workers and nodes through a pub/sub transport, one channel
+    per meeting. Each process subscribes only to meetings it has sockets for.
+    Publishes are buffered per meeting for up to BROADCAST_BATCH_MS and sent
+    as one encoded batch; every subscriber (including the publisher itself)
+    hands the batch to its local sockets in order.
+    """
+    def __init__(self, transport, prefix: str = BROADCAST_CHANNEL_PREFIX,
+                 batch_ms: int = BROADCAST_BATCH_MS, batch_max: int = BROADCAST_BATCH_MAX):
+        self._transport = transport
+        self._prefix = prefix
+        self._batch_delay = batch_ms / 1000.0
+        self._batch_max = batch_max
+        self._pending: dict[str, list] = {}
+        self._flush_tasks: dict[str, asyncio.Task] = {}
+        self._deliver = None
+        self.published = 0
+        self.batches_sent = 0
+        self.batches_received = 0
+
+    async def start(self, deliver):
+        self._deliver = deliver
+        await self._transport.start(self._on_message)
+
+    async def stop(self):
+        for code in list(self._pending):
+            await self._flush(code)
+        await self._transport.stop()
+
+    async def subscribe(self, meeting_code: str):
+        await self._transport.subscribe(self._prefix + meeting_code)
+
+    async def unsubscribe(self, meeting_code: str):
+        await self._transport.unsubscribe(self._prefix + meeting_code)
+
+    async def publish(self, meeting_code: str, item: tuple):
+        self.published += 1
+        batch = self._pending.setdefault(meeting_code, [])
+        batch.append(item)
+        if len(batch) >= self._batch_max:
+            await self._flush(meeting_code)
+        elif meeting_code not in self._flush_tasks:
+            self._flush_tasks[meeting_code] = asyncio.create_task(self._flush_later(meeting_code))
+
+    async def _flush_later(self, meeting_code: str):
+        await asyncio.sleep(self._batch_delay)
+        self._flush_tasks.pop(meeting_code, None)
+        await self._flush(meeting_code)
+
+    async def _flush(self, meeting_code: str):
+        task = self._flush_tasks.pop(meeting_code, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        batch = self._pending.pop(meeting_code, None)
+        if not batch:
+            return
+        try:
+            await self._transport.publish(self._prefix + meeting_code, encode_batch(batch))
+            self.batches_sent += 1
+        except Exception as e:
+            logging.error(f"[WS BUS] Publish to {meeting_code} failed, {len(batch)} messages dropped: {e}")
+
+    async def _on_message(self, channel: str, data):
+        self.batches_received += 1
+        try:
+            await self._deliver(channel[len(self._prefix):], decode_batch(data))
+        except Exception as e:
+            logging.warning(f"[WS BUS] Delivery on {channel} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self._transport.name,
+            "published": self.published,
+            "batches_sent": self.batches_sent,
+            "batches_received": self.batches_received,
+            "channels": self._transport.channel_count(),
+        }
+
+
+class RedisTransport:
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL):
+        if aioredis is None:
+            raise RuntimeError("BROADCAST_BACKEND=redis requires the redis package (pip install redis).")
+        self._redis = aioredis.from_url(url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._channels = set()
+        self._reader = None
+        self._on_message = None
+
+    async def start(self, on_message):
+        self._on_message = on_message
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        while True:
+            try:
+                if not self._channels:
+                    await asyncio.sleep(0.1)
+                    continue
+                msg = await self._pubsub.get_message(timeout=1.0)
+                if msg and msg.get("type") == "message":
+                    channel = msg["channel"].decode() if isinstance(msg["channel"], bytes) else msg["channel"]
+                    await self._on_message(channel, msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"[WS BUS] Redis read error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def stop(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        await self._pubsub.aclose()
+        await self._redis.aclose()
+
+    async def subscribe(self, channel: str):
+        if channel not in self._channels:
+            self._channels.add(channel)
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        if channel in self._channels:
+            self._channels.discard(channel)
+            await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, data: str):
+        await self._redis.publish(channel, data)
+
+    def channel_count(self) -> int:
+        return len(self._channels)
+
+
+class LocalHub:
+    """In-memory stand-in for the pub/sub server, shared by LocalTransports in one process."""
+    def __init__(self):
+        self.subscribers: dict[str, set] = defaultdict(set)
+
+
+_default_hub = LocalHub()
+
+
+class LocalTransport:
+    """Pub/sub over a LocalHub; several instances behave like workers on one Redis."""
+    name = "local"
+
+    def __init__(self, hub: LocalHub = _default_hub):
+        self._hub = hub
+        self._channels = set()
+        self._on_message = None
+
+    async def start(self, on_message):
+        self._on_message = on_message
+
+    async def stop(self):
+        for channel in list(self._channels):
+            await self.unsubscribe(channel)
+
+    async def subscribe(self, channel: str):
+        self._channels.add(channel)
+        self._hub.subscribers[channel].add(self)
+
+    async def unsubscribe(self, channel: str):
+        self._channels.discard(channel)
+        self._hub.subscribers[channel].discard(self)
+        if not self._hub.subscribers[channel]:
+            del self._hub.subscribers[channel]
+
+    async def publish(self, channel: str, data: str):
+        for transport in list(self._hub.subscribers.get(channel, ())):
+            await transport._on_message(channel, data)
+
+    def channel_count(self) -> int:
+        return len(self._channels)
+
+
+def create_bus(kind: str = BROADCAST_BACKEND):
+    if kind == "redis":
+        return MessageBus(RedisTransport())
+    if kind == "local":
+        return MessageBus(LocalTransport())
+    if kind != "inprocess":
+        logging.warning(f"[WS BUS] Unknown BROADCAST_BACKEND '{kind}', using inprocess")
+    return InProcessBus()
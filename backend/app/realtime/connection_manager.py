@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, List
+
+from fastapi import WebSocket
+
+from app.realtime import codec
+from app.realtime.bus import create_bus
+from app.realtime.outbound import MeetingSendStats, OutboundQueue, coalesce_key
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ConnectionManager:
+    """
+    Tracks this process's verify WebSockets per meeting. `broadcast` goes
+    through the configured bus, so sockets of the same meeting connected to
+    other workers or nodes receive it too; `deliver` is the bus callback that
+    hands messages to each local socket's outbound queue without waiting
+    for the send.
+    """
+    def __init__(self, bus=None):
+        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.bus = bus or create_bus()
+        self._outbound: Dict[WebSocket, OutboundQueue] = {}
+        self._send_stats: Dict[str, MeetingSendStats] = {}
+
+    async def start(self):
+        await self.bus.start(self.deliver)
+
+    async def stop(self):
+        await self.bus.stop()
+
+    async def connect(self, websocket: WebSocket, meeting_code: str):
+        await websocket.accept()
+        if meeting_code not in self.active_connections:
+            self.active_connections[meeting_code] = []
+            await self.bus.subscribe(meeting_code)
+        self.active_connections[meeting_code].append(websocket)
+        stats = self._send_stats.setdefault(meeting_code, MeetingSendStats())
+        self._outbound[websocket] = OutboundQueue(
+            websocket, stats, on_evict=lambda queue: self._drop(queue.websocket, meeting_code)
+        )
+        logging.info(f"[WS MANAGER] Connected: {meeting_code}. Total Clients: {len(self.active_connections[meeting_code])}")
+
+    def _drop(self, websocket: WebSocket, meeting_code: str):
+        queue = self._outbound.pop(websocket, None)
+        if queue is not None:
+            queue.close()
+        if meeting_code in self.active_connections:
+            if websocket in self.active_connections[meeting_code]:
+                self.active_connections[meeting_code].remove(websocket)
+            if not self.active_connections[meeting_code]:
+                del self.active_connections[meeting_code]
+                self._send_stats.pop(meeting_code, None)
+
+    async def disconnect(self, websocket: WebSocket, meeting_code: str):
+        self._drop(websocket, meeting_code)
+        if meeting_code not in self.active_connections:
+            await self.bus.unsubscribe(meeting_code)
+        logging.info(f"[WS MANAGER] Disconnected: {meeting_code}")
+
+    async def broadcast(self, message: dict, meeting_code: str):
+        # Serialized exactly once, however many sockets/workers receive it
+        await self.bus.publish(meeting_code, (coalesce_key(message), codec.dumps(message)))
+
+    def send_to(self, websocket: WebSocket, message: dict):
+        """Queues a message for one local socket only (e.g. its control hints)."""
+        queue = self._outbound.get(websocket)
+        if queue is not None:
+            queue.put(coalesce_key(message), codec.dumps(message))
+
+    async def deliver(self, meeting_code: str, items: list):
+        for connection in list(self.active_connections.get(meeting_code, ())):
+            queue = self._outbound.get(connection)
+            if queue is None:
+                continue
+            for key, text in items:
+                queue.put(key, text)
+
+    def stats(self) -> dict:
+        return {
+            "meetings": len(self.active_connections),
+            "connections": sum(len(c) for c in self.active_connections.values()),
+            "queued": sum(len(q) for q in self._outbound.values()),
+            "bus": self.bus.stats(),
+            "per_meeting": {code: s.to_dict() for code, s in self._send_stats.items()},
+        }
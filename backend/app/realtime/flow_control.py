@@ -0,0 +1,85 @@
+import math
+import os
+
+# Liveness (blink) needs a dense frame stream; once confirmed only periodic face match/deepfake remain
+LIVENESS_PHASE_FPS = float(os.getenv("WS_LIVENESS_PHASE_FPS", 15))
+LIVENESS_PHASE_WIDTH = int(os.getenv("WS_LIVENESS_PHASE_WIDTH", 720))
+LIVENESS_PHASE_QUALITY = int(os.getenv("WS_LIVENESS_PHASE_QUALITY", 70))
+MONITOR_PHASE_FPS = float(os.getenv("WS_MONITOR_PHASE_FPS", 2))
+MONITOR_PHASE_WIDTH = int(os.getenv("WS_MONITOR_PHASE_WIDTH", 480))
+MONITOR_PHASE_QUALITY = int(os.getenv("WS_MONITOR_PHASE_QUALITY", 60))
+MIN_FPS = 1.0
+OVERLOAD_QUALITY = 50
+# Each back-off level halves the frame rate
+MAX_BACKOFF_LEVEL = 3
+# Step back up only once the faster rate would use at most this share of pipeline capacity
+RECOVERY_MARGIN = 0.8
+# Weight of the newest chunk in the smoothed pipeline duration
+PIPELINE_EWMA_ALPHA = 0.3
+
+
+class FrameRateController:
+    """
+    Picks the frame rate, resolution and JPEG quality a verify client should
+    stream at, from the session's phase and how far the server is behind.
+
+    Load is measured two ways: the smoothed time the heavy pipeline takes per
+    chunk (`record_pipeline`), which caps the rate frames can be analysed at,
+    and the frame backlog, which grows past one chunk while other sessions
+    hold the pipeline. `update` returns a control message only when the hint
+    changes.
+    """
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.pipeline_sec = None
+        self._level = 0
+        self._last = None
+        self.sent = 0
+
+    def record_pipeline(self, seconds: float):
+        if self.pipeline_sec is None:
+            self.pipeline_sec = seconds
+        else:
+            self.pipeline_sec += PIPELINE_EWMA_ALPHA * (seconds - self.pipeline_sec)
+
+    def _capacity_level(self, fps: float) -> int:
+        if not self.pipeline_sec:
+            return 0
+        # Frames/s the pipeline can analyse; streaming faster only queues frames
+        capacity = self.chunk_size / self.pipeline_sec
+        level = self._level
+        while level < MAX_BACKOFF_LEVEL and fps / 2 ** level > capacity:
+            level += 1
+        while level > 0 and fps / 2 ** (level - 1) <= capacity * RECOVERY_MARGIN:
+            level -= 1
+        return level
+
+    def _hint(self, liveness_confirmed: bool, buffered: int) -> dict:
+        if liveness_confirmed:
+            fps, width, quality, reason = MONITOR_PHASE_FPS, MONITOR_PHASE_WIDTH, MONITOR_PHASE_QUALITY, "monitoring"
+        else:
+            fps, width, quality, reason = LIVENESS_PHASE_FPS, LIVENESS_PHASE_WIDTH, LIVENESS_PHASE_QUALITY, "liveness"
+
+        self._level = self._capacity_level(fps)
+        level = self._level
+        # Frames beyond one chunk only pile up while the shared pipeline is
+        # busy elsewhere, and get discarded at two chunks
+        if buffered > self.chunk_size:
+            level = max(level, 1 if buffered < self.chunk_size * 1.5 else 2)
+
+        if level:
+            fps = max(MIN_FPS, fps / 2 ** level)
+            quality = min(quality, OVERLOAD_QUALITY)
+            reason = f"{reason}, server busy"
+
+        # Rounded down so a backed-off rate never exceeds what the pipeline can take
+        return {"target_fps": math.floor(fps * 10) / 10, "max_width": width, "jpeg_quality": quality, "reason": reason}
+
+    def update(self, liveness_confirmed: bool, buffered: int) -> dict | None:
+        hint = self._hint(liveness_confirmed, buffered)
+        key = (hint["target_fps"], hint["max_width"], hint["jpeg_quality"])
+        if key == self._last:
+            return None
+        self._last = key
+        self.sent += 1
+        return {"type": "control", **hint}
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+logging.basicConfig(level=logging.INFO)
+
+WS_SEND_QUEUE_MAX = int(os.getenv("WS_SEND_QUEUE_MAX", 16))
+WS_SEND_TIMEOUT_SEC = float(os.getenv("WS_SEND_TIMEOUT_SEC", 5.0))
+# A consumer whose queue stays full this long is disconnected
+WS_SLOW_CONSUMER_GRACE_SEC = float(os.getenv("WS_SLOW_CONSUMER_GRACE_SEC", 10.0))
+LATENCY_SAMPLES = 512
+
+# Close code 1013 ("try again later") tells the browser it may reconnect
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def coalesce_key(message: dict) -> str | None:
+    """Live score updates (untyped) and control hints supersede their own kind; everything else is kept."""
+    if "type" not in message:
+        return "score"
+    return "control" if message["type"] == "control" else None
+
+
+class MeetingSendStats:
+    def __init__(self):
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.latencies_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.latencies_ms)
+        pct = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 2) if samples else None
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "send_latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        }
+
+
+class OutboundQueue:
+    """
+    Bounded send queue for one WebSocket, drained by its own task so a slow
+    browser never delays the broadcaster or the other participants.
+    A new score update replaces the one still waiting instead of queueing
+    behind it. When the queue is full the oldest message is dropped; if it
+    stays full for WS_SLOW_CONSUMER_GRACE_SEC, or one send takes longer than
+    WS_SEND_TIMEOUT_SEC, the socket is closed.
+    """
+    def __init__(self, websocket, stats: MeetingSendStats, on_evict, max_depth: int = WS_SEND_QUEUE_MAX):
+        self.websocket = websocket
+        self._stats = stats
+        self._on_evict = on_evict
+        self._max_depth = max_depth
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._full_since = None
+        self._closed = False
+        self._evict_task = None
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, key: str | None, text: str):
+        """Queues an already-encoded message; `key` comes from coalesce_key."""
+        if self._closed:
+            return
+        now = time.perf_counter()
+        if key is not None:
+            for i, (queued_key, _, _) in enumerate(self._queue):
+                if queued_key == key:
+                    # Keep its place (and enqueue time) in line, swap in the newest value
+                    self._queue[i] = (key, text, self._queue[i][2])
+                    self._stats.coalesced += 1
+                    return
+
+        if len(self._queue) >= self._max_depth:
+            self._queue.popleft()
+            self._stats.dropped += 1
+            if self._full_since is None:
+                self._full_since = now
+            elif now - self._full_since > WS_SLOW_CONSUMER_GRACE_SEC:
+                if self._evict_task is None:
+                    self._evict_task = asyncio.create_task(self._evict("queue full"))
+                return
+        else:
+            self._full_since = None
+
+        self._queue.append((key, text, now))
+        self._wakeup.set()
+
+    async def _run(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._queue:
+                    _, text, enqueued_at = self._queue.popleft()
+                    try:
+                        await asyncio.wait_for(self.websocket.send_text(text), WS_SEND_TIMEOUT_SEC)
+                    except asyncio.TimeoutError:
+                        await self._evict("send timeout")
+                        return
+                    except Exception as e:
+                        logging.debug(f"[WS BROADCAST] send error: {e}")
+                        self._closed = True
+                        return
+                    self._stats.sent += 1
+                    self._stats.latencies_ms.append((time.perf_counter() - enqueued_at) * 1000)
+        except asyncio.CancelledError:
+            pass
+
+    async def _evict(self, reason: str):
+        if self._closed:
+            return
+        self._closed = True
+        self._stats.evicted += 1
+        logging.warning(f"[WS MANAGER] Evicting slow consumer ({reason}, {len(self._queue)} queued)")
+        self._queue.clear()
+        # Close before on_evict: it ends in close(), which cancels the drain task we may be running in
+        try:
+            await asyncio.wait_for(self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), WS_SEND_TIMEOUT_SEC)
+        except Exception:
+            pass
+        self._on_evict(self)
+
+    def close(self):
+        self._closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
@@ -0,0 +1,79 @@
+import os
+import time
+
+WS_BROADCAST_EPSILON = float(os.getenv("WS_BROADCAST_EPSILON", 0.01))
+WS_BROADCAST_MAX_HZ = float(os.getenv("WS_BROADCAST_MAX_HZ", 5))
+# Unchanged state is still re-sent this often so late joiners catch up
+WS_BROADCAST_HEARTBEAT_SEC = float(os.getenv("WS_BROADCAST_HEARTBEAT_SEC", 2.0))
+
+
+class BroadcastThrottle:
+    """
+    Decides whether a session's latest scores are worth broadcasting: only
+    when a value moved by more than `epsilon`, never more than `max_hz` times
+    a second, and at least once per heartbeat. A flipped flag (e.g. liveness
+    confirmed) is sent immediately regardless of rate.
+
+    A change held back by the rate limit is remembered; `trailing_delay` says
+    when it may go out and `flush_pending` sends it then, so the last change
+    before a stream goes quiet is never lost.
+    """
+    totals = {"sent": 0, "suppressed": 0, "trailing": 0}
+
+    def __init__(self, epsilon: float = WS_BROADCAST_EPSILON, max_hz: float = WS_BROADCAST_MAX_HZ,
+                 heartbeat_sec: float = WS_BROADCAST_HEARTBEAT_SEC):
+        self.epsilon = epsilon
+        self.min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.heartbeat_sec = heartbeat_sec
+        self._last_values = None
+        self._last_sent = 0.0
+        self._pending = False
+
+    def _changed(self, values: tuple) -> bool:
+        if self._last_values is None:
+            return True
+        for new, old in zip(values, self._last_values):
+            if isinstance(new, bool) or isinstance(old, bool) or new is None or old is None:
+                if new != old:
+                    return True
+            elif abs(new - old) > self.epsilon:
+                return True
+        return False
+
+    def _flag_flipped(self, values: tuple) -> bool:
+        if self._last_values is None:
+            return False
+        return any((isinstance(new, bool) or isinstance(old, bool)) and new != old
+                   for new, old in zip(values, self._last_values))
+
+    def _mark_sent(self, values: tuple, now: float):
+        self._last_values = values
+        self._last_sent = now
+        self._pending = False
+        BroadcastThrottle.totals["sent"] += 1
+
+    def should_send(self, values: tuple) -> bool:
+        now = time.monotonic()
+        due = now - self._last_sent >= self.min_interval
+        changed = self._changed(values)
+        if self._flag_flipped(values) or (due and (changed or now - self._last_sent >= self.heartbeat_sec)):
+            self._mark_sent(values, now)
+            return True
+        if changed:
+            self._pending = True
+        BroadcastThrottle.totals["suppressed"] += 1
+        return False
+
+    def trailing_delay(self) -> float | None:
+        """Seconds until a held-back change may be sent, or None if nothing is pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self.min_interval - (time.monotonic() - self._last_sent))
+
+    def flush_pending(self, values: tuple) -> bool:
+        """Marks `values` (the latest state) as sent if a change was held back; True if the caller should send."""
+        if not self._pending:
+            return False
+        self._mark_sent(values, time.monotonic())
+        BroadcastThrottle.totals["trailing"] += 1
+        return True
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+import os
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+logging.basicConfig(level=logging.INFO)
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_DOCUMENT_UPLOAD_BYTES = int(os.getenv("MAX_DOCUMENT_UPLOAD_BYTES", 20 * 1024 * 1024))
+MAX_VIDEO_UPLOAD_BYTES = int(os.getenv("MAX_VIDEO_UPLOAD_BYTES", 500 * 1024 * 1024))
+# Headroom for multipart boundaries and the non-file form fields
+MULTIPART_OVERHEAD_BYTES = int(os.getenv("MULTIPART_OVERHEAD_BYTES", 1024 * 1024))
+
+
+def _write_chunk(f, hasher, chunk: bytes):
+    # hashlib and file writes both release the GIL for large buffers
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def save_upload(upload: UploadFile, dest_path: str, max_bytes: int,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> tuple[int, str]:
+    """
+    Streams an UploadFile to disk in chunks, hashing as it goes.
+    File I/O runs in worker threads so the event loop never blocks on it.
+    Returns (size_in_bytes, sha256_hex). Raises 413 once `max_bytes` is exceeded
+    and removes the partial file on any failure.
+
+    By the time this runs Starlette has already spooled the whole multipart
+    body, so this is only the per-file limit; UploadSizeLimitMiddleware is what
+    stops an oversized request before it is read.
+    """
+    declared = getattr(upload, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+
+    hasher = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, dest_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+            await asyncio.to_thread(_write_chunk, f, hasher, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(_remove_quietly, dest_path)
+        raise
+    await asyncio.to_thread(f.close)
+    return size, hasher.hexdigest()
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that caps the request body of upload endpoints before the
+    form is parsed. A declared Content-Length over the limit is refused with
+    413 without reading the body; chunked or under-declared bodies are counted
+    as they arrive and cut off with 413 as soon as they pass the limit.
+    """
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = None
+                if declared is not None and declared > limit:
+                    await self._reject(scope, receive, send, limit)
+                    return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {limit} bytes.")
+            return message
+
+        started = False
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or started:
+                raise
+            await self._reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def _reject(scope, receive, send, limit: int):
+        logging.warning(f"[UPLOAD] Refusing {scope.get('path')}: body over {limit} bytes")
+        response = JSONResponse(status_code=413, content={"detail": f"Request body exceeds {limit} bytes."},
+                                headers={"Connection": "close"})
+        await response(scope, receive, send)
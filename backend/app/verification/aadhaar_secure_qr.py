@@ -0,0 +1,192 @@
+import logging
+import os
+import zlib
+
+import cv2
+import numpy as np
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:
+    x509 = None
+
+logging.basicConfig(level=logging.INFO)
+
+# UIDAI signing certificate (.cer/.pem) or bare public key, PEM or DER encoded
+UIDAI_PUBLIC_KEY_PATH = os.getenv("UIDAI_PUBLIC_KEY_PATH")
+
+DELIMITER = 255
+SIGNATURE_LENGTH = 256
+HASH_LENGTH = 32
+# Guard against decompression bombs; real payloads are a few KB
+MAX_DECOMPRESSED_BYTES = 256 * 1024
+DIGIT_CHUNK = 1000
+
+V1_FIELDS = (
+    "email_mobile_indicator", "reference_id", "name", "dob", "gender", "care_of", "district",
+    "landmark", "house", "location", "pincode", "post_office", "state", "street", "sub_district", "vtc",
+)
+V2_FIELDS = ("version",) + V1_FIELDS + ("mobile_last_4",)
+
+
+class SecureQRError(ValueError):
+    pass
+
+
+def _load_public_key(path: str | None):
+    if not path:
+        logging.warning("UIDAI_PUBLIC_KEY_PATH not set. Secure QR signatures cannot be verified.")
+        return None
+    if x509 is None:
+        logging.error("cryptography is not installed. Secure QR signatures cannot be verified.")
+        return None
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        is_pem = raw.lstrip().startswith(b"-----")
+        if b"CERTIFICATE" in raw[:64] or not is_pem:
+            try:
+                cert = x509.load_pem_x509_certificate(raw) if is_pem else x509.load_der_x509_certificate(raw)
+                return cert.public_key()
+            except ValueError:
+                pass
+        if is_pem:
+            return serialization.load_pem_public_key(raw)
+        return serialization.load_der_public_key(raw)
+    except Exception as e:
+        logging.error(f"Failed to load UIDAI public key from {path}: {e}")
+        return None
+
+
+# Parsed once at import; every verification reuses the same key object
+UIDAI_PUBLIC_KEY = _load_public_key(UIDAI_PUBLIC_KEY_PATH)
+
+
+def is_secure_qr(qr_data: bytes) -> bool:
+    """Secure QR payloads are a single (long) decimal number."""
+    data = qr_data.strip()
+    return len(data) > 100 and data.isdigit()
+
+
+def _decimal_to_bytes(digits: bytes) -> bytes:
+    # Accumulate in chunks: int() on the whole string would hit the 4300-digit limit
+    value = 0
+    for i in range(0, len(digits), DIGIT_CHUNK):
+        chunk = digits[i:i + DIGIT_CHUNK]
+        value = value * (10 ** len(chunk)) + int(chunk)
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+def _decompress(compressed: bytes) -> bytearray:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = bytearray()
+    view = memoryview(compressed)
+    step = 4096
+    for i in range(0, len(view), step):
+        out += decompressor.decompress(view[i:i + step], MAX_DECOMPRESSED_BYTES + 1 - len(out))
+        if len(out) > MAX_DECOMPRESSED_BYTES or decompressor.unconsumed_tail:
+            raise SecureQRError("Secure QR payload exceeds the decompression limit.")
+    out += decompressor.flush()
+    if not decompressor.eof:
+        raise SecureQRError("Secure QR payload is truncated.")
+    return out
+
+
+class SecureQRPayload:
+    """
+    Decoded Aadhaar Secure QR. Text fields are decoded eagerly (they are small);
+    the photo, hashes and signature stay as memoryviews over the decompressed buffer.
+    """
+    def __init__(self, fields: dict, photo: memoryview, signed_data: memoryview,
+                 signature: memoryview, email_hash: memoryview | None, mobile_hash: memoryview | None):
+        self.fields = fields
+        self.photo = photo
+        self.signed_data = signed_data
+        self.signature = signature
+        self.email_hash = email_hash
+        self.mobile_hash = mobile_hash
+
+    @property
+    def uid_last_4(self) -> str:
+        return (self.fields.get("reference_id") or "")[:4]
+
+    def decode_photo(self) -> np.ndarray | None:
+        """Decodes the embedded JPEG2000 photo to a BGR array."""
+        arr = np.frombuffer(self.photo, dtype=np.uint8)
+        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        if img is None:
+            try:
+                from io import BytesIO
+                from PIL import Image
+                img = cv2.cvtColor(np.array(Image.open(BytesIO(self.photo)).convert("RGB")), cv2.COLOR_RGB2BGR)
+            except Exception as e:
+                logging.warning(f"Could not decode Secure QR photo: {e}")
+                return None
+        return img
+
+    def verify_signature(self, public_key=None) -> bool | None:
+        """
+        RSA-SHA256 (PKCS#1 v1.5) check of everything before the trailing signature.
+        Returns None when no UIDAI key is configured.
+        """
+        key = public_key or UIDAI_PUBLIC_KEY
+        if key is None:
+            return None
+        try:
+            key.verify(bytes(self.signature), self.signed_data, padding.PKCS1v15(), hashes.SHA256())
+            return True
+        except InvalidSignature:
+            return False
+        except Exception as e:
+            logging.error(f"Secure QR signature check error: {e}")
+            return False
+
+
+def parse_secure_qr(qr_data: bytes) -> SecureQRPayload:
+    """Parses a Secure QR (V1 or V2) from the raw QR text."""
+    try:
+        buf = _decompress(_decimal_to_bytes(qr_data.strip()))
+    except zlib.error as e:
+        raise SecureQRError(f"Secure QR payload is not valid gzip: {e}")
+
+    if len(buf) <= SIGNATURE_LENGTH:
+        raise SecureQRError("Secure QR payload is too short.")
+
+    field_names = V2_FIELDS if buf[:2] == b"V2" else V1_FIELDS
+    fields = {}
+    start = 0
+    for name in field_names:
+        end = buf.find(DELIMITER, start)
+        if end == -1:
+            raise SecureQRError(f"Secure QR payload ends before field '{name}'.")
+        fields[name] = buf[start:end].decode("iso-8859-1")
+        start = end + 1
+
+    view = memoryview(buf)
+    signature_start = len(buf) - SIGNATURE_LENGTH
+    indicator = fields.get("email_mobile_indicator", "0")
+    has_email = indicator in ("1", "3")
+    has_mobile = indicator in ("2", "3")
+
+    photo_end = signature_start
+    mobile_hash = email_hash = None
+    if has_mobile:
+        mobile_hash = view[photo_end - HASH_LENGTH:photo_end]
+        photo_end -= HASH_LENGTH
+    if has_email:
+        email_hash = view[photo_end - HASH_LENGTH:photo_end]
+        photo_end -= HASH_LENGTH
+    if photo_end <= start:
+        raise SecureQRError("Secure QR payload has no photo.")
+
+    return SecureQRPayload(
+        fields=fields,
+        photo=view[start:photo_end],
+        signed_data=view[:signature_start],
+        signature=view[signature_start:],
+        email_hash=email_hash,
+        mobile_hash=mobile_hash,
+    )
@@ -1,6 +1,5 @@
 import logging
 import torch
-from transformers import AutoImageProcessor, AutoModelForImageClassification
 from PIL import Image
 import cv2
 import sys
@@ -8,6 +7,8 @@ import os
 import numpy as np
 import torch.nn.functional as F
 
+from app.verification.model_registry import models
+
 if torch.backends.mps.is_available() and torch.backends.mps.is_built():
     DEVICE = torch.device("mps")
 elif torch.cuda.is_available():
@@ -17,31 +18,85 @@ else:
 
 # IMAGE_MODEL = "selimsef/weighted-face-cnn-deepfake-detection"
 IMAGE_MODEL = "prithivMLmods/Deep-Fake-Detector-v2-Model"
+DEEPFAKE_BATCH_SIZE = 8
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Local safetensors export of IMAGE_MODEL (see --export below); used when present
+DEEPFAKE_MODEL_DIR = os.getenv("DEEPFAKE_MODEL_DIR", os.path.join(BASE_DIR, "ml_models", "deepfake_detection", "export"))
+SAFETENSORS_FILE = "model.safetensors"
 
 logging.basicConfig(level=logging.INFO)
 
-try:
-    logging.info(f"Loading Deepfake model: {IMAGE_MODEL}")
-    image_processor = AutoImageProcessor.from_pretrained(IMAGE_MODEL)
-    image_model_obj = AutoModelForImageClassification.from_pretrained(IMAGE_MODEL)
-    image_model_obj.to(DEVICE)
-    image_model_obj.eval() 
+def _load_mapped(model_dir: str):
+    """
+    Builds the model skeleton on the meta device and adopts the tensors from
+    the safetensors file without copying them. On CPU those tensors are views
+    of a read-only mapping of the file, so the weights live in the page cache:
+    no unpickling, no second in-heap copy, and every process on the node that
+    maps the same file shares the same physical pages.
+    """
+    from safetensors.torch import load_file
+    from transformers import AutoConfig, AutoImageProcessor, AutoModelForImageClassification
+    image_processor = AutoImageProcessor.from_pretrained(model_dir)
+    config = AutoConfig.from_pretrained(model_dir)
+    with torch.device("meta"):
+        image_model_obj = AutoModelForImageClassification.from_config(config)
+    image_model_obj.load_state_dict(load_file(os.path.join(model_dir, SAFETENSORS_FILE), device="cpu"), assign=True)
+    return image_processor, image_model_obj
+
+def _load_model():
+    # transformers is imported here so importing this module stays cheap
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+    image_processor = image_model_obj = None
+    if os.path.exists(os.path.join(DEEPFAKE_MODEL_DIR, SAFETENSORS_FILE)):
+        try:
+            logging.info(f"Mapping Deepfake model weights from {DEEPFAKE_MODEL_DIR}")
+            image_processor, image_model_obj = _load_mapped(DEEPFAKE_MODEL_DIR)
+        except Exception as e:
+            logging.warning(f"Mapped load failed ({e}); falling back to {IMAGE_MODEL}")
+            image_processor = image_model_obj = None
+    if image_model_obj is None:
+        logging.info(f"Loading Deepfake model: {IMAGE_MODEL}")
+        image_processor = AutoImageProcessor.from_pretrained(IMAGE_MODEL)
+        image_model_obj = AutoModelForImageClassification.from_pretrained(IMAGE_MODEL)
+    if DEVICE.type != "cpu":
+        image_model_obj.to(DEVICE)
+    image_model_obj.eval()
     logging.info("Deepfake Model loaded.")
-except Exception as e:
-    logging.error(f"Failed to load deepfake model: {e}")
-    image_model_obj = None
-    image_processor = None
+    return image_processor, image_model_obj
+
+def export_safetensors(out_dir: str = DEEPFAKE_MODEL_DIR):
+    """Writes IMAGE_MODEL (config, processor, weights) as a local safetensors snapshot."""
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+    AutoImageProcessor.from_pretrained(IMAGE_MODEL).save_pretrained(out_dir)
+    AutoModelForImageClassification.from_pretrained(IMAGE_MODEL).save_pretrained(out_dir, safe_serialization=True)
+    print(f"Exported {IMAGE_MODEL} to {out_dir}")
+
+def _warmup(loaded):
+    image_processor, image_model_obj = loaded
+    blank = Image.new("RGB", (224, 224))
+    inputs = {k: v.to(DEVICE) for k, v in image_processor(images=[blank], return_tensors="pt").items()}
+    with torch.no_grad():
+        image_model_obj(**inputs)
+
+# GPU contexts do not survive fork(), so on an accelerator each worker loads its own copy
+models.register("deepfake", _load_model, warmup=_warmup, fork_safe=DEVICE.type == "cpu")
 
 def detect_deepfake(frame_chunk: list) -> dict:
     try:
         if not frame_chunk:
             return {"is_deepfake": False, "fake_score": 0.0, "error": "Empty frame chunk."}
+        loaded = models.get("deepfake")
+        if loaded is None:
+            return {"is_deepfake": False, "fake_score": 0.0, "error": "Deepfake model not loaded."}
+        image_processor, image_model_obj = loaded
         frame_scores = []
         device = next(image_model_obj.parameters()).device
-        for i, frame in enumerate(frame_chunk):
+        for start in range(0, len(frame_chunk), DEEPFAKE_BATCH_SIZE):
+            batch = frame_chunk[start:start + DEEPFAKE_BATCH_SIZE]
             try:
-                img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))               
-                inputs = image_processor(images=img, return_tensors="pt")
+                imgs = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in batch]
+                inputs = image_processor(images=imgs, return_tensors="pt")
                 inputs = {k: v.to(device) for k, v in inputs.items()}
                 
                 with torch.no_grad():
@@ -49,14 +104,13 @@ def detect_deepfake(frame_chunk: list) -> dict:
                     logits = outputs.logits
                     probs = torch.nn.functional.softmax(logits, dim=1)
                     
-                    fake_prob = probs[0][1].item()
-                    frame_scores.append(fake_prob)
+                    batch_scores = probs[:, 1].tolist()
+                    frame_scores.extend(batch_scores)
                     
-                    if i % 10 == 0:
-                        logging.info(f"Chunk Frame {i}: fake_prob={fake_prob:.4f}")
+                    logging.info(f"Chunk Frames {start}-{start + len(batch) - 1}: max fake_prob={max(batch_scores):.4f}")
                         
-            except Exception as frame_err:
-                logging.warning(f"Skipping frame {i} due to error: {frame_err}")
+            except Exception as batch_err:
+                logging.warning(f"Skipping frames {start}-{start + len(batch) - 1} due to error: {batch_err}")
                 continue
 
         if not frame_scores:
@@ -77,8 +131,13 @@ def detect_deepfake(frame_chunk: list) -> dict:
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python deepfake_video_detector.py <video_file>")
+        print("       python -m app.verification.deepfake --export [out_dir]")
         sys.exit(1)
 
+    if sys.argv[1] == "--export":
+        export_safetensors(sys.argv[2] if len(sys.argv) > 2 else DEEPFAKE_MODEL_DIR)
+        sys.exit(0)
+
     video_file = sys.argv[1]
     if not os.path.exists(video_file):
         print("Error: Video file not found.")
@@ -0,0 +1,167 @@
+import logging
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from app.verification.ocr_engine import PSM_SINGLE_LINE, PSM_SINGLE_BLOCK
+
+logging.basicConfig(level=logging.INFO)
+
+NAME_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .'"
+DATE_WHITELIST = "0123456789/-"
+ID_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 "
+
+# Crops are upscaled so text lines are at least this tall before OCR
+MIN_LINE_HEIGHT = 48
+ANCHOR_DETECT_WIDTH = 640
+
+_face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+
+@dataclass(frozen=True)
+class FieldRegion:
+    """
+    A field crop expressed as (x0, y0, x1, y1) fractions of its anchor box.
+    `anchor` is "card" (document boundary) or "photo" (holder's portrait);
+    photo-relative boxes may extend beyond the photo itself.
+    """
+    field: str
+    box: tuple
+    anchor: str = "card"
+    fallback_box: tuple | None = None
+    psm: int = PSM_SINGLE_LINE
+    whitelist: str | None = None
+
+
+@dataclass(frozen=True)
+class DocumentLayout:
+    doc_type: str
+    fields: tuple
+
+
+LAYOUTS = {
+    "aadhaar_card": DocumentLayout("aadhaar_card", (
+        FieldRegion("name", (1.05, -0.05, 4.2, 0.30), anchor="photo",
+                    fallback_box=(0.28, 0.22, 0.95, 0.40), whitelist=NAME_WHITELIST),
+        FieldRegion("dob", (1.05, 0.25, 4.2, 0.60), anchor="photo",
+                    fallback_box=(0.28, 0.36, 0.95, 0.55), psm=PSM_SINGLE_BLOCK, whitelist=DATE_WHITELIST),
+        FieldRegion("id_number", (0.20, 0.72, 0.80, 0.92), whitelist=ID_WHITELIST),
+    )),
+    "pan_card": DocumentLayout("pan_card", (
+        FieldRegion("name", (0.03, 0.24, 0.70, 0.40), psm=PSM_SINGLE_BLOCK, whitelist=NAME_WHITELIST),
+        FieldRegion("dob", (0.03, 0.52, 0.55, 0.68), psm=PSM_SINGLE_BLOCK, whitelist=DATE_WHITELIST),
+        FieldRegion("id_number", (0.03, 0.66, 0.60, 0.82), whitelist=ID_WHITELIST),
+    )),
+    "voter_id": DocumentLayout("voter_id", (
+        FieldRegion("id_number", (0.45, 0.10, 0.98, 0.26), whitelist=ID_WHITELIST),
+        FieldRegion("name", (1.05, 0.00, 3.0, 0.35), anchor="photo",
+                    fallback_box=(0.35, 0.30, 0.98, 0.48), psm=PSM_SINGLE_BLOCK, whitelist=NAME_WHITELIST),
+        FieldRegion("dob", (1.05, 0.55, 3.0, 1.00), anchor="photo",
+                    fallback_box=(0.35, 0.60, 0.98, 0.80), psm=PSM_SINGLE_BLOCK, whitelist=DATE_WHITELIST),
+    )),
+    "driving_license": DocumentLayout("driving_license", (
+        FieldRegion("id_number", (0.02, 0.12, 0.75, 0.28), whitelist=ID_WHITELIST),
+        FieldRegion("name", (0.02, 0.28, 0.72, 0.45), psm=PSM_SINGLE_BLOCK, whitelist=NAME_WHITELIST),
+        FieldRegion("dob", (0.02, 0.45, 0.72, 0.62), psm=PSM_SINGLE_BLOCK, whitelist=DATE_WHITELIST),
+    )),
+    "passport": DocumentLayout("passport", (
+        FieldRegion("id_number", (0.65, 0.08, 0.98, 0.22), whitelist=ID_WHITELIST),
+        FieldRegion("name", (1.05, 0.10, 2.9, 0.55), anchor="photo",
+                    fallback_box=(0.30, 0.20, 0.95, 0.45), psm=PSM_SINGLE_BLOCK, whitelist=NAME_WHITELIST),
+        FieldRegion("dob", (1.05, 0.55, 2.9, 0.90), anchor="photo",
+                    fallback_box=(0.30, 0.45, 0.95, 0.65), psm=PSM_SINGLE_BLOCK, whitelist=DATE_WHITELIST),
+    )),
+}
+
+
+def get_layout(doc_type: str | None) -> DocumentLayout | None:
+    return LAYOUTS.get(doc_type) if doc_type else None
+
+
+def detect_anchors(gray: np.ndarray) -> dict:
+    """
+    Finds the document boundary and the holder's photo on a downscaled copy
+    and returns both as (x, y, w, h) boxes in full-resolution coordinates.
+    The card falls back to the whole image when no clear boundary is found.
+    """
+    h, w = gray.shape[:2]
+    scale = min(1.0, ANCHOR_DETECT_WIDTH / float(w))
+    small = cv2.resize(gray, (int(w * scale), int(h * scale))) if scale < 1.0 else gray
+    sh, sw = small.shape[:2]
+
+    card = (0, 0, w, h)
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, None, iterations=2)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        largest = max(contours, key=cv2.contourArea)
+        x, y, cw, ch = cv2.boundingRect(largest)
+        if cw * ch > 0.3 * sw * sh:
+            card = (int(x / scale), int(y / scale), int(cw / scale), int(ch / scale))
+
+    photo = None
+    min_face = max(24, int(min(sw, sh) * 0.08))
+    faces = _face_cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=5, minSize=(min_face, min_face))
+    if len(faces):
+        x, y, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        # Haar boxes hug the face; grow to approximate the printed photo frame
+        x, y, fw, fh = x - 0.25 * fw, y - 0.35 * fh, 1.5 * fw, 1.8 * fh
+        photo = (int(x / scale), int(y / scale), int(fw / scale), int(fh / scale))
+
+    return {"card": card, "photo": photo}
+
+
+def _resolve_box(region: FieldRegion, anchors: dict, shape) -> tuple | None:
+    anchor_box = anchors.get(region.anchor)
+    box = region.box
+    if anchor_box is None:
+        if region.fallback_box is None:
+            return None
+        anchor_box, box = anchors["card"], region.fallback_box
+
+    ax, ay, aw, ah = anchor_box
+    img_h, img_w = shape[:2]
+    x0 = max(0, int(ax + box[0] * aw))
+    y0 = max(0, int(ay + box[1] * ah))
+    x1 = min(img_w, int(ax + box[2] * aw))
+    y1 = min(img_h, int(ay + box[3] * ah))
+    if x1 - x0 < 8 or y1 - y0 < 8:
+        return None
+    return x0, y0, x1, y1
+
+
+def _prepare_crop(crop: np.ndarray) -> np.ndarray:
+    if crop.shape[0] < MIN_LINE_HEIGHT:
+        factor = MIN_LINE_HEIGHT / float(crop.shape[0])
+        crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def extract_field_regions(gray: np.ndarray, layout: DocumentLayout, engine) -> dict:
+    """
+    OCRs only the field crops of `layout`. Returns
+    {field: {"text": str, "confidence": float, "box": (x0, y0, x1, y1)}}.
+    Fields whose region cannot be resolved are omitted.
+    """
+    anchors = detect_anchors(gray)
+    fields = {}
+    for region in layout.fields:
+        box = _resolve_box(region, anchors, gray.shape)
+        if box is None:
+            continue
+        x0, y0, x1, y1 = box
+        try:
+            text, confidence = engine.recognize(
+                _prepare_crop(gray[y0:y1, x0:x1]), psm=region.psm, whitelist=region.whitelist
+            )
+        except Exception as e:
+            logging.warning(f"[OCR] Field '{region.field}' failed: {e}")
+            continue
+        fields[region.field] = {
+            "text": " ".join(text.split()).lower(),
+            "confidence": confidence,
+            "box": box,
+        }
+    return fields
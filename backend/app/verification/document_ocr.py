@@ -1,7 +1,6 @@
 import cv2
 import pytesseract
 from PIL import Image
-from pyzbar.pyzbar import decode
 from lxml import etree
 from rapidfuzz import fuzz 
 import re
@@ -11,6 +10,12 @@ import shutil
 import logging
 import os
 
+from app.verification.ocr_engine import get_ocr_engine
+from app.verification.document_layouts import get_layout, extract_field_regions
+from app.verification.qr_locator import locate_and_decode
+from app.verification.pdf_ingest import is_pdf, load_pdf_page
+from app.verification.aadhaar_secure_qr import SecureQRError, SecureQRPayload, is_secure_qr, parse_secure_qr
+
 logging.basicConfig(level=logging.INFO)
 
 class DocumentVerifier:
@@ -18,42 +23,58 @@ class DocumentVerifier:
     A class to verify government documents like Aadhar cards by comparing
     data from the QR code with text extracted via OCR.
     """
-    def __init__(self, image_path: str):
+    def __init__(self, image_path: str, doc_type: str | None = None):
         """
-        Initializes the verifier with the path to the document image.
+        Initializes the verifier with the path to the document image or PDF.
+        `doc_type` selects the field layout used for region OCR.
         """
         if not image_path:
             raise ValueError("Image path cannot be empty.")
         
         self.image_path = image_path
+        self.doc_type = doc_type
+        self._gray = None
+        self.qr_uid = None
+        self.secure_qr = None
+        self.signature_verified = None
+        self._embedded_face = None
         
         if not os.path.exists(self.image_path):
             raise FileNotFoundError(f"File does not exist at path: {self.image_path}")
 
         try:
-            self.image = cv2.imread(self.image_path)
+            if is_pdf(self.image_path):
+                self.image = load_pdf_page(self.image_path)
+            else:
+                self.image = cv2.imread(self.image_path)
             if self.image is None:
                 raise ValueError(f"OpenCV could not read image file at {self.image_path}. Check file format.")
         except Exception as e:
             logging.error(f"Error loading image: {e}")
             raise IOError(f"Error loading image: {e}")
 
+    @property
+    def gray(self):
+        """Grayscale copy of the document, converted once and shared by QR and OCR."""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
     def decode_qr_code(self) -> dict | None:
         """
-        Decodes the QR code from the document image and parses the XML data.
-        Aadhaar QR codes contain digitally signed XML.
+        Decodes the QR code from the document image and parses its data.
+        Handles both the Aadhaar Secure QR and the legacy XML QR.
         """
         try:
-            barcodes = decode(self.image)
-            if not barcodes:
+            qr_data_raw = locate_and_decode(self.gray)
+            if qr_data_raw is None:
                 logging.warning("No QR code found in document image.")
                 return None
 
-            qr_data_raw = barcodes[0].data
-
-            if not self._verify_signature(qr_data_raw):
-                logging.warning("Digital signature verification failed. The QR code may be tampered with.")
+            if is_secure_qr(qr_data_raw):
+                return self._decode_secure_qr(qr_data_raw)
 
+            # Legacy XML QR codes carry no signature we can check
             qr_data_str = qr_data_raw.decode('utf-8', 'ignore')
             
             xml_start_index = qr_data_str.find('<?xml')
@@ -65,6 +86,8 @@ class DocumentVerifier:
             
             try:
                 root = etree.fromstring(xml_data.encode('utf-8'))
+                # Kept off qr_info so the full UID never reaches the API response
+                self.qr_uid = root.get("uid")
                 qr_info = {
                     "name": root.get("name"),
                     "dob": root.get("dob"),
@@ -80,33 +103,96 @@ class DocumentVerifier:
             logging.error(f"Error decoding or parsing QR code: {e}", exc_info=True)
             return None
 
-    def _verify_signature(self, qr_data: bytes) -> bool:
+    def _decode_secure_qr(self, qr_data: bytes) -> dict | None:
+        """
+        Parses an Aadhaar Secure QR (compressed big integer) and checks its
+        signature. The embedded photo is kept for face matching.
+        """
+        try:
+            self.secure_qr = parse_secure_qr(qr_data)
+        except SecureQRError as e:
+            logging.error(f"Failed to parse Secure QR: {e}")
+            return None
+
+        signature_verified = self._verify_signature(self.secure_qr)
+        self.signature_verified = signature_verified
+        if signature_verified is False:
+            logging.warning("Digital signature verification failed. The QR code may be tampered with.")
+
+        fields = self.secure_qr.fields
+        self.qr_uid = self.secure_qr.uid_last_4
+        return {
+            "name": fields.get("name"),
+            "dob": fields.get("dob"),
+            "gender": fields.get("gender"),
+            "pincode": fields.get("pincode"),
+            "format": "secure_qr",
+            "signature_verified": signature_verified,
+        }
+
+    def _verify_signature(self, payload: SecureQRPayload) -> bool | None:
         """
-        **SIMULATED** digital signature verification.
-        In production, use cryptographic libraries to verify the signature.
+        Verifies the UIDAI RSA-SHA256 signature of a Secure QR payload.
+        Returns None when no UIDAI public key is configured.
         """
-        return True
+        return payload.verify_signature()
+
+    @property
+    def embedded_face(self):
+        """Holder photo from a signature-verified Secure QR (BGR), or None."""
+        if self.secure_qr is None or self.signature_verified is not True:
+            return None
+        if self._embedded_face is None:
+            self._embedded_face = self.secure_qr.decode_photo()
+        return self._embedded_face
 
     def extract_text_with_ocr(self) -> str:
         """
         Performs OCR on the image to extract all visible text.
         """
         try:
-            gray_image = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            gray_image = self.gray
             
             # Optional: Thresholding can sometimes improve OCR accuracy
             # _, thresh_image = cv2.threshold(gray_image, 150, 255, cv2.THRESH_BINARY)
             
             pil_img = Image.fromarray(gray_image)
             
-            # 'eng' for English. Add other languages if needed (e.g., 'eng+hin')
-            extracted_text = pytesseract.image_to_string(pil_img, lang='eng')
+            # Language is configured on the engine via OCR_LANG (default 'eng')
+            extracted_text = get_ocr_engine().image_to_string(pil_img)
             
             return extracted_text.lower()
         except Exception as e:
             logging.error(f"Error during OCR extraction: {e}", exc_info=True)
             return ""
 
+    @staticmethod
+    def _check_field(region: dict | None, full_page_text, scorer, threshold: int) -> dict:
+        """
+        Scores one field against its OCR'd region, retrying on the full page text
+        when the region is missing or does not reach `threshold`.
+        Confidence combines the match score with Tesseract's word confidence.
+        """
+        if region and region["text"]:
+            score = scorer(region["text"])
+            if score >= threshold:
+                return {
+                    "matched": True,
+                    "match_score": score,
+                    "ocr_confidence": region["confidence"],
+                    "confidence": round((score / 100.0) * (region["confidence"] / 100.0), 3),
+                    "source": "region",
+                }
+
+        score = scorer(full_page_text())
+        return {
+            "matched": score >= threshold,
+            "match_score": score,
+            "ocr_confidence": None,
+            "confidence": round(score / 100.0, 3),
+            "source": "full_page",
+        }
+
     def verify_document(self) -> dict:
         """
         Main verification method that orchestrates the entire process.
@@ -119,39 +205,75 @@ class DocumentVerifier:
         
         logging.info(f"QR Code Decoded Successfully. Name: {qr_info.get('name', 'Unknown')}")
 
-        ocr_text = self.extract_text_with_ocr()
-        if not ocr_text:
+        if qr_info.get("format") == "secure_qr":
+            if qr_info["signature_verified"] is False:
+                return {"status": "REJECTED", "reason": "Secure QR signature verification failed.", "qr_data": qr_info}
+            if qr_info["signature_verified"]:
+                # The signed payload is authoritative, so the printed text need not be OCR'd
+                logging.info("Document Verified via signed Secure QR.")
+                return {
+                    "status": "VERIFIED",
+                    "reason": "Aadhaar Secure QR signature verified.",
+                    "field_checks": {},
+                    "qr_data": qr_info
+                }
+
+        layout = get_layout(self.doc_type)
+        regions = extract_field_regions(self.gray, layout, get_ocr_engine()) if layout else {}
+
+        full_page = {}
+        def full_page_text() -> str:
+            # Full-page OCR is only run when a field region is missing or does not match
+            if "text" not in full_page:
+                full_page["text"] = " ".join(self.extract_text_with_ocr().split())
+            return full_page["text"]
+
+        if not regions and not full_page_text():
             return {"status": "FLAGGED", "reason": "Could not extract any text from the document image."}
-        
-        # Clean up OCR text (remove extra whitespace)
-        ocr_text = " ".join(ocr_text.split()) 
 
         mismatches = []
-        
+        field_checks = {}
+
         # 1. Verify Name using Fuzzy Matching
         if qr_info.get("name"):
             qr_name = qr_info["name"].lower()
-            # partial_ratio checks if qr_name is a substring of ocr_text with some tolerance
-            similarity_score = fuzz.partial_ratio(qr_name, ocr_text)
-            
-            if similarity_score < 80: # Threshold: 80% match required
-                mismatches.append(f"Name mismatch (Score: {similarity_score})")
+            check = self._check_field(regions.get("name"), full_page_text,
+                                      lambda text: fuzz.partial_ratio(qr_name, text), 80)
+            field_checks["name"] = check
+
+            if not check["matched"]: # Threshold: 80% match required
+                mismatches.append(f"Name mismatch (Score: {check['match_score']})")
             else:
-                logging.info(f"Name Verified (Score: {similarity_score})")
+                logging.info(f"Name Verified (Score: {check['match_score']}, Source: {check['source']})")
 
         # 2. Verify DOB (Strict Date Matching)
         if qr_info.get("dob"):
             # Allow formats like DD-MM-YYYY or DD/MM/YYYY
             dob_pattern = qr_info["dob"].replace("-", "[/-]").replace("/", "[/-]")
-            if not re.search(dob_pattern, ocr_text):
+            check = self._check_field(regions.get("dob"), full_page_text,
+                                      lambda text: 100 if re.search(dob_pattern, text) else 0, 100)
+            field_checks["dob"] = check
+            if not check["matched"]:
                 mismatches.append(f"DOB mismatch (QR: {qr_info['dob']})")
 
+        # 3. Verify ID number (full or masked to the last 4 digits)
+        qr_uid = re.sub(r"\D", "", self.qr_uid or "")
+        if qr_uid:
+            def uid_score(text):
+                digits = re.sub(r"\D", "", text)
+                return 100 if digits and (qr_uid in digits or digits.endswith(qr_uid[-4:])) else 0
+            check = self._check_field(regions.get("id_number"), full_page_text, uid_score, 100)
+            field_checks["id_number"] = check
+            if not check["matched"]:
+                mismatches.append("ID number mismatch")
+
         if mismatches:
             logging.warning(f"Verification Flagged: {mismatches}")
             return {
                 "status": "FLAGGED",
                 "reason": "Data mismatch between QR code and visible text.",
                 "mismatched_fields": mismatches,
+                "field_checks": field_checks,
                 "qr_data": qr_info
             }
         else:
@@ -159,6 +281,7 @@ class DocumentVerifier:
             return {
                 "status": "VERIFIED",
                 "reason": "QR code data matches visible text.",
+                "field_checks": field_checks,
                 "qr_data": qr_info
             }
 
@@ -174,10 +297,11 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Verify a government document image.")
     parser.add_argument("image_path", type=str, help="The file path to the document image.")
+    parser.add_argument("--doc-type", type=str, default=None, help="Document layout, e.g. aadhaar_card.")
     args = parser.parse_args()
 
     try:
-        verifier = DocumentVerifier(args.image_path)
+        verifier = DocumentVerifier(args.image_path, doc_type=args.doc_type)
         result = verifier.verify_document()
         print("\n--- FINAL REPORT ---")
         for key, value in result.items():
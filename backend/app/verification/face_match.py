@@ -1,11 +1,43 @@
 import cv2
 import numpy as np
-from deepface import DeepFace
 import logging
 import os
 
+from app.verification.model_registry import models
+
 logging.basicConfig(level=logging.INFO)
 
+def _deepface():
+    # Deferred: importing deepface pulls in TensorFlow, which is slow
+    from deepface import DeepFace
+    return DeepFace
+
+def _load_facenet():
+    return _deepface().build_model("Facenet512")
+
+def _warmup_facenet(_model):
+    _deepface().represent(img_path=np.zeros((160, 160, 3), dtype=np.uint8), model_name='Facenet512',
+                          detector_backend='skip', enforce_detection=False)
+
+def _load_mtcnn():
+    DeepFace = _deepface()
+    try:
+        return DeepFace.build_model(model_name="mtcnn", task="face_detector")
+    except TypeError:
+        # Older deepface: detectors are built (and cached) on first use
+        DeepFace.extract_faces(img_path=np.zeros((160, 160, 3), dtype=np.uint8), detector_backend='mtcnn',
+                               enforce_detection=False)
+        return "mtcnn"
+
+def _warmup_mtcnn(_model):
+    _deepface().extract_faces(img_path=np.full((240, 320, 3), 127, dtype=np.uint8), detector_backend='mtcnn',
+                              enforce_detection=False)
+
+# Both run on DeepFace's shared Keras runtime, so they load one after the other;
+# TensorFlow's runtime threads do not survive fork(), so never in a pre-fork master
+models.register("facenet512", _load_facenet, warmup=_warmup_facenet, group="deepface", fork_safe=False)
+models.register("mtcnn", _load_mtcnn, warmup=_warmup_mtcnn, group="deepface", fork_safe=False)
+
 def extract_face(image_input) -> np.ndarray | None:
     """
     Extracts the largest face from an image (File Path OR Numpy Array).
@@ -29,7 +61,8 @@ def extract_face(image_input) -> np.ndarray | None:
         return None
 
     try:
-        faces = DeepFace.extract_faces(
+        models.get("mtcnn")
+        faces = _deepface().extract_faces(
             img_path=img, 
             detector_backend='mtcnn',
             enforce_detection=False,
@@ -74,7 +107,8 @@ def compare_faces(img1_input, img2_input) -> dict:
     try:
         model_name = 'Facenet512'
         distance_metric = 'cosine'
-        result = DeepFace.verify(
+        models.get("facenet512")
+        result = _deepface().verify(
             img1_path=img1_input,
             img2_path=img2_input,
             model_name=model_name,
@@ -92,4 +126,50 @@ def compare_faces(img1_input, img2_input) -> dict:
 
     except Exception as e:
         logging.error(f"Error during face comparison: {e}")
-        return {"verified": False, "distance": 1.0, "error": str(e)}
\ No newline at end of file
+        return {"verified": False, "distance": 1.0, "error": str(e)}
+
+def get_embedding(face_input) -> np.ndarray | None:
+    """
+    Computes the Facenet512 embedding of an already-cropped face.
+    Matches the representation compare_faces uses internally.
+    """
+    if face_input is None:
+        return None
+
+    try:
+        models.get("facenet512")
+        reps = _deepface().represent(
+            img_path=face_input,
+            model_name='Facenet512',
+            detector_backend='skip',
+            enforce_detection=False
+        )
+        if not reps:
+            return None
+        return np.asarray(reps[0]["embedding"], dtype=np.float32)
+
+    except Exception as e:
+        logging.error(f"Embedding error: {e}")
+        return None
+
+def compare_embeddings(emb1, emb2, threshold: float = 0.30) -> dict:
+    """
+    Cosine distance between two Facenet512 embeddings.
+    Returns the same shape as compare_faces (0.30 is DeepFace's Facenet512 cosine threshold).
+    """
+    if emb1 is None or emb2 is None:
+        return {"verified": False, "distance": 1.0, "error": "Missing embedding"}
+
+    a = np.asarray(emb1, dtype=np.float32)
+    b = np.asarray(emb2, dtype=np.float32)
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    if denom == 0.0:
+        return {"verified": False, "distance": 1.0, "error": "Zero embedding"}
+
+    distance = 1.0 - float(np.dot(a, b)) / denom
+    return {
+        "verified": distance <= threshold,
+        "distance": distance,
+        "threshold": threshold,
+        "model": "Facenet512"
+    }
@@ -5,19 +5,33 @@ import logging
 import numpy as np
 import os
 
+from app.verification.model_registry import models
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PREDICTOR_PATH = os.path.join(BASE_DIR, "ml_models", "liveness_detection", "shape_predictor_68_face_landmarks.dat")
+# Point replicas on one node at the same file (e.g. a hostPath/read-only volume)
+# so cold starts read it from the shared page cache instead of disk
+PREDICTOR_PATH = os.getenv("DLIB_PREDICTOR_PATH", os.path.join(BASE_DIR, "ml_models", "liveness_detection", "shape_predictor_68_face_landmarks.dat"))
 
 detector = dlib.get_frontal_face_detector()
-predictor = None
 
-try:
-    if os.path.exists(PREDICTOR_PATH):
-        predictor = dlib.shape_predictor(PREDICTOR_PATH)
-    else:
+
+def _load_predictor():
+    # dlib deserializes the regression trees into its own heap objects, so the
+    # loaded predictor cannot be file-backed; under the pre-fork launch
+    # (gunicorn.conf.py) it is loaded once in the master and shared copy-on-write.
+    if not os.path.exists(PREDICTOR_PATH):
         logging.error(f"Liveness Model not found at: {PREDICTOR_PATH}")
-except Exception as e:
-    logging.error(f"Error loading predictor: {e}")
+        return None
+    return dlib.shape_predictor(PREDICTOR_PATH)
+
+
+def _warmup_predictor(predictor):
+    gray = np.zeros((240, 320), dtype=np.uint8)
+    predictor(gray, dlib.rectangle(100, 60, 220, 180))
+    detector(gray, 0)
+
+
+models.register("landmarks", _load_predictor, warmup=_warmup_predictor)
 
 (lStart, lEnd) = (42, 48)
 (rStart, rEnd) = (36, 42)
@@ -81,6 +95,7 @@ def check_liveness_challenge(frame_bgr, challenge_type="blink"):
     Checks if a single frame MEETS the condition for the challenge.
     Returns the boolean result AND the raw metric (EAR or Yaw).
     """
+    predictor = models.get("landmarks")
     if predictor is None: 
         return {"passed": False, "message": "Predictor not loaded"}
 
@@ -116,16 +131,18 @@ def check_liveness_challenge(frame_bgr, challenge_type="blink"):
 
 # --- 4. CHUNK EVALUATOR (Averaged Score Logic) ---
 
-def liveness_check(frame_chunk: list, challenge_type: str = "blink") -> dict:
+def liveness_check(frame_chunk: list, challenge_type: str = "blink", process_every_n: int = 3) -> dict:
     """
-    Analyzes a video chunk.
+    Analyzes a video chunk of consecutive frames.
+    - Only every `process_every_n`-th frame is checked; pass 1 for native-fps
+      clips, where a blink spans just a few frames.
     - Collects scores for ALL frames that meet the condition (e.g., all frames where eyes are closed).
     - Calculates the AVERAGE of these scores.
     - Decides 'passed' based on action count AND average score quality.
     """
     EYE_AR_CONSEC_FRAMES = 2      
     HEAD_TURN_CONSEC_FRAMES = 3   
-    PROCESS_EVERY_N_FRAMES = 3  
+    PROCESS_EVERY_N_FRAMES = max(1, process_every_n)
 
     MIN_AVG_SCORE_THRESHOLD = 0.60 
     
@@ -137,7 +154,7 @@ def liveness_check(frame_chunk: list, challenge_type: str = "blink") -> dict:
     if not frame_chunk:
         return {"passed": False, "score": 0.0, "error": "Empty chunk"}
 
-    if predictor is None:
+    if models.get("landmarks") is None:
         return {"passed": False, "score": 0.0, "error": "Predictor not loaded"}
 
     for i, frame in enumerate(frame_chunk):
@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logging.basicConfig(level=logging.INFO)
+
+
+class _Model:
+    def __init__(self, name: str, loader, warmup, group: str, fork_safe: bool):
+        self.name = name
+        self.fork_safe = fork_safe
+        self.loader = loader
+        self.warmup = warmup
+        self.group = group
+        self.lock = threading.Lock()
+        self.value = None
+        self.status = "pending"
+        self.error = None
+        self.load_ms = None
+        self.warmup_ms = None
+
+
+class ModelRegistry:
+    """
+    Loads ML models on first use instead of at import. Verification modules
+    `register` a loader (and an optional warm-up inference) when imported, and
+    fetch the model with `get`, which blocks until it has loaded.
+
+    `start_background_load` loads everything concurrently at startup, one
+    thread per group (models sharing a framework runtime, e.g. DeepFace's
+    Keras models, share a group and load one after another). `/readyz` reports
+    ready once every model has loaded and warmed up.
+    """
+    def __init__(self):
+        self._models: dict[str, _Model] = {}
+        self._futures = []
+        self._executor = None
+
+    def register(self, name: str, loader, warmup=None, group: str | None = None, fork_safe: bool = True):
+        """`fork_safe=False` marks models (e.g. on CUDA/MPS) that must not be loaded before a fork."""
+        self._models[name] = _Model(name, loader, warmup, group or name, fork_safe)
+
+    def get(self, name: str):
+        """Returns the loaded model, loading it now if needed; None if loading failed."""
+        model = self._models[name]
+        if model.status != "ready" and model.status != "failed":
+            self._load(model)
+        return model.value
+
+    def _load(self, model: _Model):
+        with model.lock:
+            if model.status in ("ready", "failed"):
+                return
+            model.status = "loading"
+            started = time.perf_counter()
+            try:
+                value = model.loader()
+                loaded = time.perf_counter()
+                model.load_ms = round((loaded - started) * 1000, 1)
+                if model.warmup is not None and value is not None:
+                    model.warmup(value)
+                    model.warmup_ms = round((time.perf_counter() - loaded) * 1000, 1)
+                model.value = value
+                model.status = "ready" if value is not None else "failed"
+                if value is None:
+                    model.error = "loader returned nothing"
+                logging.info(f"[MODELS] {model.name}: {model.status} (load {model.load_ms} ms, warm-up {model.warmup_ms} ms)")
+            except Exception as e:
+                model.status = "failed"
+                model.error = str(e)
+                logging.error(f"[MODELS] {model.name} failed to load: {e}")
+
+    def _load_group(self, names: list):
+        for name in names:
+            self._load(self._models[name])
+
+    def start_background_load(self):
+        """Kicks off concurrent loading of every registered model; returns immediately."""
+        if self._executor is not None:
+            return
+        groups: dict[str, list] = {}
+        for model in self._models.values():
+            groups.setdefault(model.group, []).append(model.name)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(groups)), thread_name_prefix="model-load")
+        self._futures = [self._executor.submit(self._load_group, names) for names in groups.values()]
+        self._executor.shutdown(wait=False)
+
+    def load_all(self, names=None):
+        """Loads the given models (default: all) in the calling thread, e.g. in a pre-fork master."""
+        for name in names or list(self._models):
+            if name in self._models:
+                self._load(self._models[name])
+            else:
+                logging.warning(f"[MODELS] Unknown model '{name}' requested for preload")
+
+    def fork_safe(self, names) -> list:
+        """The subset of `names` that may be loaded in a pre-fork master."""
+        return [name for name in names if name not in self._models or self._models[name].fork_safe]
+
+    def wait(self, timeout: float | None = None):
+        wait(self._futures, timeout=timeout)
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._models) and all(m.status == "ready" for m in self._models.values())
+
+    def status(self) -> dict:
+        return {
+            name: {
+                "status": m.status,
+                "load_ms": m.load_ms,
+                "warmup_ms": m.warmup_ms,
+                **({"error": m.error} if m.error else {}),
+            }
+            for name, m in self._models.items()
+        }
+
+
+models = ModelRegistry()
@@ -0,0 +1,164 @@
+import abc
+import logging
+import os
+import threading
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logging.basicConfig(level=logging.INFO)
+
+# "auto" prefers the in-process tesserocr bindings and falls back to pytesseract.
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+TESSDATA_PATH = os.getenv("TESSDATA_PREFIX")
+
+PSM_AUTO = 3
+PSM_SINGLE_BLOCK = 6
+PSM_SINGLE_LINE = 7
+
+
+def _to_pil(image) -> Image.Image:
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+
+class OCREngine(abc.ABC):
+    """
+    Common interface for the OCR backends.
+    `recognize` returns the text together with a mean word confidence (0-100).
+    """
+    name = "base"
+
+    def __init__(self, lang: str = OCR_LANG):
+        self.lang = lang
+
+    @abc.abstractmethod
+    def recognize(self, image, psm: int = PSM_AUTO, whitelist: str | None = None) -> tuple[str, float]:
+        ...
+
+    def image_to_string(self, image, psm: int = PSM_AUTO, whitelist: str | None = None) -> str:
+        text, _ = self.recognize(image, psm=psm, whitelist=whitelist)
+        return text
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Keeps one long-lived TessBaseAPI handle per worker thread, so the traineddata
+    is loaded once per thread instead of once per document.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed.")
+        super().__init__(lang)
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            if TESSDATA_PATH:
+                api = tesserocr.PyTessBaseAPI(path=TESSDATA_PATH, lang=self.lang)
+            else:
+                api = tesserocr.PyTessBaseAPI(lang=self.lang)
+            self._local.api = api
+            with self._handles_lock:
+                self._handles.append(api)
+            logging.info(f"[OCR] Tesseract handle created for thread {threading.current_thread().name}")
+        return api
+
+    def recognize(self, image, psm: int = PSM_AUTO, whitelist: str | None = None) -> tuple[str, float]:
+        api = self._api()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetVariable("tessedit_char_whitelist", whitelist or "")
+            api.SetImage(_to_pil(image))
+            text = api.GetUTF8Text()
+            confidence = float(api.MeanTextConf())
+        finally:
+            api.Clear()
+        return text, confidence
+
+    def close(self):
+        with self._handles_lock:
+            for api in self._handles:
+                try:
+                    api.End()
+                except Exception:
+                    pass
+            self._handles.clear()
+        self._local = threading.local()
+
+
+class PytesseractEngine(OCREngine):
+    """Fallback that shells out to the tesseract binary for every call."""
+    name = "pytesseract"
+
+    @staticmethod
+    def _config(psm: int, whitelist: str | None) -> str:
+        config = f"--psm {psm}"
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+        return config
+
+    def recognize(self, image, psm: int = PSM_AUTO, whitelist: str | None = None) -> tuple[str, float]:
+        data = pytesseract.image_to_data(
+            _to_pil(image), lang=self.lang, config=self._config(psm, whitelist),
+            output_type=pytesseract.Output.DICT
+        )
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word or not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            conf = float(data["conf"][i])
+            if conf >= 0:
+                confidences.append(conf)
+        text = "\n".join(" ".join(words) for words in lines.values())
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text, confidence
+
+    def image_to_string(self, image, psm: int = PSM_AUTO, whitelist: str | None = None) -> str:
+        return pytesseract.image_to_string(_to_pil(image), lang=self.lang, config=self._config(psm, whitelist))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_ocr_engine(kind: str = OCR_ENGINE, lang: str = OCR_LANG) -> OCREngine:
+    """Builds an engine of the requested kind ("auto", "tesserocr" or "pytesseract")."""
+    if kind in ("auto", "tesserocr"):
+        try:
+            return TesserocrEngine(lang)
+        except Exception as e:
+            if kind == "tesserocr":
+                raise
+            logging.warning(f"[OCR] tesserocr unavailable ({e}). Falling back to pytesseract.")
+    return PytesseractEngine(lang)
+
+
+def get_ocr_engine() -> OCREngine:
+    """Returns the process-wide OCR engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_ocr_engine()
+                logging.info(f"[OCR] Using {_engine.name} engine (lang={_engine.lang})")
+    return _engine
@@ -0,0 +1,158 @@
+import argparse
+import hashlib
+import logging
+import os
+import subprocess
+import sys
+import uuid
+
+import cv2
+import numpy as np
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+logging.basicConfig(level=logging.INFO)
+
+# 300 DPI keeps Secure QR modules several pixels wide and OCR text ~30px tall
+PDF_RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", 300))
+# Cheap pass used only to find the page holding the QR/photo
+PDF_PROBE_DPI = int(os.getenv("PDF_PROBE_DPI", 72))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 5))
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", 2048))
+PDF_RENDER_TIMEOUT_SEC = int(os.getenv("PDF_RENDER_TIMEOUT_SEC", 30))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join("uploads", "pdf_cache"))
+PDF_CACHE_MAX_FILES = int(os.getenv("PDF_CACHE_MAX_FILES", 500))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def is_pdf(path: str) -> bool:
+    return path.lower().endswith(".pdf")
+
+
+# --- Worker process side (python -m app.verification.pdf_ingest) ---
+
+def _limit_memory(limit_mb: int):
+    try:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except Exception as e:
+        logging.warning(f"[PDF] Could not cap worker memory: {e}")
+
+
+def _render(page, dpi: int) -> np.ndarray:
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def _page_score(image: np.ndarray) -> int:
+    from app.verification.qr_locator import find_qr_candidates
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    score = 2 * len(find_qr_candidates(gray, max_candidates=2))
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    if len(cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))):
+        score += 1
+    return score
+
+
+def _render_document_page(pdf_path: str, dpi: int, probe_dpi: int, max_pages: int) -> tuple[int, np.ndarray]:
+    """Finds the page most likely to hold the QR/photo and renders it at `dpi`."""
+    with fitz.open(pdf_path) as doc:
+        if doc.page_count == 0:
+            raise ValueError("PDF has no pages.")
+        best_page = 0
+        if doc.page_count > 1:
+            scores = [_page_score(_render(doc[i], probe_dpi)) for i in range(min(doc.page_count, max_pages))]
+            best_page = int(np.argmax(scores))
+        return best_page, _render(doc[best_page], dpi)
+
+
+# --- Caller side ---
+
+def _file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _prune_cache():
+    try:
+        files = [os.path.join(PDF_CACHE_DIR, name) for name in os.listdir(PDF_CACHE_DIR)
+                 if name.endswith(".png") and not name.endswith(".tmp.png")]
+    except OSError:
+        return
+    if len(files) <= PDF_CACHE_MAX_FILES:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - PDF_CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_pdf_page(pdf_path: str, dpi: int = PDF_RENDER_DPI) -> np.ndarray:
+    """
+    Returns the QR/photo page of a PDF as a BGR image. Rasterized pages are
+    cached on disk by content hash, so re-verifying the same PDF skips rendering.
+    Rendering runs in a separate, memory-capped worker process that writes the
+    page straight into the cache; a fresh interpreter is used instead of a fork
+    so the worker never inherits the server's model threads or memory.
+    """
+    if fitz is None:
+        raise ValueError("PDF support requires PyMuPDF (pip install pymupdf).")
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    cache_path = os.path.abspath(os.path.join(PDF_CACHE_DIR, f"{_file_sha256(pdf_path)}_{dpi}.png"))
+    if os.path.exists(cache_path):
+        image = cv2.imread(cache_path)
+        if image is not None:
+            os.utime(cache_path)
+            return image
+
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp.png"
+    cmd = [sys.executable, "-m", "app.verification.pdf_ingest",
+           os.path.abspath(pdf_path), tmp_path, "--dpi", str(dpi)]
+    try:
+        proc = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True, timeout=PDF_RENDER_TIMEOUT_SEC)
+    except subprocess.TimeoutExpired:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise ValueError("PDF rendering timed out.")
+
+    if proc.returncode != 0:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        logging.error(f"[PDF] Render worker failed: {proc.stderr.strip()[-500:]}")
+        raise ValueError("PDF could not be rendered (invalid file or worker memory limit exceeded).")
+
+    image = cv2.imread(tmp_path)
+    if image is None:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise ValueError("PDF render worker produced no image.")
+    os.replace(tmp_path, cache_path)
+    _prune_cache()
+    logging.info(f"[PDF] Rendered page {proc.stdout.strip()} of {os.path.basename(pdf_path)} at {dpi} DPI")
+    return image
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the QR/photo page of a PDF (worker entry point).")
+    parser.add_argument("pdf_path", type=str)
+    parser.add_argument("out_path", type=str)
+    parser.add_argument("--dpi", type=int, default=PDF_RENDER_DPI)
+    args = parser.parse_args()
+
+    _limit_memory(PDF_WORKER_MEMORY_MB)
+    page_index, page_image = _render_document_page(args.pdf_path, args.dpi, PDF_PROBE_DPI, PDF_MAX_PAGES)
+    if not cv2.imwrite(args.out_path, page_image):
+        sys.exit(1)
+    print(page_index + 1)
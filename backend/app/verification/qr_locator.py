@@ -0,0 +1,123 @@
+import logging
+
+import cv2
+import numpy as np
+from pyzbar.pyzbar import decode, ZBarSymbol
+
+logging.basicConfig(level=logging.INFO)
+
+# Candidate search runs on a copy no wider than this
+QR_DETECT_WIDTH = 1000
+# Relative padding around a candidate so zbar sees the quiet zone
+CROP_PADDING = 0.15
+# Full-image retries when no candidate decodes, cheapest first
+RESOLUTION_LADDER = (0.5, 1.0, 0.25, 1.5)
+MIN_CANDIDATE_SIDE = 40
+MAX_LADDER_WIDTH = 4000
+
+_qr_detector = cv2.QRCodeDetector()
+
+
+def _downscale(gray: np.ndarray, max_width: int) -> tuple[np.ndarray, float]:
+    h, w = gray.shape[:2]
+    if w <= max_width:
+        return gray, 1.0
+    scale = max_width / float(w)
+    return cv2.resize(gray, (max_width, int(h * scale)), interpolation=cv2.INTER_AREA), scale
+
+
+def _finder_pattern_boxes(small: np.ndarray) -> list:
+    try:
+        found, points = _qr_detector.detectMulti(small)
+    except cv2.error:
+        return []
+    if not found or points is None:
+        return []
+    boxes = []
+    for quad in points:
+        x, y, w, h = cv2.boundingRect(np.asarray(quad, dtype=np.float32))
+        boxes.append((x, y, w, h))
+    return boxes
+
+
+def _contour_boxes(small: np.ndarray) -> list:
+    """
+    QR modules produce dense high-gradient blobs in both directions.
+    Close the gradient map into solid squares and keep the square-ish ones.
+    """
+    grad = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    _, binary = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9)))
+    closed = cv2.morphologyEx(closed, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5)))
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if min(w, h) < MIN_CANDIDATE_SIDE:
+            continue
+        aspect = w / float(h)
+        fill = cv2.contourArea(contour) / float(w * h)
+        if 0.75 <= aspect <= 1.33 and fill > 0.6:
+            boxes.append((x, y, w, h))
+    # Bigger blobs first: the Aadhaar QR is the largest square element on the card
+    boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+    return boxes
+
+
+def find_qr_candidates(gray: np.ndarray, max_candidates: int = 4) -> list:
+    """
+    Returns candidate QR boxes as (x0, y0, x1, y1) in full-resolution coordinates,
+    found on a downscaled copy by finder-pattern detection then contour analysis.
+    """
+    small, scale = _downscale(gray, QR_DETECT_WIDTH)
+    boxes = _finder_pattern_boxes(small) + _contour_boxes(small)
+
+    h, w = gray.shape[:2]
+    candidates = []
+    for x, y, bw, bh in boxes[:max_candidates]:
+        pad_x, pad_y = bw * CROP_PADDING, bh * CROP_PADDING
+        x0 = max(0, int((x - pad_x) / scale))
+        y0 = max(0, int((y - pad_y) / scale))
+        x1 = min(w, int((x + bw + pad_x) / scale))
+        y1 = min(h, int((y + bh + pad_y) / scale))
+        candidates.append((x0, y0, x1, y1))
+    return candidates
+
+
+def _decode_qr(image: np.ndarray) -> bytes | None:
+    barcodes = decode(image, symbols=[ZBarSymbol.QRCODE])
+    return barcodes[0].data if barcodes else None
+
+
+def locate_and_decode(gray: np.ndarray) -> bytes | None:
+    """
+    Decodes the first QR code in a grayscale document.
+    Tries the located crops first, then walks the resolution ladder on the full image.
+    """
+    for x0, y0, x1, y1 in find_qr_candidates(gray):
+        crop = gray[y0:y1, x0:x1]
+        data = _decode_qr(crop)
+        if data is None and min(crop.shape[:2]) < 400:
+            # Small printed QRs decode more reliably after upscaling
+            data = _decode_qr(cv2.resize(crop, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC))
+        if data is not None:
+            return data
+
+    h, w = gray.shape[:2]
+    for scale in RESOLUTION_LADDER:
+        if scale > 1.0 and w * scale > MAX_LADDER_WIDTH:
+            continue
+        if scale == 1.0:
+            image = gray
+        else:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            image = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=interpolation)
+        data = _decode_qr(image)
+        if data is not None:
+            logging.info(f"[QR] Decoded on full image at scale {scale}")
+            return data
+
+    # Last resort: binarize to recover low-contrast or glare-affected scans
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return _decode_qr(binary)
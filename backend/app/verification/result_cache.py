@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+VERIFY_CACHE_DIR = os.getenv("VERIFY_CACHE_DIR", os.path.join("uploads", "verify_cache"))
+VERIFY_CACHE_MAX_ENTRIES = int(os.getenv("VERIFY_CACHE_MAX_ENTRIES", 1000))
+VERIFY_CACHE_MAX_BYTES = int(os.getenv("VERIFY_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+RESULT_FILE = "result.json"
+FACE_FILE = "face.npy"
+EMBEDDING_FILE = "embedding.npy"
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for name in os.listdir(path):
+        try:
+            total += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return total
+
+
+class VerificationCache:
+    """
+    Content-addressed on-disk cache of document verification output.
+    One directory per key holds the verify_document result, the extracted face
+    crop and its embedding. Entries are evicted least-recently-used once
+    either the entry or the byte budget is exceeded.
+    """
+    def __init__(self, root: str = VERIFY_CACHE_DIR, max_entries: int = VERIFY_CACHE_MAX_ENTRIES,
+                 max_bytes: int = VERIFY_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(content_sha256: str, doc_type: str) -> str:
+        return hashlib.sha256(f"{doc_type}:{content_sha256}".encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            if not os.path.exists(os.path.join(path, RESULT_FILE)):
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            entries.append((os.path.getmtime(path), name, _dir_size(path)))
+        # Oldest access first so the OrderedDict tail is the most recent
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_bytes += size
+        self._evict()
+        logging.info(f"[VERIFY CACHE] Loaded {len(self._index)} entries ({self._total_bytes} bytes) from {self.root}")
+
+    def get(self, key: str) -> dict | None:
+        """Returns {"result", "face", "embedding"} for a cached key, or None."""
+        path = os.path.join(self.root, key)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        try:
+            with open(os.path.join(path, RESULT_FILE), "r", encoding="utf-8") as f:
+                result = json.load(f)
+            face_path = os.path.join(path, FACE_FILE)
+            embedding_path = os.path.join(path, EMBEDDING_FILE)
+            face = np.load(face_path) if os.path.exists(face_path) else None
+            embedding = np.load(embedding_path) if os.path.exists(embedding_path) else None
+            os.utime(path)
+        except Exception as e:
+            logging.warning(f"[VERIFY CACHE] Dropping unreadable entry {key}: {e}")
+            self._remove(key)
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return {"result": result, "face": face, "embedding": embedding}
+
+    def put(self, key: str, result: dict, face: np.ndarray | None = None, embedding: np.ndarray | None = None):
+        """Stores an entry atomically (written to a temp dir, then renamed into place)."""
+        tmp_path = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        final_path = os.path.join(self.root, key)
+        try:
+            os.makedirs(tmp_path)
+            with open(os.path.join(tmp_path, RESULT_FILE), "w", encoding="utf-8") as f:
+                json.dump(result, f, default=str)
+            if face is not None:
+                np.save(os.path.join(tmp_path, FACE_FILE), face)
+            if embedding is not None:
+                np.save(os.path.join(tmp_path, EMBEDDING_FILE), np.asarray(embedding, dtype=np.float32))
+            size = _dir_size(tmp_path)
+
+            with self._lock:
+                if key in self._index:
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+                    self._index.move_to_end(key)
+                    return
+                os.replace(tmp_path, final_path)
+                self._index[key] = size
+                self._total_bytes += size
+                self._evict()
+        except Exception as e:
+            logging.warning(f"[VERIFY CACHE] Failed to store {key}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _evict(self):
+        # Caller holds the lock (or is the constructor)
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _remove(self, key: str):
+        with self._lock:
+            size = self._index.pop(key, None)
+            if size is not None:
+                self._total_bytes -= size
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
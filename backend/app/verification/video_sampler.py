@@ -0,0 +1,129 @@
+import logging
+import os
+
+import cv2
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+VIDEO_SAMPLE_FRAMES = int(os.getenv("VIDEO_SAMPLE_FRAMES", 24))
+# Upper bound on frames demuxed per upload (~5 minutes at 30 fps)
+VIDEO_MAX_DECODE_FRAMES = int(os.getenv("VIDEO_MAX_DECODE_FRAMES", 9000))
+# Candidates considered per output slot when ranking by sharpness
+QUALITY_CANDIDATES = 3
+# Contiguous clip decoded at native fps for blink liveness (a blink lasts ~100-400 ms)
+LIVENESS_WINDOW_SEC = float(os.getenv("LIVENESS_WINDOW_SEC", 6.0))
+LIVENESS_WINDOW_MAX_FRAMES = int(os.getenv("LIVENESS_WINDOW_MAX_FRAMES", 180))
+
+
+def _sharpness(frame: np.ndarray) -> float:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def _resize(frame: np.ndarray, max_width: int | None) -> np.ndarray:
+    if max_width and frame.shape[1] > max_width:
+        scale = max_width / float(frame.shape[1])
+        return cv2.resize(frame, (max_width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def _pick_evenly(items: list, k: int) -> list:
+    if len(items) <= k:
+        return items
+    idx = np.linspace(0, len(items) - 1, k).round().astype(int)
+    return [items[i] for i in idx]
+
+
+def _pick_by_quality(candidates: list, k: int) -> list:
+    """Splits (index, frame) candidates into k ordered bins and keeps the sharpest of each."""
+    if len(candidates) <= k:
+        return [frame for _, frame in candidates]
+    picked = []
+    for chunk in np.array_split(np.arange(len(candidates)), k):
+        if len(chunk):
+            best = max(chunk, key=lambda i: _sharpness(candidates[i][1]))
+            picked.append(candidates[best][1])
+    return picked
+
+
+def _window_length(cap, seconds: float, max_frames: int) -> int:
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or fps > 240:
+        fps = 30.0
+    return max(1, min(int(round(seconds * fps)), max_frames))
+
+
+def sample_frames(video_path: str, k: int = VIDEO_SAMPLE_FRAMES, strategy: str = "uniform",
+                  max_width: int | None = None, window_sec: float | None = None,
+                  window_max_width: int | None = None,
+                  window_max_frames: int = LIVENESS_WINDOW_MAX_FRAMES) -> tuple[list, list]:
+    """
+    Decodes the video once, front to back, and returns `(frames, window)`.
+
+    `frames` are up to `k` frames spread over the video's length. Frames are
+    only converted (retrieve) when selected; the rest are just grabbed.
+    `strategy="quality"` over-samples and keeps the sharpest frame of each slot.
+
+    `window` (empty unless `window_sec` is given) is one contiguous run of
+    frames at the native frame rate, centred in the video when its length is
+    known (from the start otherwise). Nothing is skipped inside it, so
+    frame-to-frame events such as blinks stay visible.
+
+    When the container does not report a frame count (common for webm), a
+    decimating buffer keeps every `stride`-th frame and doubles the stride
+    whenever it fills, so memory stays bounded without knowing the length.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logging.error(f"Could not open video: {video_path}")
+        return [], []
+
+    wanted = k * QUALITY_CANDIDATES if strategy == "quality" else k
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    window_len = _window_length(cap, window_sec, window_max_frames) if window_sec else 0
+    candidates = []
+    window = []
+
+    def take_window(idx: int, frame):
+        if window_start <= idx < window_start + window_len:
+            window.append(_resize(frame, window_max_width))
+
+    try:
+        if 0 < frame_count <= VIDEO_MAX_DECODE_FRAMES * 4:
+            limit = min(frame_count, VIDEO_MAX_DECODE_FRAMES)
+            targets = set(np.linspace(0, limit - 1, min(wanted, limit)).round().astype(int).tolist())
+            window_start = max(0, (limit - window_len) // 2)
+            last_needed = max(max(targets), window_start + window_len - 1)
+            for idx in range(last_needed + 1):
+                if not cap.grab():
+                    break
+                in_window = window_start <= idx < window_start + window_len
+                if idx in targets or in_window:
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        continue
+                    if idx in targets:
+                        candidates.append((idx, _resize(frame, max_width)))
+                    take_window(idx, frame)
+        else:
+            window_start = 0
+            stride = 1
+            idx = 0
+            while idx < VIDEO_MAX_DECODE_FRAMES and cap.grab():
+                if idx % stride == 0 or idx < window_len:
+                    ok, frame = cap.retrieve()
+                    if ok:
+                        take_window(idx, frame)
+                        if idx % stride == 0:
+                            candidates.append((idx, _resize(frame, max_width)))
+                    if len(candidates) >= 2 * wanted:
+                        candidates = candidates[::2]
+                        stride *= 2
+                idx += 1
+    finally:
+        cap.release()
+
+    if strategy == "quality":
+        return _pick_by_quality(candidates, k), window
+    return [frame for _, frame in _pick_evenly(candidates, k)], window
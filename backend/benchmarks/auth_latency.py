@@ -0,0 +1,72 @@
+"""
+Authenticated request latency against a running backend.
+
+Logs in once, then hammers an authenticated endpoint and reports latency
+percentiles together with the server's principal cache hit rate.
+
+Run from the backend directory:
+    python -m benchmarks.auth_latency --email a@b.com --password secret --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    res = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    res.raise_for_status()
+    return res.json()["access_token"]
+
+
+async def run(base_url: str, token: str | None, email: str, password: str, path: str,
+              total: int, concurrency: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        token = token or await login(client, email, password)
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies = []
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                res = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                res.raise_for_status()
+
+        # Warm-up request so the first (cache-filling) lookup is not measured
+        (await client.get(path, headers=headers)).raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        metrics = (await client.get("/api/v1/metrics")).json().get("principal_cache", {})
+
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(f"{len(latencies)} requests to {path} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s, {concurrency} concurrent)")
+    print(f"latency ms: mean {statistics.mean(latencies):.2f} | p50 {pct(0.5):.2f} | p95 {pct(0.95):.2f} | p99 {pct(0.99):.2f}")
+    print(f"principal cache: {metrics}")
+    return latencies
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--base-url", default="http://localhost:8000")
+    p.add_argument("--email", default=None)
+    p.add_argument("--password", default=None)
+    p.add_argument("--token", default=None, help="Use an existing bearer token instead of logging in")
+    p.add_argument("--path", default="/api/v1/users/me")
+    p.add_argument("--requests", default=1000, type=int)
+    p.add_argument("--concurrency", default=10, type=int)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.token and not (args.email and args.password):
+        raise SystemExit("Pass --token, or --email and --password")
+    asyncio.run(run(args.base_url, args.token, args.email, args.password, args.path,
+                    args.requests, args.concurrency))
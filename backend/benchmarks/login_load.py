@@ -0,0 +1,87 @@
+"""
+Login burst load test.
+
+Fires concurrent logins while a probe keeps hitting a cheap endpoint, so the
+report shows both login throughput and how much the burst delays everything
+else on the event loop (the same loop that serves WebSocket frames).
+
+Run from the backend directory against a running server:
+    python -m benchmarks.login_load --email a@b.com --password secret --logins 200 --concurrency 10 20 40
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.02)
+
+
+async def burst(base_url: str, email: str, password: str, logins: int, concurrency: int, probe_path: str):
+    limits = httpx.Limits(max_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        remaining = iter(range(logins))
+        login_ms, failures = [], 0
+
+        async def worker():
+            nonlocal failures
+            for _ in remaining:
+                start = time.perf_counter()
+                res = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+                login_ms.append((time.perf_counter() - start) * 1000)
+                if res.status_code != 200:
+                    failures += 1
+
+        baseline = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, probe_path, stop, baseline))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await probe_task
+
+        during = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, probe_path, stop, during))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+        hasher = (await client.get("/api/v1/metrics")).json().get("password_hasher", {})
+
+    print(f"concurrency {concurrency:>3}: {len(login_ms) / elapsed:7.1f} logins/s | "
+          f"login p50 {percentile(login_ms, 0.5):7.1f} ms p95 {percentile(login_ms, 0.95):7.1f} ms | "
+          f"probe p95 idle {percentile(baseline, 0.95):6.1f} ms -> burst {percentile(during, 0.95):6.1f} ms | "
+          f"failures {failures}")
+    print(f"    password_hasher: {hasher}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--base-url", default="http://localhost:8000")
+    p.add_argument("--email", required=True)
+    p.add_argument("--password", required=True)
+    p.add_argument("--logins", default=200, type=int)
+    p.add_argument("--concurrency", default=[10], type=int, nargs="+")
+    p.add_argument("--probe-path", default="/api/v1/metrics")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for level in args.concurrency:
+        asyncio.run(burst(args.base_url, args.email, args.password, args.logins, level, args.probe_path))
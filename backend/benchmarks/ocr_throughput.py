@@ -0,0 +1,66 @@
+"""
+Documents-per-second benchmark for the OCR engines.
+
+Run from the backend directory:
+    python -m benchmarks.ocr_throughput doc1.jpg doc2.png --rounds 5 --threads 4
+"""
+import argparse
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import pytesseract
+
+from app.verification.ocr_engine import create_ocr_engine
+
+
+def load_documents(paths):
+    docs = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            raise FileNotFoundError(f"Image not found: {path}")
+        docs.append(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    return docs
+
+
+def run(engine_kind: str, docs, rounds: int, threads: int) -> float:
+    engine = create_ocr_engine(engine_kind)
+    work = docs * rounds
+
+    # Warm-up so handle creation is not counted against the persistent engine
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(engine.image_to_string, docs[:threads] or docs))
+
+        start = time.perf_counter()
+        list(pool.map(engine.image_to_string, work))
+        elapsed = time.perf_counter() - start
+
+    engine.close()
+    docs_per_sec = len(work) / elapsed if elapsed > 0 else 0.0
+    print(f"[{engine.name:>11}] {len(work)} docs in {elapsed:.2f}s -> {docs_per_sec:.2f} docs/s ({threads} threads)")
+    return docs_per_sec
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("images", nargs="+", help="Document images to OCR")
+    p.add_argument("--rounds", default=5, type=int)
+    p.add_argument("--threads", default=1, type=int)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    tesseract_path = shutil.which('tesseract')
+    if tesseract_path:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+    documents = load_documents(args.images)
+    before = run("pytesseract", documents, args.rounds, args.threads)
+    try:
+        after = run("tesserocr", documents, args.rounds, args.threads)
+        print(f"Speed-up: {after / before:.2f}x" if before else "Speed-up: n/a")
+    except Exception as e:
+        print(f"tesserocr engine unavailable: {e}")
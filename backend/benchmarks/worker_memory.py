@@ -0,0 +1,98 @@
+"""
+Per-worker memory of a multi-worker deployment, preloaded vs naive.
+
+Starts gunicorn twice, once with GUNICORN_PRELOAD=true (models loaded in the
+master, shared copy-on-write) and once with GUNICORN_PRELOAD=false (every
+worker loads its own copy). Waits for /readyz, then reads
+/proc/<pid>/smaps_rollup of each worker. Pss is the number to compare: it
+splits shared pages between the processes that map them.
+
+The launches set GUNICORN_ALLOW_SPLIT_STATE=true: they serve no real
+sessions, so gunicorn.conf.py's check that multi-worker runs use a shared
+BROADCAST_BACKEND (redis) is skipped and no Redis is needed to measure.
+
+Run from the backend directory (Linux only):
+    python -m benchmarks.worker_memory --workers 4
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def smaps_rollup(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1]) // 1024  # MB
+    return values
+
+
+def child_pids(pid: int) -> list:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def wait_ready(url: str, workers: int, timeout: float, master: subprocess.Popen):
+    """Keeps polling until enough consecutive /readyz calls succeed to have hit every worker."""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        if master.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {master.returncode} before becoming ready")
+        try:
+            streak = streak + 1 if httpx.get(url, timeout=5).status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        if streak >= workers * 4:
+            return True
+        time.sleep(0.25 if streak else 2)
+    return False
+
+
+def measure(preload: bool, workers: int, port: int, timeout: float) -> list:
+    env = {**os.environ, "GUNICORN_PRELOAD": str(preload).lower(), "WEB_CONCURRENCY": str(workers),
+           "GUNICORN_BIND": f"127.0.0.1:{port}", "GUNICORN_ALLOW_SPLIT_STATE": "true"}
+    master = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"], env=env)
+    try:
+        if not wait_ready(f"http://127.0.0.1:{port}/readyz", workers, timeout, master):
+            raise RuntimeError("Workers did not become ready in time")
+        time.sleep(2)
+        return [smaps_rollup(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+
+def report(label: str, samples: list):
+    print(f"\n{label} ({len(samples)} workers), MB per worker:")
+    print("  " + " ".join(f"{f:>14}" for f in FIELDS))
+    for s in samples:
+        print("  " + " ".join(f"{s.get(f, 0):>14}" for f in FIELDS))
+    total_pss = sum(s.get("Pss", 0) for s in samples)
+    print(f"  total Pss: {total_pss} MB")
+    return total_pss
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--workers", default=4, type=int)
+    p.add_argument("--port", default=8011, type=int)
+    p.add_argument("--timeout", default=600, type=float, help="Seconds to wait for readiness")
+    args = p.parse_args()
+
+    naive = report("naive (no preload)", measure(False, args.workers, args.port, args.timeout))
+    shared = report("preloaded master", measure(True, args.workers, args.port, args.timeout))
+    if naive:
+        print(f"\nPss saved by preloading: {naive - shared} MB ({100 * (naive - shared) / naive:.1f}%)")
@@ -1,5 +1,8 @@
 import os
+import ssl
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
@@ -8,17 +11,29 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# --- Pool sizing (applies to the async engine used by request handlers) ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+# Background threads (verify workers, schema setup) share a small sync pool
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", 5))
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CA_PATH = os.path.join(BASE_DIR, "ca.pem")
 
+USE_SSL = bool(DATABASE_URL and "aivencloud" in DATABASE_URL)
+
 connect_args = {}
-if DATABASE_URL and "aivencloud" in DATABASE_URL:
+async_connect_args = {}
+if USE_SSL:
     if os.path.exists(CA_PATH):
         connect_args = {
             "ssl": {
                 "ca": CA_PATH
             }
         }
+        async_connect_args = {"ssl": ssl.create_default_context(cafile=CA_PATH)}
     else:
         print(f"Warning: SSL CA file not found at {CA_PATH}. Connecting WITHOUT SSL verification (dev only).")
         connect_args = {
@@ -26,18 +41,47 @@ if DATABASE_URL and "aivencloud" in DATABASE_URL:
                 "cert_reqs": False
             }
         }
+        insecure_ctx = ssl.create_default_context()
+        insecure_ctx.check_hostname = False
+        insecure_ctx.verify_mode = ssl.CERT_NONE
+        async_connect_args = {"ssl": insecure_ctx}
+
+
+def _async_database_url(url: str) -> str:
+    """Swaps the sync MySQL driver (mysqlconnector/pymysql) for aiomysql."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "mysql":
+        parsed = parsed.set(drivername="mysql+aiomysql")
+    return parsed.render_as_string(hide_password=False)
+
 
 engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
+    pool_size=DB_SYNC_POOL_SIZE,
     pool_pre_ping=True,
-    pool_recycle=3600
+    pool_recycle=DB_POOL_RECYCLE
+)
+
+async_engine = create_async_engine(
+    _async_database_url(DATABASE_URL),
+    connect_args=async_connect_args,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_recycle=DB_POOL_RECYCLE
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
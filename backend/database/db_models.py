@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, TIMESTAMP, Date, ForeignKey, Boolean, Float, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, TIMESTAMP, Date, ForeignKey, Boolean, Float, Text, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -80,6 +80,14 @@ class Meeting(Base):
 
 class VerificationResult(Base):
     __tablename__ = "verification_results"
+    # One row per (meeting, client): score writers upsert against this key
+    __table_args__ = (
+        UniqueConstraint("meeting_id", "client_id", name="uq_verification_results_meeting_client"),
+        # Keyset pagination of the admin feed seeks on (timestamp, id)
+        Index("ix_verification_results_timestamp_id", "timestamp", "id"),
+        Index("ix_verification_results_is_pass_timestamp", "is_pass", "timestamp", "id"),
+        Index("ix_verification_results_client_timestamp", "client_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
@@ -95,7 +103,44 @@ class VerificationResult(Base):
         
     is_pass = Column(Boolean, default=False)
     failure_reason = Column(Text, nullable=True)
+    # Set by the session's last write; live in-progress rows stay out of the rollups
+    is_final = Column(Boolean, nullable=False, default=False, server_default="0")
     timestamp = Column(TIMESTAMP, server_default=func.now())
 
     meeting = relationship("Meeting", back_populates="verification_logs")
-    client = relationship("User", back_populates="verification_results")
\ No newline at end of file
+    client = relationship("User", back_populates="verification_results")
+
+class VerificationRollup(Base):
+    """Hourly/daily aggregate of final verification results (see app/analytics/rollups.py)."""
+    __tablename__ = "verification_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", name="uq_verification_rollups_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)
+    bucket_start = Column(TIMESTAMP, nullable=False)
+
+    total = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+    # JSON: {metric: {"counts": [...], "sum": float}} and {reason: count}
+    metrics = Column(Text, nullable=True)
+    failure_reasons = Column(Text, nullable=True)
+
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+class VerificationRollupEntry(Base):
+    """What one final verification_results row currently contributes to the rollups, so changes apply as deltas."""
+    __tablename__ = "verification_rollup_entries"
+
+    meeting_id = Column(Integer, primary_key=True, autoincrement=False)
+    client_id = Column(Integer, primary_key=True, autoincrement=False)
+    bucket_start = Column(TIMESTAMP, nullable=False)
+    is_pass = Column(Boolean, nullable=False)
+    liveness_score = Column(Float, nullable=True)
+    deepfake_score = Column(Float, nullable=True)
+    face_match_score = Column(Float, nullable=True)
+    failure_reason = Column(Text, nullable=True)
+    # verification_results.timestamp of the applied version; its max is the compactor's watermark
+    source_timestamp = Column(TIMESTAMP, nullable=False, index=True)
+
@@ -0,0 +1,77 @@
+import importlib
+import logging
+import os
+import pkgutil
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+logging.basicConfig(level=logging.INFO)
+
+MIGRATIONS_PACKAGE = "database.migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+# Workers/replicas starting together wait this long for whoever is migrating
+MIGRATION_LOCK_TIMEOUT_SEC = int(os.getenv("MIGRATION_LOCK_TIMEOUT_SEC", 300))
+MIGRATION_LOCK_NAME = "vkyc_schema_migrations"
+
+
+def _pending(applied: set) -> list:
+    names = sorted(m.name for m in pkgutil.iter_modules([MIGRATIONS_DIR]) if m.name[:3].isdigit())
+    return [name for name in names if name not in applied]
+
+
+@contextmanager
+def schema_lock(engine, timeout: int = MIGRATION_LOCK_TIMEOUT_SEC):
+    """
+    Holds a MySQL named lock (GET_LOCK) for the duration of the block, so only
+    one process at a time creates tables or applies migrations, e.g. when
+    gunicorn workers import the app concurrently without preload.
+    """
+    with engine.connect() as conn:
+        acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                                {"name": MIGRATION_LOCK_NAME, "timeout": timeout}).scalar()
+        if acquired != 1:
+            raise RuntimeError(f"Timed out after {timeout}s waiting for the schema migration lock.")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+
+
+def setup_schema(engine, metadata):
+    """create_all() plus pending migrations, under the schema lock."""
+    with schema_lock(engine):
+        metadata.create_all(bind=engine)
+        _apply_migrations(engine)
+
+
+def run_migrations(engine):
+    with schema_lock(engine):
+        _apply_migrations(engine)
+
+
+def _apply_migrations(engine):
+    """
+    Applies database/migrations/NNN_*.py in order. Each module exposes
+    `upgrade(conn)` and must be idempotent, because create_all() may already
+    have built the latest schema on a fresh database.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version VARCHAR(255) PRIMARY KEY, "
+            "applied_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    for name in _pending(applied):
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{name}")
+        logging.info(f"[MIGRATE] Applying {name}")
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": name})
+
+
+if __name__ == "__main__":
+    from database.database import engine
+    run_migrations(engine)
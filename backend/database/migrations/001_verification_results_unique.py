@@ -0,0 +1,27 @@
+"""Unique (meeting_id, client_id) on verification_results, plus a client_id index."""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    indexes = {ix["name"] for ix in inspect(conn).get_indexes("verification_results")}
+    indexes |= {uq["name"] for uq in inspect(conn).get_unique_constraints("verification_results")}
+
+    if "uq_verification_results_meeting_client" not in indexes:
+        # Keep only the newest row per (meeting, client) before enforcing uniqueness
+        conn.execute(text(
+            "DELETE older FROM verification_results older "
+            "JOIN verification_results newer "
+            "ON older.meeting_id = newer.meeting_id "
+            "AND older.client_id = newer.client_id "
+            "AND older.id < newer.id"
+        ))
+        conn.execute(text(
+            "ALTER TABLE verification_results "
+            "ADD UNIQUE INDEX uq_verification_results_meeting_client (meeting_id, client_id)"
+        ))
+
+    if "ix_verification_results_client_id" not in indexes:
+        conn.execute(text(
+            "ALTER TABLE verification_results "
+            "ADD INDEX ix_verification_results_client_id (client_id)"
+        ))
@@ -0,0 +1,20 @@
+"""Composite (..., timestamp, id) indexes backing keyset pagination of the admin feed."""
+from sqlalchemy import inspect, text
+
+FEED_INDEXES = {
+    "ix_verification_results_timestamp_id": "(timestamp, id)",
+    "ix_verification_results_is_pass_timestamp": "(is_pass, timestamp, id)",
+    "ix_verification_results_client_timestamp": "(client_id, timestamp, id)",
+}
+
+
+def upgrade(conn):
+    indexes = {ix["name"] for ix in inspect(conn).get_indexes("verification_results")}
+
+    for name, columns in FEED_INDEXES.items():
+        if name not in indexes:
+            conn.execute(text(f"ALTER TABLE verification_results ADD INDEX {name} {columns}"))
+
+    # (client_id, timestamp, id) now covers the foreign key and per-client lookups
+    if "ix_verification_results_client_id" in indexes:
+        conn.execute(text("ALTER TABLE verification_results DROP INDEX ix_verification_results_client_id"))
@@ -0,0 +1,13 @@
+"""verification_results.is_final, so rollups only count finished sessions."""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("verification_results")}
+
+    if "is_final" not in columns:
+        conn.execute(text(
+            "ALTER TABLE verification_results ADD COLUMN is_final BOOLEAN NOT NULL DEFAULT 0"
+        ))
+        # Existing rows with a verdict come from sessions that have already ended
+        conn.execute(text("UPDATE verification_results SET is_final = 1 WHERE is_pass IS NOT NULL"))
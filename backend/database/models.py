@@ -91,4 +91,25 @@ class VerificationResultResponse(VerificationResultCreate):
     timestamp: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class VerificationClientSummary(BaseModel):
+    id: int
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+class VerificationFeedItem(BaseModel):
+    id: int
+    meeting_id: int
+    client_id: int
+    liveness_score: Optional[float] = None
+    deepfake_score: Optional[float] = None
+    face_match_score: Optional[float] = None
+    is_pass: Optional[bool] = None
+    failure_reason: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    client: Optional[VerificationClientSummary] = None
+
+class VerificationFeedPage(BaseModel):
+    items: list[VerificationFeedItem]
+    next_cursor: Optional[str] = None
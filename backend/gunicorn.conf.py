@@ -0,0 +1,87 @@
+"""
+Multi-worker launch with models loaded once in the master and shared
+copy-on-write by every forked worker:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+PRELOAD_MODELS picks which models the master loads before forking. The
+default is the torch deepfake ViT and the dlib landmark predictor, which are
+safe to use after fork on CPU. Models registered as not fork-safe are
+skipped in the master and each worker loads them itself (in the background at
+startup, gated by /readyz): Facenet512 and MTCNN, whose TensorFlow runtime
+threads do not survive fork(), and the deepfake model whenever it would run
+on CUDA/MPS, since GPU contexts cannot be inherited across fork().
+
+More than one worker needs BROADCAST_BACKEND=redis, or hosts and clients on
+different workers never see each other's live scores. Async /api/v1/verify
+job status then lives in the same Redis (VERIFY_JOB_STORE follows
+BROADCAST_BACKEND), so any worker can answer a poll. Startup fails otherwise,
+unless GUNICORN_ALLOW_SPLIT_STATE=true for measurement-only launches.
+"""
+import gc
+import multiprocessing
+import os
+
+# Let torch probe for CUDA through NVML at import, so the master never
+# initialises the CUDA driver before forking
+os.environ.setdefault("PYTORCH_NVML_BASED_CUDA_CHECK", "1")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count() // 2)))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Import main.py (and everything it loads) once in the master
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+PRELOAD_MODELS = [m for m in os.getenv("PRELOAD_MODELS", "deepfake,landmarks").split(",") if m]
+# Measurement-only launches (benchmarks/worker_memory.py) serve no real sessions,
+# so they may skip the shared-state check below
+ALLOW_SPLIT_STATE = os.getenv("GUNICORN_ALLOW_SPLIT_STATE", "false").lower() == "true"
+
+
+def on_starting(server):
+    """Refuses multi-worker launches that would split in-process state between workers."""
+    if server.cfg.workers <= 1:
+        return
+    if ALLOW_SPLIT_STATE:
+        server.log.warning("GUNICORN_ALLOW_SPLIT_STATE=true: skipping the shared-state check (not for production)")
+        return
+    from app.realtime.bus import BROADCAST_BACKEND
+    from app.jobs.verify_jobs import VERIFY_JOB_STORE
+    if BROADCAST_BACKEND != "redis":
+        raise RuntimeError(
+            f"{server.cfg.workers} workers with BROADCAST_BACKEND={BROADCAST_BACKEND}: live scores would only reach "
+            "sockets on the same worker. Set BROADCAST_BACKEND=redis or WEB_CONCURRENCY=1."
+        )
+    if VERIFY_JOB_STORE != "redis":
+        raise RuntimeError(
+            f"{server.cfg.workers} workers with VERIFY_JOB_STORE={VERIFY_JOB_STORE}: async /api/v1/verify status "
+            "polls would only find jobs accepted by the same worker. Set VERIFY_JOB_STORE=redis."
+        )
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before the first fork."""
+    if not preload_app:
+        return
+    from app.verification.model_registry import models
+    preload = models.fork_safe(PRELOAD_MODELS)
+    skipped = sorted(set(PRELOAD_MODELS) - set(preload))
+    if skipped:
+        server.log.info(f"Not preloading {skipped} in the master (not fork-safe); workers load them")
+    models.load_all(preload)
+    server.log.info(f"Preloaded models: {models.status()}")
+
+    # Move everything allocated so far into the permanent generation: the
+    # collector then never touches (and so never dirties) those pages in the
+    # workers, which keeps the weights' memory shared.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # The master ran migrations on the sync engine; drop its pooled connections
+    # without closing them so the child never reuses the parent's sockets
+    from database import database
+    database.engine.dispose(close=False)
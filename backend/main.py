@@ -1,16 +1,14 @@
 import os
 import logging
 import shutil
-import httpx
 import cv2 
 import uuid
 import asyncio
 import base64
 import time
-from sqlalchemy.exc import IntegrityError
 import numpy as np
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Optional
+from typing import Optional
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, status, Depends, WebSocket, WebSocketDisconnect, Query, Body, Form
 from fastapi.security import OAuth2PasswordRequestForm
@@ -18,34 +16,50 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from werkzeug.utils import secure_filename
-import torch
 import pytesseract 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-# --- AGORA TOKEN BUILDER ---
-from agora_token_builder import RtcTokenBuilder
-
 # --- DATABASE IMPORTS ---
 from database import database
+from database.migrate import setup_schema
 from database.db_models import User as DBUser, Meeting, UserRole, Document, VerificationResult
 from database.models import (
-    UserCreate, UserLogin, Token, UserResponse, MeetingCreate, MeetingResponse 
+    UserCreate, UserLogin, Token, UserResponse, MeetingCreate, MeetingResponse, VerificationFeedPage
 )
 from app.auth.auth import (
-    get_password_hash, verify_password, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_access_token, get_current_user, principal_claims, ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from app.auth.agora_utils import generate_agora_rtc_token, APP_ID
+from app.auth.password_hasher import password_hasher
+from app.auth.principal_cache import principal_cache
+from app.auth.agora_utils import generate_agora_rtc_token, agora_tokens
 
 # --- ML MODULES ---
 from app.verification import liveness, deepfake
 from app.verification.liveness import check_liveness_challenge, liveness_check
 from app.verification.deepfake import detect_deepfake
+from app.verification.model_registry import models
 from app.verification.document_ocr import DocumentVerifier
 from app.verification import face_match
+from app.verification.result_cache import VerificationCache
+from app.verification.video_sampler import sample_frames, VIDEO_SAMPLE_FRAMES, LIVENESS_WINDOW_SEC
+from app.verification.pdf_ingest import is_pdf, load_pdf_page
+from app.jobs.verify_jobs import VerifyJobManager
+from app.persistence.score_writer import ScoreWriteBehind
+from app.persistence.upserts import upsert_verification_results
+from app.geo.locator import GeoLocator
+from app.realtime.connection_manager import ConnectionManager
+from app.realtime.throttle import BroadcastThrottle
+from app.realtime.flow_control import FrameRateController
+from app.analytics.rollups import RollupCompactor, fetch_rollup_stats
+from app.persistence.verification_feed import fetch_verification_page, FEED_MAX_LIMIT
+from app.storage.uploads import (
+    save_upload, UploadSizeLimitMiddleware, MAX_DOCUMENT_UPLOAD_BYTES, MAX_VIDEO_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES
+)
 
 # --- SETUP ---
-database.Base.metadata.create_all(bind=database.engine)
+setup_schema(database.engine, database.Base.metadata)
 logging.basicConfig(level=logging.INFO)
 
 UPLOAD_FOLDER = 'uploads'
@@ -65,6 +79,15 @@ FACE_MATCH_THRESHOLD = 0.40
 
 DEEPFAKE_SENSITIVITY = 0.20
 
+# --- OFFLINE VIDEO (/api/v1/verify) ---
+VIDEO_FACE_MATCH_FRAMES = 5
+# Below this many contiguous frames a missing blink proves nothing, so liveness stays advisory
+VIDEO_LIVENESS_MIN_FRAMES = int(os.getenv("VIDEO_LIVENESS_MIN_FRAMES", 45))
+
+# --- LIVE SESSION LOGGING ---
+# Per-broadcast score lines are DEBUG; INFO gets one sampled line per session this often
+WS_LOG_SAMPLE_SEC = float(os.getenv("WS_LOG_SAMPLE_SEC", 5.0))
+ws_log = logging.getLogger("vkyc.ws")
 
 frontend_url = os.getenv("FRONTEND_URL")
 backend_url = os.getenv("BACKEND_PUBLIC_URL")
@@ -74,9 +97,16 @@ app = FastAPI()
 if not os.path.exists(UPLOAD_FOLDER): os.makedirs(UPLOAD_FOLDER)
 if not os.path.exists(EXTRACTED_FACES_FOLDER): os.makedirs(EXTRACTED_FACES_FOLDER)
 
+verification_cache = VerificationCache()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Added before CORS so it runs inside it and 413s still carry CORS headers
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={"/api/v1/verify": MAX_DOCUMENT_UPLOAD_BYTES + MAX_VIDEO_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES},
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
@@ -90,66 +120,73 @@ tesseract_path = shutil.which('tesseract')
 if tesseract_path: pytesseract.pytesseract.tesseract_cmd = tesseract_path
 else: logging.warning("Tesseract not found. OCR will fail.")
 
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-if torch.backends.mps.is_available(): DEVICE = torch.device("mps")
-logging.info(f"Using device: {DEVICE}")
+logging.info(f"Using device: {deepfake.DEVICE}")
 
 
 # ================= WEBSOCKET CONNECTION MANAGER =================
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, meeting_code: str):
-        await websocket.accept()
-        if meeting_code not in self.active_connections:
-            self.active_connections[meeting_code] = []
-        self.active_connections[meeting_code].append(websocket)
-        print(f"[WS MANAGER] Connected: {meeting_code}. Total Clients: {len(self.active_connections[meeting_code])}")
-
-    def disconnect(self, websocket: WebSocket, meeting_code: str):
-        if meeting_code in self.active_connections:
-            if websocket in self.active_connections[meeting_code]:
-                self.active_connections[meeting_code].remove(websocket)
-            if not self.active_connections[meeting_code]:
-                del self.active_connections[meeting_code]
-        print(f"[WS MANAGER] Disconnected: {meeting_code}")
-
-    async def broadcast(self, message: dict, meeting_code: str):
-        if meeting_code in self.active_connections:
-            for connection in list(self.active_connections[meeting_code]):
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logging.debug(f"[WS BROADCAST] send_json error: {e}")
-
 manager = ConnectionManager()
+score_writer = ScoreWriteBehind(database.AsyncSessionLocal)
+
+rollup_compactor = RollupCompactor(database.AsyncSessionLocal, database.async_engine)
+geo_locator = GeoLocator()
+
+@app.on_event("startup")
+async def start_background_writers():
+    models.start_background_load()
+    await manager.start()
+    score_writer.start()
+    rollup_compactor.start()
+
+@app.on_event("shutdown")
+async def stop_background_writers():
+    await rollup_compactor.stop()
+    await score_writer.stop()
+    await geo_locator.aclose()
+    await manager.stop()
+
+# ================= HEALTH =================
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    body = {"ready": models.ready, "models": models.status()}
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
 
 # ================= AUTHENTICATION =================
 ADMIN_CREATION_SECRET = os.getenv("ADMIN_SECRET_KEY")
 
 @app.post("/api/v1/auth/register", response_model=UserResponse)
-async def register_user(user: UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(DBUser).filter(DBUser.email == user.email).first()
+async def register_user(user: UserCreate, db: AsyncSession = Depends(database.get_db)):
+    db_user = await db.scalar(select(DBUser).where(DBUser.email == user.email))
     if db_user: raise HTTPException(status_code=400, detail="Email already registered")
     assigned_role = UserRole.CLIENT.value
     if user.role == "admin":
         if user.admin_secret != ADMIN_CREATION_SECRET: raise HTTPException(status_code=403, detail="Invalid Secret")
         assigned_role = UserRole.ADMIN.value
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     new_user = DBUser(first_name=user.first_name, last_name=user.last_name, email=user.email, 
                       phone_number=user.phone_number, hashed_password=hashed_password, role=assigned_role)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return UserResponse.from_orm(new_user)
 
 @app.post("/api/v1/auth/login")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = db.query(DBUser).filter(DBUser.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_db)):
+    user = await db.scalar(select(DBUser).where(DBUser.email == form_data.username))
+    if not user:
+        raise HTTPException(status_code=401, detail="Incorrect credentials")
+    ok, upgraded_hash = await password_hasher.authenticate(form_data.password, user.hashed_password)
+    if not ok:
         raise HTTPException(status_code=401, detail="Incorrect credentials")
-    access_token = create_access_token(data={"sub": user.email, "role": user.role})
+    if upgraded_hash is not None:
+        # Cost factor was raised since this hash was made; upgrade it while we hold the password
+        user.hashed_password = upgraded_hash
+        await db.commit()
+    access_token = create_access_token(data={"sub": user.email, **principal_claims(user)})
     return {"access_token": access_token, "token_type": "bearer", "role": user.role}
 
 # ================= USER MANAGEMENT =================
@@ -167,35 +204,36 @@ class UserUpdate(BaseModel):
 async def update_user_me(
     user_data: UserUpdate,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
-    user = db.query(DBUser).filter(DBUser.id == current_user.id).first()
+    user = await db.get(DBUser, current_user.id)
     if user_data.first_name: user.first_name = user_data.first_name
     if user_data.last_name: user.last_name = user_data.last_name
     if user_data.birth_date: user.birth_date = user_data.birth_date
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.email)
     return UserResponse.from_orm(user)
 
 @app.get("/api/v1/users/status")
 async def get_user_status(
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
-    doc = db.query(Document).filter(
+    doc = await db.scalar(select(Document).where(
         Document.user_id == current_user.id, 
         Document.is_verified == True
-    ).first()
+    ).limit(1))
     return {"is_verified": doc is not None}
 
 @app.get("/api/v1/users/history")
 async def get_user_history(
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
-    logs = db.query(VerificationResult).filter(
+    logs = (await db.scalars(select(VerificationResult).where(
         VerificationResult.client_id == current_user.id
-    ).order_by(VerificationResult.timestamp.desc()).all()
+    ).order_by(VerificationResult.timestamp.desc()))).all()
     return logs
 
 
@@ -207,16 +245,16 @@ class AgoraTokenRequest(BaseModel): channelName: str
 async def get_agora_token(payload: AgoraTokenRequest, current_user: UserResponse = Depends(get_current_user)):
     token = generate_agora_rtc_token(payload.channelName, int(current_user.id))
     if not token: raise HTTPException(status_code=500, detail="Token generation failed")
-    return {"token": token, "appId": APP_ID, "userId": int(current_user.id)}
+    return {"token": token, "appId": agora_tokens.app_id, "userId": int(current_user.id)}
 
 # --- CORRECTED JOIN MEETING ENDPOINT ---
 @app.get("/api/v1/meetings/join/{meeting_code}")
 async def join_meeting_data(
     meeting_code: str, 
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
-    meeting = db.query(Meeting).filter(Meeting.meeting_code == meeting_code).first()
+    meeting = await db.scalar(select(Meeting).where(Meeting.meeting_code == meeting_code))
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
 
@@ -224,28 +262,18 @@ async def join_meeting_data(
     if current_user.role == "client":
         if meeting.client_id is None:
             meeting.client_id = current_user.id
-            db.commit()
-            db.refresh(meeting)
+            await db.commit()
+            await db.refresh(meeting)
         elif meeting.client_id != current_user.id:
             logging.warning(f"Meeting {meeting_code} client mismatch.")
 
-    # Generate Agora Token
+    # Agora token (cached per channel/uid until close to expiry)
     uid = int(current_user.id)
-    privilege_expired_ts = int(time.time()) + (3600 * 24)
-    agora_app_id = os.getenv("AGORA_APP_ID", APP_ID)
-    agora_cert = os.getenv("AGORA_APP_CERTIFICATE")
-    
-    token = RtcTokenBuilder.buildTokenWithUid(
-        agora_app_id, 
-        agora_cert, 
-        meeting_code, 
-        uid, 
-        1, 
-        privilege_expired_ts
-    )
+    token = generate_agora_rtc_token(meeting_code, uid)
+    if not token: raise HTTPException(status_code=500, detail="Token generation failed")
 
     return {
-        "appId": agora_app_id,
+        "appId": agora_tokens.app_id,
         "token": token,
         "uid": uid,
         "role": current_user.role, 
@@ -257,7 +285,7 @@ async def join_meeting_data(
 async def create_meeting(
     payload: MeetingCreate,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
     code = getattr(payload, "meeting_code", None)
     if not code: code = str(uuid.uuid4())[:12]
@@ -273,8 +301,8 @@ async def create_meeting(
     )
 
     db.add(meeting)
-    db.commit()
-    db.refresh(meeting)
+    await db.commit()
+    await db.refresh(meeting)
 
     join_url = f"{frontend_url}/meet/{meeting.meeting_code}"
 
@@ -296,40 +324,168 @@ class ScoresPayload(BaseModel):
     saved_by: str | None = None
 
 @app.post("/api/v1/meetings/{meeting_code}/scores")
-async def persist_meeting_scores(meeting_code: str, payload: ScoresPayload, db: Session = Depends(database.get_db)):
-    meeting = db.query(Meeting).filter(Meeting.meeting_code == meeting_code).first()
+async def persist_meeting_scores(meeting_code: str, payload: ScoresPayload, db: AsyncSession = Depends(database.get_db)):
+    meeting = await db.scalar(select(Meeting).where(Meeting.meeting_code == meeting_code))
     if not meeting or not meeting.client_id: return {"ok": False}
     
     liveness_score = float(payload.liveness.get("score")) if payload.liveness and payload.liveness.get("score") is not None else None
     deepfake_score = float(payload.deepfake.get("score")) if payload.deepfake and payload.deepfake.get("score") is not None else None
     face_match_score = float(payload.face_match.get("distance")) if payload.face_match and payload.face_match.get("distance") is not None else None
 
-    existing = db.query(VerificationResult).filter(VerificationResult.meeting_id == meeting.id, VerificationResult.client_id == meeting.client_id).first()
-    
-    if existing:
-        if liveness_score is not None: existing.liveness_score = liveness_score
-        if deepfake_score is not None: existing.deepfake_score = deepfake_score
-        if face_match_score is not None: existing.face_match_score = face_match_score
-        try: existing.timestamp = datetime.utcnow() 
-        except: pass
-        db.commit()
-    else:
-        new_row = VerificationResult(meeting_id=meeting.id, client_id=meeting.client_id, liveness_score=liveness_score, 
-                                     deepfake_score=deepfake_score, face_match_score=face_match_score, is_pass=None)
-        db.add(new_row)
-        db.commit()
+    row = {"meeting_id": meeting.id, "client_id": meeting.client_id, "is_pass": None, "timestamp": datetime.utcnow()}
+    if liveness_score is not None: row["liveness_score"] = liveness_score
+    if deepfake_score is not None: row["deepfake_score"] = deepfake_score
+    if face_match_score is not None: row["face_match_score"] = face_match_score
+
+    # Only the provided scores (and the timestamp) overwrite an existing row
+    update_columns = tuple(c for c in row if c not in ("meeting_id", "client_id", "is_pass"))
+    await upsert_verification_results(db, [row], update_columns=update_columns)
+    await db.commit()
     return {"ok": True}
 
 
 # ================= DOCUMENT VERIFICATION =================
 
+# "sync" answers the POST with the decision; "async" returns a job id to poll
+VERIFY_DEFAULT_MODE = os.getenv("VERIFY_DEFAULT_MODE", "sync")
+verify_jobs = VerifyJobManager()
+
+def _mark_document_verified(document_id: int):
+    db = database.SessionLocal()
+    try:
+        db.query(Document).filter(Document.id == document_id).update({"is_verified": True})
+        db.commit()
+    finally:
+        db.close()
+
+def analyze_video_frames(frames: list, liveness_frames: list, doc_embedding) -> dict:
+    """
+    Runs face match and deepfake over the sampled video frames, and blink
+    liveness over a separate contiguous native-fps window (spread-out samples
+    are seconds apart and would never catch a blink).
+    Face match uses the median distance over a spread subset of the frames.
+    """
+    distances = []
+    for frame in frames[::max(1, len(frames) // VIDEO_FACE_MATCH_FRAMES)][:VIDEO_FACE_MATCH_FRAMES]:
+        face_arr = face_match.extract_face(frame)
+        if face_arr is None or doc_embedding is None:
+            continue
+        result = face_match.compare_embeddings(doc_embedding, face_match.get_embedding(face_arr))
+        if "error" not in result:
+            distances.append(result["distance"])
+
+    face_match_result = {"verified": False, "distance": 1.0, "custom_verified": False, "frames_matched": len(distances)}
+    if distances:
+        dist = float(np.median(distances))
+        face_match_result.update({"verified": dist <= 0.30, "distance": dist, "custom_verified": dist < CUSTOM_FACE_MATCH_THRESHOLD})
+
+    liv_res = liveness_check(liveness_frames, process_every_n=1) if liveness_frames else {}
+    df_res = detect_deepfake(frames)
+
+    return {
+        "face_match": face_match_result,
+        "liveness": {
+            "passed": liv_res.get("passed", False),
+            "score": 1.0 if liv_res.get("passed") else liv_res.get("score", 0.0),
+            "window_frames": len(liveness_frames),
+            # Too short a clip can't show a blink; the result is reported but not enforced
+            "enforced": len(liveness_frames) >= VIDEO_LIVENESS_MIN_FRAMES
+        },
+        "deepfake": {
+            "is_deepfake": df_res.get("is_deepfake", False),
+            "score": df_res.get("fake_score", 0.0) * DEEPFAKE_SENSITIVITY
+        },
+        "sampled_frames": len(frames)
+    }
+
+def run_verification_pipeline(progress, doc_path, doc_type, doc_sha256, video_path, document_id):
+    """
+    The blocking verification stages (QR/OCR, face extraction, video match).
+    Runs on the verify worker pool, never on the event loop.
+    """
+    try:
+        progress("document")
+        cache_key = verification_cache.make_key(doc_sha256, doc_type)
+        cached = verification_cache.get(cache_key)
+        if cached:
+            doc_verification_result = cached["result"]
+            doc_face_arr = cached["face"]
+            doc_embedding = cached["embedding"]
+        else:
+            verifier = DocumentVerifier(doc_path, doc_type=doc_type)
+            doc_verification_result = verifier.verify_document()
+
+            # A signed Secure QR carries the holder photo, so MTCNN on the scan is skipped
+            progress("document_face")
+            doc_face_arr = verifier.embedded_face
+            if doc_face_arr is None:
+                # The verifier's image is already decoded (and rasterized for PDFs)
+                doc_face_arr = face_match.extract_face(verifier.image)
+            doc_embedding = face_match.get_embedding(doc_face_arr)
+            verification_cache.put(cache_key, doc_verification_result, doc_face_arr, doc_embedding)
+
+        face_match_result = {"verified": False, "distance": 1.0, "custom_verified": False}
+        video_checks = None
+
+        if video_path and os.path.exists(video_path):
+            progress("video")
+            # One decode pass: spread-out frames for face match/deepfake plus a contiguous liveness clip
+            frames, liveness_frames = sample_frames(
+                video_path, k=VIDEO_SAMPLE_FRAMES, strategy="quality", max_width=HEAVY_TARGET_WIDTH,
+                window_sec=LIVENESS_WINDOW_SEC, window_max_width=LIVENESS_TARGET_WIDTH
+            )
+            if frames:
+                progress("video_analysis")
+                video_checks = analyze_video_frames(frames, liveness_frames, doc_embedding)
+                face_match_result = video_checks["face_match"]
+
+        progress("decision")
+        final_decision = "FAIL"
+        reasons = []
+
+        if doc_verification_result.get("status") == "REJECTED":
+            reasons.append("Document rejected (QR/OCR mismatch).")
+        elif video_path and not face_match_result.get("custom_verified"):
+             reasons.append(f"Face mismatch (Dist: {face_match_result.get('distance'):.2f}).")
+        elif video_checks and video_checks["liveness"]["enforced"] and video_checks["liveness"]["score"] < LIVENESS_THRESHOLD:
+             reasons.append(f"Liveness Low ({video_checks['liveness']['score']:.2f}).")
+        elif video_checks and video_checks["deepfake"]["score"] > DEEPFAKE_THRESHOLD:
+             reasons.append(f"Deepfake Detected ({video_checks['deepfake']['score']:.2f}).")
+        else: 
+            final_decision = "PASS"
+            reasons.append("All checks passed.")
+            _mark_document_verified(document_id)
+
+        return {
+                "decision": final_decision,
+                "reasons": reasons,
+                "checks": {
+                "document": doc_verification_result,
+                "face_match": face_match_result,
+                "liveness": video_checks["liveness"] if video_checks else None,
+                "deepfake": video_checks["deepfake"] if video_checks else None
+            }
+        }
+    finally:
+        if video_path and os.path.exists(video_path): 
+            try:
+                os.remove(video_path)
+            except:
+                pass
+
+async def _push_verify_result(job):
+    if job.meeting_code:
+        await manager.broadcast({"type": "verify_result", **job.to_dict()}, job.meeting_code)
+
 @app.post("/api/v1/verify")
 async def verify_identity(
     document: UploadFile = File(...),
     doc_type: str = Form("aadhaar_card"),
     video: UploadFile = File(None),
+    mode: str = Form(VERIFY_DEFAULT_MODE),
+    meeting_code: Optional[str] = Form(None),
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_db)
 ):
     doc_path = ""
     video_path = ""
@@ -337,11 +493,15 @@ async def verify_identity(
         valid_types = ["aadhaar_card", "pan_card", "voter_id", "driving_license", "passport"]
         if doc_type not in valid_types or not allowed_file(document.filename):
             raise HTTPException(status_code=400, detail="Invalid file type.")
+        if mode not in ("sync", "async"):
+            raise HTTPException(status_code=400, detail="Invalid mode.")
 
-        doc_filename = secure_filename(document.filename)
+        # Per-request prefix: concurrent uploads of "aadhaar.jpg"/"video.mp4" never share a path,
+        # so each request (or its async job) only ever removes its own files
+        upload_prefix = uuid.uuid4().hex
+        doc_filename = f"{upload_prefix}_{secure_filename(document.filename)}"
         doc_path = os.path.join(UPLOAD_FOLDER, doc_filename)
-        with open(doc_path, "wb") as f:
-            f.write(await document.read())
+        _, doc_sha256 = await save_upload(document, doc_path, MAX_DOCUMENT_UPLOAD_BYTES)
 
         file_url_for_db = f"{backend_url}/{UPLOAD_FOLDER}/{doc_filename}".replace("\\", "/")
 
@@ -352,64 +512,31 @@ async def verify_identity(
             is_verified=False
         )
         db.add(new_doc_record)
-        db.commit()
-        db.refresh(new_doc_record)
+        await db.commit()
+        await db.refresh(new_doc_record)
         
         if video:
-            video_filename = secure_filename(video.filename)
+            video_filename = f"{upload_prefix}_{secure_filename(video.filename)}"
             video_path = os.path.join(UPLOAD_FOLDER, video_filename)
-            with open(video_path, "wb") as f:
-                f.write(await video.read())
-        
-        verifier = DocumentVerifier(doc_path)
-        doc_verification_result = verifier.verify_document()
+            await save_upload(video, video_path, MAX_VIDEO_UPLOAD_BYTES)
 
+        pipeline_args = (doc_path, doc_type, doc_sha256, video_path, new_doc_record.id)
 
-        doc_face_arr = face_match.extract_face(doc_path) 
-        
-        face_match_result = {"verified": False, "distance": 1.0, "custom_verified": False}
-
-        if video_path and os.path.exists(video_path):
-            cap = cv2.VideoCapture(video_path)
-            if cap.isOpened():
-                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                middle_frame_idx = frame_count // 2
-                cap.set(cv2.CAP_PROP_POS_FRAMES, middle_frame_idx)
-                ret, frame = cap.read()
-                
-                if ret:
-                    video_face_arr = face_match.extract_face(frame)
-                    
-                    if doc_face_arr is not None and video_face_arr is not None:
-                        face_match_result = face_match.compare_faces(doc_face_arr, video_face_arr)
-                        
-                        dist = face_match_result.get("distance", 1.0)
-                        face_match_result["custom_verified"] = dist < CUSTOM_FACE_MATCH_THRESHOLD
-                
-                cap.release()
-
-        final_decision = "FAIL"
-        reasons = []
-
-        if doc_verification_result.get("status") == "REJECTED":
-            reasons.append("Document rejected (QR/OCR mismatch).")
-        elif video and not face_match_result.get("custom_verified"):
-             reasons.append(f"Face mismatch (Dist: {face_match_result.get('distance'):.2f}).")
-        else: 
-            final_decision = "PASS"
-            reasons.append("All checks passed.")
-            new_doc_record.is_verified = True
-            db.commit()
+        if mode == "async":
+            job = verify_jobs.submit(current_user.id, run_verification_pipeline, *pipeline_args,
+                                     meeting_code=meeting_code, on_done=_push_verify_result)
+            # The job now owns the uploaded video and removes it when done
+            video_path = ""
+            return JSONResponse(status_code=202, content={
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/v1/verify/jobs/{job.id}"
+            })
 
-        return {
-                "decision": final_decision,
-                "reasons": reasons,
-                "checks": {
-                "document": doc_verification_result,
-                "face_match": face_match_result
-            }
-        }
+        return await verify_jobs.run(run_verification_pipeline, *pipeline_args)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Verify error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -420,6 +547,13 @@ async def verify_identity(
             except:
                 pass
 
+@app.get("/api/v1/verify/jobs/{job_id}")
+async def get_verify_job(job_id: str, current_user: UserResponse = Depends(get_current_user)):
+    job = await verify_jobs.get(job_id)
+    if not job or (job.user_id != current_user.id and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 # ================= REAL-TIME WEBSOCKET AI (TUNED) =================
 
 def process_ai_pipeline(video_chunk, single_frame, ref_arr):
@@ -451,34 +585,13 @@ def _decode_image(b64_str: str):
 
 heavy_processing_lock = asyncio.Lock()
 
-# ================= LOCATION =================
-
-async def get_geolocation(ip_address: str):
-    if ip_address in ["127.0.0.1", "localhost", "::1"]:
-        return None, None 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"https://ipwho.is/{ip_address}")
-            data = resp.json()
-            
-            if data.get("success") is True:
-                return data.get("latitude"), data.get("longitude")
-            else:
-                logging.warning(f"[GeoIP Failed] {data.get('message')}")
-                
-    except Exception as e:
-        logging.error(f"[GeoIP Error] {e}")
-    
-    return None, None
-
 # ================= WEBSOCKET =================
 
 @app.websocket("/ws/verify/{meeting_code}/{client_id}")
 async def websocket_endpoint(
     websocket: WebSocket, 
     meeting_code: str, 
-    client_id: int,
-    db: Session = Depends(database.get_db)
+    client_id: int
 ):
     await manager.connect(websocket, meeting_code)
     
@@ -486,22 +599,28 @@ async def websocket_endpoint(
     client_ip = websocket.client.host
     client_lat, client_lon = None, None
     try:
-        client_lat, client_lon = await get_geolocation(client_ip)
-        print(f"[WS INFO] Client: {client_ip} | Loc: {client_lat}, {client_lon}")
+        client_lat, client_lon = await geo_locator.locate(client_ip)
+        ws_log.info(f"[WS INFO] Client: {client_ip} | Loc: {client_lat}, {client_lon}")
     except Exception:
         pass
 
-    # 2. SETUP REFERENCE FACE
+    # 2. SETUP REFERENCE FACE & MEETING ROW KEY
     reference_face_path = None
+    meeting_id = None
     try:
-        client_doc = db.query(Document).filter(Document.user_id == client_id).order_by(Document.uploaded_at.desc()).first()
+        async with database.AsyncSessionLocal() as adb:
+            meeting_id = await adb.scalar(select(Meeting.id).where(Meeting.meeting_code == meeting_code))
+            client_doc = await adb.scalar(select(Document).where(Document.user_id == client_id).order_by(Document.uploaded_at.desc()).limit(1))
         if client_doc:
             filename = os.path.basename(client_doc.file_url)
             potential_path = os.path.join(UPLOAD_FOLDER, filename)
             if os.path.exists(potential_path):
-                reference_face_path = await asyncio.to_thread(face_match.extract_face, potential_path)
+                reference_input = potential_path
+                if is_pdf(potential_path):
+                    reference_input = await asyncio.to_thread(load_pdf_page, potential_path)
+                reference_face_path = await asyncio.to_thread(face_match.extract_face, reference_input)
     except Exception as e:
-        print(f"[WS SETUP] Error: {e}")
+        ws_log.error(f"[WS SETUP] Error: {e}")
 
     # 3. STATE VARIABLES
     frame_buffer = []
@@ -509,8 +628,6 @@ async def websocket_endpoint(
     total_deepfake_score = 0.0
     total_face_match_score = 0.0
     frame_block_count = 0 
-    
-    current_result_id = None  
 
     current_state = {
         "liveness_score": 0.0,
@@ -520,86 +637,104 @@ async def websocket_endpoint(
         "face_match_score": 1.0 
     }
 
-    # 4. DATABASE UPDATE
+    # 4. DATABASE UPDATE (buffered; the score writer persists it in batches)
     def update_db(final_average_mode=False):
-        nonlocal current_result_id 
-        
-        try:
-            final_df = current_state["deepfake_score"]
-            final_fm = current_state["face_match_score"]
+        if meeting_id is None:
+            return
 
-            if final_average_mode and frame_block_count > 0:
-                final_df = total_deepfake_score / frame_block_count
-                final_fm = total_face_match_score / frame_block_count
-                print(f"[WS END] Session Avg -> Frames: {frame_block_count}, DF: {final_df:.2f}, FM: {final_fm:.2f}")
+        final_df = current_state["deepfake_score"]
+        final_fm = current_state["face_match_score"]
 
-            final_liv = 1.0 if current_state["is_liveness_confirmed"] else current_state["liveness_score"]
+        if final_average_mode and frame_block_count > 0:
+            final_df = total_deepfake_score / frame_block_count
+            final_fm = total_face_match_score / frame_block_count
+            ws_log.info(f"[WS END] Session Avg -> Frames: {frame_block_count}, DF: {final_df:.2f}, FM: {final_fm:.2f}")
 
-            reasons = []
-            
-            if final_liv < LIVENESS_THRESHOLD:
-                reasons.append(f"Liveness Low ({final_liv:.2f})")
-            
-            if final_df > DEEPFAKE_THRESHOLD:
-                reasons.append(f"Deepfake Detected ({final_df:.2f})")
-
-            if final_fm > FACE_MATCH_THRESHOLD:
-                reasons.append(f"Face Mismatch ({final_fm:.2f})")
-
-            is_pass_val = len(reasons) == 0
-            failure_reason_val = "NA" if is_pass_val else ", ".join(reasons)
+        final_liv = 1.0 if current_state["is_liveness_confirmed"] else current_state["liveness_score"]
 
-            row = None
-            if current_result_id:
-                row = db.query(VerificationResult).filter(VerificationResult.id == current_result_id).first()
-            
-            if not row:
-                meeting = db.query(Meeting).filter(Meeting.meeting_code == meeting_code).first()
-                if not meeting: return
-                row = db.query(VerificationResult).filter(VerificationResult.meeting_id == meeting.id).first()
-
-            if row:
-                row.deepfake_score = final_df
-                row.face_match_score = final_fm
-                row.liveness_score = final_liv
-                row.is_pass = is_pass_val
-                row.failure_reason = failure_reason_val
-                row.timestamp = datetime.utcnow()
-                
-                if client_ip: row.ip_address = client_ip
-                if client_lat: row.latitude = client_lat
-                if client_lon: row.longitude = client_lon
-                
-                current_result_id = row.id 
-                db.commit()
-            else:
-                meeting = db.query(Meeting).filter(Meeting.meeting_code == meeting_code).first()
-                if meeting:
-                    new_row = VerificationResult(
-                        meeting_id=meeting.id, 
-                        client_id=client_id, 
-                        deepfake_score=final_df, 
-                        face_match_score=final_fm, 
-                        liveness_score=final_liv,
-                        is_pass=is_pass_val,
-                        failure_reason=failure_reason_val,
-                        ip_address=client_ip,
-                        latitude=client_lat,
-                        longitude=client_lon
-                    )
-                    db.add(new_row)
-                    try:
-                        db.commit()
-                        db.refresh(new_row)
-                        current_result_id = new_row.id
-                    except IntegrityError:
-                        db.rollback()
-                        print("[DB SYNC] Race condition, retrying as update...")
-                        update_db(final_average_mode)
-
-        except Exception as e:
-            print(f"[DB ERROR] {e}")
-            db.rollback()
+        reasons = []
+        
+        if final_liv < LIVENESS_THRESHOLD:
+            reasons.append(f"Liveness Low ({final_liv:.2f})")
+        
+        if final_df > DEEPFAKE_THRESHOLD:
+            reasons.append(f"Deepfake Detected ({final_df:.2f})")
+
+        if final_fm > FACE_MATCH_THRESHOLD:
+            reasons.append(f"Face Mismatch ({final_fm:.2f})")
+
+        is_pass_val = len(reasons) == 0
+        values = {
+            "deepfake_score": final_df,
+            "face_match_score": final_fm,
+            "liveness_score": final_liv,
+            "is_pass": is_pass_val,
+            "failure_reason": "NA" if is_pass_val else ", ".join(reasons),
+            "is_final": final_average_mode,
+            "timestamp": datetime.utcnow(),
+        }
+        if client_ip: values["ip_address"] = client_ip
+        if client_lat: values["latitude"] = client_lat
+        if client_lon: values["longitude"] = client_lon
+
+        score_writer.post(meeting_id, client_id, values)
+
+    throttle = BroadcastThrottle()
+    flow = FrameRateController(VIDEO_CHUNK_SIZE)
+    last_logged = 0.0
+    trailing = None
+
+    def liveness_out():
+        return 1.0 if current_state["is_liveness_confirmed"] else current_state["liveness_score"]
+
+    def score_values():
+        return (current_state["is_liveness_confirmed"], liveness_out(), current_state["is_deepfake"],
+                current_state["deepfake_score"], current_state["face_match_score"])
+
+    async def broadcast_scores():
+        nonlocal last_logged
+        response = {
+            "liveness": {
+                "status": current_state["is_liveness_confirmed"],
+                "score": liveness_out(), 
+                "challenge": "none"
+            },
+            "deepfake": {
+                "is_deepfake": current_state["is_deepfake"], 
+                "score": current_state["deepfake_score"]
+            },
+            "face_match": {
+                "distance": current_state["face_match_score"], 
+                "is_match": current_state["face_match_score"] < FACE_MATCH_THRESHOLD
+            }
+        }
+        await manager.broadcast(response, meeting_code)
+        ws_log.debug(f"[WS SCORES] {meeting_code}: {response}")
+        now = time.monotonic()
+        if now - last_logged >= WS_LOG_SAMPLE_SEC:
+            last_logged = now
+            ws_log.info(f"[WS SCORES] {meeting_code} client {client_id}: liveness {liveness_out():.2f}, "
+                        f"deepfake {current_state['deepfake_score']:.2f}, face {current_state['face_match_score']:.2f}")
+
+    async def send_trailing(delay: float):
+        await asyncio.sleep(delay)
+        if throttle.flush_pending(score_values()):
+            await broadcast_scores()
+
+    def schedule_trailing():
+        # Trailing edge: a change the rate limit held back goes out once it allows,
+        # even if no further frame ever arrives
+        nonlocal trailing
+        delay = throttle.trailing_delay()
+        if delay is not None and (trailing is None or trailing.done()):
+            trailing = asyncio.create_task(send_trailing(delay))
+
+    def push_control():
+        control = flow.update(current_state["is_liveness_confirmed"], len(frame_buffer))
+        if control is not None:
+            manager.send_to(websocket, control)
+
+    push_control()
 
     # 5. MAIN LOOP
     try:
@@ -634,6 +769,7 @@ async def websocket_endpoint(
 
             ml_frame = cv2.resize(frame, (HEAVY_TARGET_WIDTH, int(frame.shape[0]*(HEAVY_TARGET_WIDTH/frame.shape[1]))))
             frame_buffer.append(ml_frame)
+            push_control()
 
             if len(frame_buffer) >= VIDEO_CHUNK_SIZE:
                 
@@ -642,12 +778,14 @@ async def websocket_endpoint(
                         video_chunk = list(frame_buffer)
                         snapshot_frame = frame_buffer[-1]
                         
+                        pipeline_started = time.perf_counter()
                         df_res, liv_res, fm_res = await asyncio.to_thread(
                             process_ai_pipeline, 
                             video_chunk, 
                             snapshot_frame, 
                             reference_face_path
                         )
+                        flow.record_pipeline(time.perf_counter() - pipeline_started)
 
                         current_state["is_deepfake"] = df_res.get("is_deepfake", False)
                         current_state["deepfake_score"] = df_res.get("fake_score", 0.0) * DEEPFAKE_SENSITIVITY
@@ -666,48 +804,83 @@ async def websocket_endpoint(
                         total_face_match_score += current_state["face_match_score"]
                         frame_block_count += 1
 
-                        await asyncio.to_thread(update_db, final_average_mode=False)
+                        update_db(final_average_mode=False)
                         
                         frame_buffer.clear()
+                        push_control()
                 else:
                     if len(frame_buffer) > VIDEO_CHUNK_SIZE * 2:
                         frame_buffer.clear()
-            response = {
-                "liveness": {
-                    "status": current_state["is_liveness_confirmed"],
-                    "score": 1.0 if current_state["is_liveness_confirmed"] else current_state["liveness_score"], 
-                    "challenge": "none"
-                },
-                "deepfake": {
-                    "is_deepfake": current_state["is_deepfake"], 
-                    "score": current_state["deepfake_score"]
-                },
-                "face_match": {
-                    "distance": current_state["face_match_score"], 
-                    "is_match": current_state["face_match_score"] < FACE_MATCH_THRESHOLD
-                }
-            }
-            await manager.broadcast(response, meeting_code)
-            print(response)
+            if throttle.should_send(score_values()):
+                await broadcast_scores()
+            else:
+                schedule_trailing()
 
     except Exception as e:
         logging.error(f"WS Error: {e}")
     finally:
-        await asyncio.to_thread(update_db, final_average_mode=True)
-        manager.disconnect(websocket, meeting_code)
+        if trailing is not None:
+            trailing.cancel()
+        # A change held back by the rate limit still reaches the meeting
+        if throttle.flush_pending(score_values()):
+            try:
+                await broadcast_scores()
+            except Exception as e:
+                ws_log.warning(f"[WS SCORES] Final broadcast failed: {e}")
+        update_db(final_average_mode=True)
+        if meeting_id is not None:
+            await score_writer.flush_session(meeting_id, client_id)
+            rollup_compactor.mark_dirty()
+        await manager.disconnect(websocket, meeting_code)
+
+@app.get("/api/v1/admin/verifications", response_model=VerificationFeedPage)
+async def get_all_verifications(
+    limit: int = Query(100, ge=1, le=FEED_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    is_pass: Optional[bool] = None,
+    client_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    try:
+        return await fetch_verification_page(db, limit, cursor=cursor, is_pass=is_pass,
+                                              client_id=client_id, since=since, until=until)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/v1/admin/stats")
+async def get_verification_stats(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(database.get_db)
+):
+    until = until or datetime.utcnow()
+    since = since or until - (timedelta(hours=48) if granularity == "hour" else timedelta(days=30))
+    return await fetch_rollup_stats(db, granularity, since, until)
 
-@app.get("/api/v1/admin/verifications")
-async def get_all_verifications(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    return db.query(VerificationResult)\
-        .options(joinedload(VerificationResult.client))\
-        .order_by(VerificationResult.timestamp.desc())\
-        .offset(skip).limit(limit).all()
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    return {
+        "verify_cache": verification_cache.stats(),
+        "verify_jobs": verify_jobs.stats(),
+        "score_writer": score_writer.stats(),
+        "rollups": rollup_compactor.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "agora_tokens": agora_tokens.stats(),
+        "geoip": geo_locator.stats(),
+        "models": models.status(),
+        "websockets": manager.stats(),
+        "ws_throttle": BroadcastThrottle.totals
+    }
 
 @app.get("/api/v1/meetings/{meeting_code}/result")
-async def get_meeting_result(meeting_code: str, db: Session = Depends(database.get_db)):
-    meeting = db.query(Meeting).filter(Meeting.meeting_code == meeting_code).first()
+async def get_meeting_result(meeting_code: str, db: AsyncSession = Depends(database.get_db)):
+    meeting = await db.scalar(select(Meeting).where(Meeting.meeting_code == meeting_code))
     if not meeting: raise HTTPException(status_code=404)
-    result = db.query(VerificationResult).filter(VerificationResult.meeting_id == meeting.id).first()
+    result = await db.scalar(select(VerificationResult).where(VerificationResult.meeting_id == meeting.id).limit(1))
     if result: return result
     return {"status": "pending", "client_id": meeting.client_id, "meeting_id": meeting.id}
 
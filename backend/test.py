@@ -42,9 +42,17 @@ def image_to_data_url(img_bgr, quality=70):
     b64 = base64.b64encode(buf.tobytes()).decode("ascii")
     return f"data:image/jpeg;base64,{b64}"
 
-async def send_frames(uri: str, fps: float = 2.0, image_path: str = None):
-    interval = 1.0 / max(0.1, fps)
-    print(f"[test_client] connecting to {uri} at {fps} FPS (interval {interval:.3f}s)")
+def fit_width(img_bgr, max_width):
+    """Downscale (never upscale) to the server's max_width hint, keeping aspect ratio."""
+    if not max_width or img_bgr.shape[1] <= max_width:
+        return img_bgr
+    scale = max_width / float(img_bgr.shape[1])
+    return cv2.resize(img_bgr, (max_width, int(img_bgr.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+
+async def send_frames(uri: str, fps: float = 2.0, image_path: str = None, ignore_control: bool = False):
+    # Streaming settings; the server may override them with {"type": "control"} messages
+    settings = {"target_fps": fps, "max_width": None, "jpeg_quality": 50}
+    print(f"[test_client] connecting to {uri} at {fps} FPS (interval {1.0 / max(0.1, fps):.3f}s)")
     async with websockets.connect(uri, ping_interval=10, max_size=None) as ws:
         print("[test_client] connected, waiting for server messages...")
         # Start a background task to receive messages
@@ -53,6 +61,13 @@ async def send_frames(uri: str, fps: float = 2.0, image_path: str = None):
                 async for msg in ws:
                     try:
                         data = json.loads(msg)
+                        if data.get("type") == "control":
+                            if not ignore_control:
+                                settings.update({k: data[k] for k in settings if data.get(k) is not None})
+                            print(f"[control] fps={data.get('target_fps')} width={data.get('max_width')} "
+                                  f"quality={data.get('jpeg_quality')} ({data.get('reason')})"
+                                  f"{' [ignored]' if ignore_control else ''}")
+                            continue
                         print(f"[server -> client] {json.dumps(data)}")
                     except Exception:
                         print(f"[server -> client] RAW: {msg}")
@@ -76,8 +91,9 @@ async def send_frames(uri: str, fps: float = 2.0, image_path: str = None):
                 else:
                     frame = await gen.__anext__()  # fallback
 
-                # convert to data URL
-                data_url = image_to_data_url(frame, quality=50)
+                # convert to data URL at the size/quality the server asked for
+                frame = fit_width(frame, settings["max_width"])
+                data_url = image_to_data_url(frame, quality=int(settings["jpeg_quality"]))
                 payload = {"type": "frame", "frame": data_url}
                 try:
                     await ws.send(json.dumps(payload))
@@ -85,7 +101,7 @@ async def send_frames(uri: str, fps: float = 2.0, image_path: str = None):
                     print("[test_client] send error:", e)
                     break
 
-                await asyncio.sleep(interval)
+                await asyncio.sleep(1.0 / max(0.1, float(settings["target_fps"])))
         except asyncio.CancelledError:
             pass
         except Exception as e:
@@ -107,12 +123,13 @@ def parse_args():
     p.add_argument("--client", default="3")
     p.add_argument("--fps", default=2.0, type=float)
     p.add_argument("--image", default=None, help="Optional image path to send instead of synthetic video")
+    p.add_argument("--ignore-control", action="store_true", help="Keep --fps and quality fixed, ignoring server hints")
     return p.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
     uri = f"ws://{args.host}:{args.port}/ws/verify/{args.meeting}/{args.client}"
     try:
-        asyncio.run(send_frames(uri, fps=args.fps, image_path=args.image))
+        asyncio.run(send_frames(uri, fps=args.fps, image_path=args.image, ignore_control=args.ignore_control))
     except KeyboardInterrupt:
         print("Interrupted by user")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.realtime.bus import BROADCAST_CHANNEL_PREFIX, LocalHub, LocalTransport, MessageBus
+from app.realtime.connection_manager import ConnectionManager
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class _RecordingTransport(LocalTransport):
+    def __init__(self, hub: LocalHub):
+        super().__init__(hub)
+        self.batches = []
+
+    async def publish(self, channel: str, data: str):
+        self.batches.append(json.loads(data))
+        await super().publish(channel, data)
+
+
+def _manager(hub: LocalHub, **bus_kwargs) -> ConnectionManager:
+    return ConnectionManager(bus=MessageBus(LocalTransport(hub), **bus_kwargs))
+
+
+def test_broadcast_reaches_sockets_on_another_manager():
+    async def scenario():
+        hub = LocalHub()
+        first, second = _manager(hub, batch_ms=1), _manager(hub, batch_ms=1)
+        await first.start()
+        await second.start()
+        local, remote, other_meeting = _FakeSocket(), _FakeSocket(), _FakeSocket()
+        await first.connect(local, "m1")
+        await second.connect(remote, "m1")
+        await second.connect(other_meeting, "m2")
+
+        await first.broadcast({"type": "alert", "text": "hello"}, "m1")
+        await asyncio.sleep(0.05)
+        await first.stop()
+        await second.stop()
+        return local, remote, other_meeting
+
+    local, remote, other_meeting = asyncio.run(scenario())
+    assert local.sent == [{"type": "alert", "text": "hello"}]
+    assert remote.sent == [{"type": "alert", "text": "hello"}]
+    assert other_meeting.sent == []
+
+
+def test_publishes_are_batched_in_order_up_to_batch_max():
+    async def scenario():
+        hub = LocalHub()
+        transport = _RecordingTransport(hub)
+        manager = ConnectionManager(bus=MessageBus(transport, batch_ms=10, batch_max=3))
+        await manager.start()
+        socket = _FakeSocket()
+        await manager.connect(socket, "m1")
+
+        for i in range(7):
+            await manager.broadcast({"type": "alert", "seq": i}, "m1")
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return transport, socket
+
+    transport, socket = asyncio.run(scenario())
+    assert [len(batch) for batch in transport.batches] == [3, 3, 1]
+    assert [m["seq"] for m in socket.sent] == list(range(7))
+
+
+def test_unsubscribes_when_the_last_local_socket_leaves():
+    async def scenario():
+        hub = LocalHub()
+        manager = _manager(hub)
+        await manager.start()
+        a, b = _FakeSocket(), _FakeSocket()
+        await manager.connect(a, "m1")
+        await manager.connect(b, "m1")
+        channels = [set(hub.subscribers)]
+
+        await manager.disconnect(a, "m1")
+        channels.append(set(hub.subscribers))
+        await manager.disconnect(b, "m1")
+        channels.append(set(hub.subscribers))
+        stats = manager.stats()
+        await manager.stop()
+        return channels, stats
+
+    channels, stats = asyncio.run(scenario())
+    assert channels[0] == channels[1] == {BROADCAST_CHANNEL_PREFIX + "m1"}
+    assert channels[2] == set()
+    assert stats["bus"]["channels"] == 0
@@ -0,0 +1,80 @@
+from app.realtime.flow_control import (
+    FrameRateController, LIVENESS_PHASE_FPS, MONITOR_PHASE_FPS, OVERLOAD_QUALITY,
+)
+
+CHUNK = 60
+
+
+class _Session:
+    """Replays the verify WebSocket loop's buffering and control pushes."""
+
+    def __init__(self, liveness_confirmed: bool = False):
+        self.flow = FrameRateController(CHUNK)
+        self.buffer = []
+        self.liveness_confirmed = liveness_confirmed
+        self.controls = []
+        self.push()
+
+    def push(self):
+        control = self.flow.update(self.liveness_confirmed, len(self.buffer))
+        if control is not None:
+            self.controls.append(control)
+
+    def frames(self, n: int, pipeline_sec: float = 0.5, pipeline_busy_elsewhere: bool = False):
+        for _ in range(n):
+            self.buffer.append(object())
+            self.push()
+            if len(self.buffer) >= CHUNK:
+                if not pipeline_busy_elsewhere:
+                    self.flow.record_pipeline(pipeline_sec)
+                    self.buffer.clear()
+                    self.push()
+                elif len(self.buffer) > CHUNK * 2:
+                    self.buffer.clear()
+
+    @property
+    def hint(self):
+        return self.controls[-1]
+
+
+def test_initial_hint_follows_phase():
+    assert _Session().hint["target_fps"] == LIVENESS_PHASE_FPS
+    assert _Session(liveness_confirmed=True).hint["target_fps"] == MONITOR_PHASE_FPS
+
+
+def test_fast_pipeline_keeps_full_rate():
+    session = _Session()
+    session.frames(CHUNK * 5, pipeline_sec=1.0)
+    assert len(session.controls) == 1
+    assert session.hint["target_fps"] == LIVENESS_PHASE_FPS
+
+
+def test_slow_pipeline_backs_off_then_recovers():
+    session = _Session()
+    # 60 frames per 16 s is under 4 fps of capacity, so 15 fps must drop to 3.75
+    session.frames(CHUNK * 6, pipeline_sec=16.0)
+    assert session.hint["target_fps"] < LIVENESS_PHASE_FPS
+    assert session.hint["target_fps"] <= CHUNK / 16.0
+    assert session.hint["jpeg_quality"] <= OVERLOAD_QUALITY
+    assert "server busy" in session.hint["reason"]
+
+    session.frames(CHUNK * 20, pipeline_sec=1.0)
+    assert session.hint["target_fps"] == LIVENESS_PHASE_FPS
+    assert "server busy" not in session.hint["reason"]
+
+
+def test_backlog_while_pipeline_held_elsewhere_backs_off():
+    session = _Session()
+    session.frames(CHUNK + 10, pipeline_busy_elsewhere=True)
+    assert session.hint["target_fps"] == 7.5
+
+    session.frames(CHUNK // 2, pipeline_busy_elsewhere=True)
+    assert session.hint["target_fps"] == 3.7
+
+
+def test_borderline_pipeline_does_not_flap():
+    session = _Session()
+    # Capacity hovers around the halved rate; hysteresis keeps a single back-off
+    for pipeline_sec in (8.5, 7.5, 8.5, 7.5, 8.5, 7.5):
+        session.frames(CHUNK, pipeline_sec=pipeline_sec)
+    assert len(session.controls) <= 3
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("numpy")
+
+from app.geo.locator import GeoLocator, NO_LOCATION
+
+PUBLIC_IP = "8.8.8.8"
+
+
+def _locator(handler, **kwargs) -> GeoLocator:
+    locator = GeoLocator(mmdb_path=None, table_dir=None, http_fallback=True, **kwargs)
+    locator._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return locator
+
+
+def test_transient_failure_is_cached_briefly_not_for_the_full_ttl(monkeypatch):
+    calls = []
+    outcome = {"fail": True}
+
+    def handler(request):
+        calls.append(request.url)
+        if outcome["fail"]:
+            raise httpx.ConnectTimeout("blip", request=request)
+        return httpx.Response(200, json={"success": True, "latitude": 12.9, "longitude": 77.6})
+
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("app.geo.locator.time.monotonic", lambda: clock["now"])
+    locator = _locator(handler, failure_ttl=60, ttl=6 * 3600)
+
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == NO_LOCATION
+    # Inside the failure window the provider is not hit again
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == NO_LOCATION
+    assert len(calls) == 1
+
+    outcome["fail"] = False
+    clock["now"] += 61
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == (12.9, 77.6)
+    assert len(calls) == 2
+    assert locator.stats()["http_failed"] == 1
+
+
+def test_provider_no_location_answer_is_cached_for_full_ttl(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, json={"success": False, "message": "Reserved range"})
+
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("app.geo.locator.time.monotonic", lambda: clock["now"])
+    locator = _locator(handler, failure_ttl=60, ttl=6 * 3600)
+
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == NO_LOCATION
+    clock["now"] += 3600
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == NO_LOCATION
+    assert len(calls) == 1
+
+
+def test_server_error_counts_as_failure():
+    locator = _locator(lambda request: httpx.Response(503, json={}), failure_ttl=60)
+    assert asyncio.run(locator.locate(PUBLIC_IP)) == NO_LOCATION
+    assert locator.stats()["failed_entries"] == 1
+    assert locator.stats()["cache_entries"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+
+from app.realtime import outbound
+from app.realtime.outbound import MeetingSendStats, OutboundQueue, SLOW_CONSUMER_CLOSE_CODE
+
+
+class _FakeSocket:
+    def __init__(self, stall: bool = False):
+        self.stall = stall
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, text: str):
+        if self.stall:
+            await asyncio.sleep(3600)
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        await asyncio.sleep(0)
+        self.closed_with = code
+
+
+def _queue(socket, evicted):
+    stats = MeetingSendStats()
+    return OutboundQueue(socket, stats, on_evict=lambda q: (evicted.append(q), q.close()), max_depth=2), stats
+
+
+def test_send_timeout_closes_the_socket(monkeypatch):
+    monkeypatch.setattr(outbound, "WS_SEND_TIMEOUT_SEC", 0.05)
+
+    async def scenario():
+        socket, evicted = _FakeSocket(stall=True), []
+        queue, stats = _queue(socket, evicted)
+        queue.put(None, "a")
+        await asyncio.sleep(0.3)
+        return socket, evicted, stats
+
+    socket, evicted, stats = asyncio.run(scenario())
+    assert socket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert stats.evicted == 1 and len(evicted) == 1
+
+
+def test_queue_full_past_grace_closes_the_socket(monkeypatch):
+    monkeypatch.setattr(outbound, "WS_SLOW_CONSUMER_GRACE_SEC", 0.0)
+    monkeypatch.setattr(outbound, "WS_SEND_TIMEOUT_SEC", 5.0)
+
+    async def scenario():
+        socket, evicted = _FakeSocket(stall=True), []
+        queue, stats = _queue(socket, evicted)
+        for i in range(6):
+            queue.put(None, str(i))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        return socket, evicted, stats
+
+    socket, evicted, stats = asyncio.run(scenario())
+    assert socket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert stats.evicted == 1 and len(evicted) == 1
+    assert stats.dropped >= 1
+
+
+def test_score_updates_coalesce_and_drain_in_order():
+    async def scenario():
+        socket = _FakeSocket()
+        queue, stats = _queue(socket, [])
+        queue.put("score", "s1")
+        queue.put(None, "event")
+        queue.put("score", "s2")
+        await asyncio.sleep(0.05)
+        queue.close()
+        return socket, stats
+
+    socket, stats = asyncio.run(scenario())
+    assert socket.sent == ["s2", "event"]
+    assert stats.coalesced == 1
@@ -0,0 +1,46 @@
+from app.realtime.throttle import BroadcastThrottle
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _throttle(monkeypatch, **kwargs):
+    clock = _Clock()
+    monkeypatch.setattr("app.realtime.throttle.time.monotonic", clock)
+    return BroadcastThrottle(**{"epsilon": 0.01, "max_hz": 5, "heartbeat_sec": 2.0, **kwargs}), clock
+
+
+def test_change_inside_min_interval_is_flushed_on_the_trailing_edge(monkeypatch):
+    throttle, clock = _throttle(monkeypatch)
+    assert throttle.should_send((False, 0.2))
+    assert throttle.trailing_delay() is None
+
+    clock.now += 0.05
+    assert not throttle.should_send((False, 0.6))
+    assert abs(throttle.trailing_delay() - 0.15) < 1e-9
+
+    # No further frames arrive; the deferred flush still sends the last state
+    clock.now += 0.15
+    assert throttle.flush_pending((False, 0.6))
+    assert throttle.trailing_delay() is None
+    assert not throttle.flush_pending((False, 0.6))
+
+
+def test_flag_flip_is_sent_immediately(monkeypatch):
+    throttle, clock = _throttle(monkeypatch)
+    assert throttle.should_send((False, 0.2))
+    clock.now += 0.01
+    assert throttle.should_send((True, 0.2))
+
+
+def test_unchanged_values_leave_nothing_pending(monkeypatch):
+    throttle, clock = _throttle(monkeypatch)
+    assert throttle.should_send((False, 0.2))
+    clock.now += 0.05
+    assert not throttle.should_send((False, 0.205))
+    assert throttle.trailing_delay() is None
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.storage.uploads import UploadSizeLimitMiddleware
+
+LIMIT = 1024
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": LIMIT})
+    app.state.reads = 0
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        app.state.reads += 1
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return app, TestClient(app)
+
+
+def test_declared_length_over_limit_is_refused_before_the_handler():
+    app, client = _client()
+    resp = client.post("/upload", content=b"x" * (LIMIT + 1))
+    assert resp.status_code == 413
+    assert app.state.reads == 0
+
+
+def test_chunked_body_is_cut_off_once_it_passes_the_limit():
+    _, client = _client()
+
+    def chunks():
+        for _ in range(8):
+            yield b"x" * 512
+
+    resp = client.post("/upload", content=chunks())
+    assert resp.status_code == 413
+
+
+def test_bodies_within_limit_and_other_paths_pass_through():
+    _, client = _client()
+    assert client.post("/upload", content=b"x" * LIMIT).json() == {"size": LIMIT}
+    assert client.post("/other", content=b"x" * (LIMIT * 4)).json() == {"size": LIMIT * 4}
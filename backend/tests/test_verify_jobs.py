@@ -0,0 +1,63 @@
+import asyncio
+
+from app.jobs.verify_jobs import MemoryJobStore, VerifyJob, VerifyJobManager
+from app.realtime import codec
+
+
+class _SerializingStore(MemoryJobStore):
+    """Round-trips records through JSON like RedisJobStore, so readers never share the writer's object."""
+    name = "serializing"
+
+    def save(self, job: VerifyJob):
+        super().save(VerifyJob.from_record(codec.loads(codec.dumps(job.to_record()))))
+
+
+def _pipeline(progress, value):
+    progress("ocr")
+    return {"value": value}
+
+
+def test_job_submitted_on_one_worker_is_visible_from_another():
+    async def scenario():
+        store = _SerializingStore()
+        accepting, polling = VerifyJobManager(workers=1, store=store), VerifyJobManager(workers=1, store=store)
+        finished = []
+
+        async def on_done(job):
+            finished.append(job.to_dict())
+
+        job = accepting.submit(7, _pipeline, 42, meeting_code="m1", on_done=on_done)
+        queued = await polling.get(job.id)
+        for _ in range(100):
+            if finished:
+                break
+            await asyncio.sleep(0.01)
+        return job, queued, await polling.get(job.id), finished, accepting.stats()
+
+    job, queued, done, finished, stats = asyncio.run(scenario())
+    assert queued is not None and queued.user_id == 7
+    assert done.status == "done" and done.result == {"value": 42}
+    assert done.stage == "ocr" and done.meeting_code == "m1" and done.finished_at
+    assert finished == [done.to_dict()]
+    assert stats["jobs"] == {"done": 1}
+
+
+def test_failed_job_records_the_error():
+    def failing(progress):
+        raise ValueError("unreadable document")
+
+    async def scenario():
+        manager = VerifyJobManager(workers=1, store=_SerializingStore())
+        job = manager.submit(1, failing)
+        for _ in range(100):
+            stored = await manager.get(job.id)
+            if stored.finished_at:
+                return stored
+            await asyncio.sleep(0.01)
+
+    stored = asyncio.run(scenario())
+    assert stored.status == "failed" and stored.error == "unreadable document"
+
+
+def test_unknown_job_is_none():
+    assert asyncio.run(VerifyJobManager(workers=1, store=MemoryJobStore()).get("missing")) is None
@@ -0,0 +1,53 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from app.verification import video_sampler
+from app.verification.video_sampler import sample_frames
+
+
+def _write_numbered_video(path, frames: int, fps: float = 30.0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(frames):
+        # Frame index encoded in brightness so the test can read the order back
+        writer.write(np.full((48, 64, 3), i, dtype=np.uint8))
+    writer.release()
+
+
+def _indices(frames):
+    return [int(round(float(f.mean()))) for f in frames]
+
+
+def test_window_is_contiguous_and_centred_in_the_same_pass(tmp_path, monkeypatch):
+    video = tmp_path / "clip.avi"
+    _write_numbered_video(video, 200)
+
+    opened = []
+    real_capture = cv2.VideoCapture
+    monkeypatch.setattr(video_sampler.cv2, "VideoCapture", lambda path: opened.append(path) or real_capture(path))
+
+    frames, window = sample_frames(str(video), k=8, window_sec=1.0)
+
+    assert len(opened) == 1
+    assert len(frames) == 8
+    assert _indices(frames)[0] == 0 and abs(_indices(frames)[-1] - 199) <= 2
+    seen = _indices(window)
+    assert len(seen) == 30
+    assert all(b - a == 1 for a, b in zip(seen, seen[1:]))
+    assert abs(seen[0] - 85) <= 2
+
+
+def test_window_on_short_video_returns_all_frames(tmp_path):
+    video = tmp_path / "short.avi"
+    _write_numbered_video(video, 12)
+
+    frames, window = sample_frames(str(video), k=4, window_sec=2.0)
+    assert len(window) == 12
+    assert len(frames) == 4
+
+
+def test_no_window_unless_asked(tmp_path):
+    video = tmp_path / "clip.avi"
+    _write_numbered_video(video, 30)
+    assert sample_frames(str(video), k=4)[1] == []
@@ -52,7 +52,7 @@ export default function Dashboard() {
     setLoadingLogs(true);
     try {
       const res = await axios.get('/api/v1/admin/verifications');
-      setLogs(res.data);
+      setLogs(res.data.items);
     } catch (err) {
       console.error("Failed to fetch admin logs", err);
     } finally {